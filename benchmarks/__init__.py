@@ -0,0 +1,15 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2019 CompuCom, All Rights Reserved
+# Created by Luis Fuentes
+
+"""This package contains the benchmark suite of the coding challenge.
+
+The suite generates databases at several scale factors, measures the runtime and peak memory of all public functions
+and writes the results as JSON. Run it from the repository root by
+
+    python -m benchmarks --scales 1 2 4 --output benchmark_results.json
+
+and pass --compare with an older result file to detect regressions.
+"""
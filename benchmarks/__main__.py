@@ -0,0 +1,81 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2019 CompuCom, All Rights Reserved
+# Created by Luis Fuentes
+
+"""Command line entry point of the benchmark suite, see the package documentation."""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+from benchmarks.harness import run_benchmarks, compare_reports
+
+
+def _format_seconds(value):
+    """Formats a runtime for the result table."""
+    return "-" if value is None else f"{value * 1000:10.2f} ms"
+
+
+def _format_bytes(value):
+    """Formats a memory size for the result table."""
+    return "-" if value is None else f"{value / 1024 / 1024:8.2f} MiB"
+
+
+def main(arguments=None):
+    """Runs the benchmark suite.
+
+    Args:
+        arguments (list): Command line arguments, sys.argv is used in case this is None.
+
+    Returns:
+        int: Returns the exit code, 1 in case regressions were found.
+    """
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__)
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 2, 4],
+                        help="scale factors of the generated databases")
+    parser.add_argument("--repeat", type=int, default=3, help="number of warm runs per benchmark")
+    parser.add_argument("--seed", type=int, default=42, help="seed of the database generation")
+    parser.add_argument("--directory", default=os.path.join(tempfile.gettempdir(), "coding_challenge_benchmarks"),
+                        help="directory the generated databases are kept in")
+    parser.add_argument("--regenerate", action="store_true", help="regenerate existing databases")
+    parser.add_argument("--select", nargs="+", help="only run benchmarks containing one of these substrings")
+    parser.add_argument("--output", help="file the JSON results are written to")
+    parser.add_argument("--compare", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="relative runtime growth reported as regression")
+    options = parser.parse_args(arguments)
+
+    os.makedirs(options.directory, exist_ok=True)
+    report = run_benchmarks(options.directory, options.scales, options.repeat, options.seed, options.select,
+                            reuse=not options.regenerate)
+
+    for result in report["results"]:
+        print(f"{result['benchmark']:<65} scale {result['scale']:>4}  {result['status']:<15} "
+              f"cold {_format_seconds(result['cold_seconds'])}  warm {_format_seconds(result['warm_seconds'])}  "
+              f"peak {_format_bytes(result['peak_memory_bytes'])}")
+
+    if options.output:
+        with open(options.output, "w") as output_file:
+            json.dump(report, output_file, indent=2)
+
+    if options.compare:
+        with open(options.compare) as baseline_file:
+            regressions = compare_reports(json.load(baseline_file), report, options.threshold)
+
+        for regression in regressions:
+            print(f"REGRESSION {regression['benchmark']} scale {regression['scale']} {regression['metric']}: "
+                  f"{_format_seconds(regression['baseline'])} -> {_format_seconds(regression['current'])} "
+                  f"({regression['ratio']:.2f}x)")
+
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
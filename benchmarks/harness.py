@@ -0,0 +1,355 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2019 CompuCom, All Rights Reserved
+# Created by Luis Fuentes
+
+"""This module contains the benchmark harness: the registered benchmarks, their execution and the result comparison.
+
+Every benchmark is a function taking the path of a generated database and a DatabaseSample, which provides ids of
+existing entities for functions that need them. Benchmarks are registered by the **benchmark** decorator.
+"""
+
+import os
+import platform
+import sqlite3.dbapi2 as dbapi
+import time
+import tracemalloc
+from dataclasses import dataclass, asdict
+
+from resources.generate_database import recreate_database_file, generate_tables, populate_database, \
+    optimize_database
+
+from coding_challenge import application_logic, data_analysis_and_retrieval, forecasting
+from coding_challenge.application_logic import DataLoader, clear_caches
+
+
+BENCHMARKS = []
+
+
+@dataclass
+class DatabaseSample:
+    """Ids of entities of a benchmark database, together with the size of the database.
+
+    Attributes:
+        model_id (str): Id of the model with the most revisions.
+        tenant_id (str): Id of the tenant with the most objects.
+        row_counts (dict): Maps the table names onto their number of rows.
+    """
+    model_id: str
+    tenant_id: str
+    row_counts: dict
+
+
+@dataclass
+class BenchmarkResult:
+    """Measurements of a single benchmark on a single database.
+
+    Attributes:
+        benchmark (str): Name of the benchmark.
+        scale (int): Scale factor of the database the benchmark was run on.
+        status (str): "ok" or "error".
+        cold_seconds (float): Runtime of the first call, with all in-process caches cleared.
+        warm_seconds (float): Fastest runtime of the repeated calls.
+        peak_memory_bytes (int): Peak memory allocated by Python during a cold call, measured with tracemalloc.
+        error (str): Description of the error in case the benchmark failed.
+    """
+    benchmark: str
+    scale: int
+    status: str
+    cold_seconds: float = None
+    warm_seconds: float = None
+    peak_memory_bytes: int = None
+    error: str = None
+
+
+def benchmark(name):
+    """Registers a benchmark function under the given name.
+
+    Args:
+        name (str): Name of the benchmark, used to match results between runs.
+
+    Returns:
+        callable: Returns the decorator registering the function.
+    """
+    def register(function):
+        BENCHMARKS.append((name, function))
+        return function
+
+    return register
+
+
+@benchmark("data_loader.get_model_revisions")
+def _benchmark_get_model_revisions(database_file_path, sample):
+    DataLoader(database_file_path, cache=None).get_model_revisions()
+
+
+@benchmark("data_loader.iter_model_revisions")
+def _benchmark_iter_model_revisions(database_file_path, sample):
+    for _ in DataLoader(database_file_path).iter_model_revisions():
+        pass
+
+
+@benchmark("data_loader.get_model_revision_table")
+def _benchmark_get_model_revision_table(database_file_path, sample):
+    DataLoader(database_file_path).get_model_revision_table()
+
+
+@benchmark("data_loader.get_objects")
+def _benchmark_get_objects(database_file_path, sample):
+    DataLoader(database_file_path, cache=None).get_objects()
+
+
+@benchmark("data_loader.get_users")
+def _benchmark_get_users(database_file_path, sample):
+    DataLoader(database_file_path, cache=None).get_users()
+
+
+@benchmark("data_loader.get_models")
+def _benchmark_get_models(database_file_path, sample):
+    DataLoader(database_file_path, cache=None).get_models()
+
+
+@benchmark("data_loader.get_tenants")
+def _benchmark_get_tenants(database_file_path, sample):
+    DataLoader(database_file_path, cache=None).get_tenants()
+
+
+@benchmark("data_analysis_and_retrieval.get_purple_tenants_count")
+def _benchmark_get_purple_tenants_count(database_file_path, sample):
+    data_analysis_and_retrieval.get_purple_tenants_count(database_file_path)
+
+
+@benchmark("data_analysis_and_retrieval.get_active_tenants")
+def _benchmark_get_active_tenants(database_file_path, sample):
+    data_analysis_and_retrieval.get_active_tenants(database_file_path)
+
+
+@benchmark("data_analysis_and_retrieval.get_model_count_of_largest_tenant")
+def _benchmark_get_model_count_of_largest_tenant(database_file_path, sample):
+    data_analysis_and_retrieval.get_model_count_of_largest_tenant(database_file_path)
+
+
+@benchmark("data_analysis_and_retrieval.get_revision_heaviest_tenant_one")
+def _benchmark_get_revision_heaviest_tenant_one(database_file_path, sample):
+    data_analysis_and_retrieval.get_revision_heaviest_tenant_one(database_file_path)
+
+
+@benchmark("data_analysis_and_retrieval.get_revision_heaviest_tenant_two")
+def _benchmark_get_revision_heaviest_tenant_two(database_file_path, sample):
+    data_analysis_and_retrieval.get_revision_heaviest_tenant_two(database_file_path)
+
+
+@benchmark("data_analysis_and_retrieval.get_lazy_users")
+def _benchmark_get_lazy_users(database_file_path, sample):
+    data_analysis_and_retrieval.get_lazy_users(database_file_path)
+
+
+@benchmark("data_analysis_and_retrieval.run_report_suite")
+def _benchmark_run_report_suite(database_file_path, sample):
+    data_analysis_and_retrieval.run_report_suite(database_file_path)
+
+
+@benchmark("application_logic.get_chronological_ordered_model_revisions")
+def _benchmark_get_chronological_ordered_model_revisions(database_file_path, sample):
+    application_logic.get_chronological_ordered_model_revisions(database_file_path, sample.model_id)
+
+
+@benchmark("application_logic.get_most_active_user")
+def _benchmark_get_most_active_user(database_file_path, sample):
+    application_logic.get_most_active_user(database_file_path, sample.tenant_id)
+
+
+@benchmark("application_logic.get_most_active_users_by_tenant")
+def _benchmark_get_most_active_users_by_tenant(database_file_path, sample):
+    application_logic.get_most_active_users_by_tenant(database_file_path)
+
+
+@benchmark("application_logic.get_ordered_list_of_active_model_titles")
+def _benchmark_get_ordered_list_of_active_model_titles(database_file_path, sample):
+    application_logic.get_ordered_list_of_active_model_titles(database_file_path, sample.tenant_id, True)
+
+
+@benchmark("application_logic.sort_string_list")
+def _benchmark_sort_string_list(database_file_path, sample):
+    titles = [model.title for model in DataLoader(database_file_path).get_models()]
+    application_logic.sort_string_list(titles, True)
+
+
+@benchmark("forecasting.get_forecasted_model_revision_growth_rate")
+def _benchmark_get_forecasted_model_revision_growth_rate(database_file_path, sample):
+    forecasting.get_forecasted_model_revision_growth_rate(database_file_path, 50, 3)
+
+
+def generate_benchmark_database(directory, scale, seed=42, reuse=True):
+    """Generates the database for a scale factor.
+
+    Args:
+        directory (str): Directory the database file is stored in.
+        scale (int): Scaling factor passed to the database generator.
+        seed (int): Seed of the random number generator, combined with the scale factor.
+        reuse (bool): If True, an existing database file of the same scale is reused.
+
+    Returns:
+        str: Returns the path of the database file.
+    """
+    database_file_path = os.path.join(directory, f"benchmark_scale_{scale}.db")
+    if reuse and os.path.isfile(database_file_path):
+        return database_file_path
+
+    recreate_database_file(database_file_path)
+    generate_tables(database_file_path)
+    populate_database(database_file_path, scale, seed * 1000003 + scale)
+    optimize_database(database_file_path)
+
+    return database_file_path
+
+
+def get_database_sample(database_file_path):
+    """Selects the entities the benchmarks are run for.
+
+    Args:
+        database_file_path (str): Path to the database file.
+
+    Returns:
+        DatabaseSample: Returns the ids of the selected entities and the size of the database.
+    """
+    database = dbapi.connect(database_file_path)
+    cursor = database.cursor()
+
+    cursor.execute("SELECT model FROM ModelRevisions GROUP BY model ORDER BY COUNT(*) DESC, model LIMIT 1")
+    model_id = cursor.fetchone()[0]
+    cursor.execute("SELECT tenant FROM Objects GROUP BY tenant ORDER BY COUNT(*) DESC, tenant LIMIT 1")
+    tenant_id = cursor.fetchone()[0]
+
+    row_counts = {}
+    for table in ("Objects", "Tenants", "Users", "Models", "ModelRevisions"):
+        cursor.execute(f"SELECT COUNT(*) FROM {table}")
+        row_counts[table] = cursor.fetchone()[0]
+
+    cursor.close()
+    database.close()
+
+    return DatabaseSample(model_id, tenant_id, row_counts)
+
+
+def run_benchmark(name, function, database_file_path, sample, scale, repeat=3):
+    """Measures a single benchmark.
+
+    The benchmark is called once with cleared caches to measure the cold runtime, once more with cleared caches under
+    tracemalloc to measure the peak memory, and repeat times to measure the warm runtime.
+
+    Args:
+        name (str): Name of the benchmark.
+        function (callable): The benchmark function.
+        database_file_path (str): Path to the database file.
+        sample (DatabaseSample): Entities the benchmark is run for.
+        scale (int): Scale factor of the database.
+        repeat (int): Number of warm runs.
+
+    Returns:
+        BenchmarkResult: Returns the measurements of the benchmark.
+    """
+    try:
+        clear_caches()
+        data_analysis_and_retrieval.clear_query_result_cache()
+        forecasting.clear_growth_series_cache()
+        start = time.perf_counter()
+        function(database_file_path, sample)
+        cold_seconds = time.perf_counter() - start
+
+        clear_caches()
+        data_analysis_and_retrieval.clear_query_result_cache()
+        forecasting.clear_growth_series_cache()
+        tracemalloc.start()
+        try:
+            function(database_file_path, sample)
+            _, peak_memory_bytes = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        warm_seconds = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            function(database_file_path, sample)
+            elapsed = time.perf_counter() - start
+            warm_seconds = elapsed if warm_seconds is None else min(warm_seconds, elapsed)
+    except Exception as error:
+        return BenchmarkResult(name, scale, "error", error=f"{type(error).__name__}: {error}")
+
+    return BenchmarkResult(name, scale, "ok", cold_seconds, warm_seconds, peak_memory_bytes)
+
+
+def run_benchmarks(directory, scales, repeat=3, seed=42, selected=None, reuse=True):
+    """Runs all registered benchmarks on databases of several scale factors.
+
+    Args:
+        directory (str): Directory the generated databases are stored in.
+        scales (list): Scale factors the databases are generated for.
+        repeat (int): Number of warm runs per benchmark.
+        seed (int): Seed of the database generation.
+        selected (list): Substrings of the benchmark names to be run. All benchmarks are run in case this is None.
+        reuse (bool): If True, existing databases of the same scale are reused.
+
+    Returns:
+        dict: Returns the JSON serializable report containing the environment, the databases and all results.
+    """
+    report = {
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "sqlite": dbapi.sqlite_version,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "databases": {},
+        "results": [],
+    }
+
+    for scale in scales:
+        database_file_path = generate_benchmark_database(directory, scale, seed, reuse)
+        sample = get_database_sample(database_file_path)
+        report["databases"][str(scale)] = sample.row_counts
+
+        for name, function in BENCHMARKS:
+            if selected and not any(pattern in name for pattern in selected):
+                continue
+            result = run_benchmark(name, function, database_file_path, sample, scale, repeat)
+            report["results"].append(asdict(result))
+
+    return report
+
+
+def compare_reports(baseline, current, threshold=0.2, minimum_seconds=0.001):
+    """Compares two benchmark reports and returns the regressions.
+
+    A benchmark regressed, in case its cold or warm runtime grew by more than the threshold. Runtimes below the
+    minimum are ignored, as they are dominated by noise, as are metrics missing in either report. The ratio of a
+    regression from a runtime of zero is infinite.
+
+    Args:
+        baseline (dict): Report of the earlier run.
+        current (dict): Report of the current run.
+        threshold (float): Allowed relative growth of the runtime, 0.2 allows 20 % slower runs.
+        minimum_seconds (float): Runtimes below this value are not compared.
+
+    Returns:
+        list: Returns a list of dictionaries, each describing one regression.
+    """
+    baseline_results = {(result["benchmark"], result["scale"]): result for result in baseline["results"]}
+
+    regressions = []
+    for result in current["results"]:
+        baseline_result = baseline_results.get((result["benchmark"], result["scale"]))
+        if baseline_result is None or result["status"] != "ok" or baseline_result["status"] != "ok":
+            continue
+
+        for metric in ("cold_seconds", "warm_seconds"):
+            baseline_value, value = baseline_result.get(metric), result.get(metric)
+            if baseline_value is None or value is None or max(baseline_value, value) < minimum_seconds:
+                continue
+            if value > baseline_value * (1 + threshold):
+                ratio = value / baseline_value if baseline_value > 0 else float("inf")
+                regressions.append({"benchmark": result["benchmark"], "scale": result["scale"], "metric": metric,
+                                    "baseline": baseline_value, "current": value, "ratio": ratio})
+
+    return regressions
@@ -4,9 +4,45 @@
 # Copyright (c) 2019 CompuCom, All Rights Reserved
 # Created by Luis Fuentes
 
+import bisect
+import functools
+import heapq
+import locale
+import os
 import sqlite3.dbapi2 as dbapi
+import sys
+import threading
+import unicodedata
+from array import array
 from dataclasses import dataclass
 
+from coding_challenge.caching import LRUCache, get_database_version
+from coding_challenge.connection_pool import get_connection_pool
+from coding_challenge.instrumentation import phase, register_cache
+
+
+DEFAULT_BATCH_SIZE = 1000
+
+# the entity cache is bounded by the total number of cached rows
+DEFAULT_ENTITY_CACHE_SIZE = 500000
+DEFAULT_ENTITY_CACHE_TTL = 300.0
+
+ENTITY_CACHE = LRUCache(max_size=DEFAULT_ENTITY_CACHE_SIZE, ttl=DEFAULT_ENTITY_CACHE_TTL, sizeof=len)
+register_cache("entity", ENTITY_CACHE)
+
+DEFAULT_COLLATION_KEY_CACHE_SIZE = 65536
+
+# the vectorized engine is used whenever NumPy is available, unless it is disabled by CODING_CHALLENGE_VECTORIZED=0
+USE_VECTORIZED_ENGINE = os.environ.get("CODING_CHALLENGE_VECTORIZED", "1") != "0"
+
+# each cached EntityIndex covers a whole database, therefore only a few of them are kept
+_ENTITY_INDEX_CACHE = LRUCache(max_size=4, ttl=DEFAULT_ENTITY_CACHE_TTL)
+register_cache("entity_index", _ENTITY_INDEX_CACHE)
+
+# title indexes are refreshed instead of rebuilt, they are therefore kept per database together with their version
+_TITLE_INDEXES = {}
+_TITLE_INDEXES_LOCK = threading.Lock()
+
 
 @dataclass
 class Object:
@@ -37,7 +73,7 @@ class Object:
 class Model:
     """Class representing a model of the application."""
     id: str
-    name: str
+    title: str
 
     def __init__(self, id: str, title: str,):
         """Initializes the Model.
@@ -121,111 +157,926 @@ class Tenant:
         self.name = name
 
 
+class _EntityRecord:
+    """Base class of the compact entity records.
+
+    A record holds the same data as the corresponding dataclass, but is immutable and stores its attributes in
+    __slots__ instead of a per-instance __dict__.
+    """
+    __slots__ = ()
+    _entity_class = None
+
+    def __getstate__(self):
+        """Returns the attribute values, as frozen records without __dict__ cannot be pickled by default."""
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __setstate__(self, state):
+        """Restores the attribute values of an unpickled record."""
+        for name, value in zip(self.__slots__, state):
+            object.__setattr__(self, name, value)
+
+    @classmethod
+    def from_entity(cls, entity):
+        """Returns the record holding the data of a dataclass instance.
+
+        Args:
+            entity (object): Instance of the dataclass the record represents.
+
+        Returns:
+            _EntityRecord: Returns a record of the class the method is called on.
+        """
+        return cls(*(getattr(entity, name) for name in cls.__slots__))
+
+    def to_entity(self):
+        """Returns the dataclass instance holding the data of the record.
+
+        Returns:
+            object: Returns an instance of the dataclass the record represents.
+        """
+        return self._entity_class(*self.__getstate__())
+
+
+@dataclass(frozen=True)
+class ObjectRecord(_EntityRecord):
+    """Compact, immutable representation of an Object."""
+    __slots__ = ("id", "object_type", "tenant", "marked_for_deletion")
+    _entity_class = Object
+    id: str
+    object_type: str
+    tenant: str
+    marked_for_deletion: int
+
+
+@dataclass(frozen=True)
+class ModelRecord(_EntityRecord):
+    """Compact, immutable representation of a Model."""
+    __slots__ = ("id", "title")
+    _entity_class = Model
+    id: str
+    title: str
+
+
+@dataclass(frozen=True)
+class ModelRevisionRecord(_EntityRecord):
+    """Compact, immutable representation of a ModelRevision."""
+    __slots__ = ("id", "model", "author", "revision_number", "creation_date")
+    _entity_class = ModelRevision
+    id: str
+    model: str
+    author: str
+    revision_number: int
+    creation_date: int
+
+
+@dataclass(frozen=True)
+class UserRecord(_EntityRecord):
+    """Compact, immutable representation of a User."""
+    __slots__ = ("id", "first_name", "last_name")
+    _entity_class = User
+    id: str
+    first_name: str
+    last_name: str
+
+
+@dataclass(frozen=True)
+class TenantRecord(_EntityRecord):
+    """Compact, immutable representation of a Tenant."""
+    __slots__ = ("id", "name")
+    _entity_class = Tenant
+    id: str
+    name: str
+
+
+class _ColumnarTable:
+    """Base class of the columnar entity containers.
+
+    Each column is stored in a single container: integer columns in an array of machine integers, string columns in a
+    list. Strings of columns that reference other entities repeat a lot and are therefore interned, so that every
+    distinct id is only stored once. Rows are materialized on demand, either as dataclass instances or as records.
+
+    Subclasses define the columns as tuples of (name, kind), where kind is an array typecode, "str" or "interned".
+    """
+    _columns = ()
+    _entity_class = None
+    _record_class = None
+
+    def __init__(self):
+        """Initializes an empty table."""
+        super(_ColumnarTable, self).__init__()
+
+        self._data = [array(kind) if kind not in ("str", "interned") else [] for _, kind in self._columns]
+        self._column_indexes = {name: idx for idx, (name, _) in enumerate(self._columns)}
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Creates a table holding the given rows.
+
+        Args:
+            rows (iterable): Tuples containing the values of one row each, in column order.
+
+        Returns:
+            _ColumnarTable: Returns a table of the class the method is called on.
+        """
+        table = cls()
+        table.extend(rows)
+        return table
+
+    @classmethod
+    def from_columns(cls, columns):
+        """Creates a table backed by the given containers, without copying them.
+
+        Integer columns may be given as any sequence supporting the buffer protocol, e.g. a memoryview of a memory
+        mapped file. A table created this way can only be appended to in case all containers support append.
+
+        Args:
+            columns (list): One container per column, in column order.
+
+        Returns:
+            _ColumnarTable: Returns a table of the class the method is called on.
+        """
+        table = cls()
+        table._data = list(columns)
+        return table
+
+    def append(self, row):
+        """Appends a single row to the table.
+
+        Args:
+            row (tuple): Tuple containing the values of the row in column order.
+        """
+        for (_, kind), values, value in zip(self._columns, self._data, row):
+            values.append(sys.intern(value) if kind == "interned" and value is not None else value)
+
+    def extend(self, rows):
+        """Appends several rows to the table.
+
+        Args:
+            rows (iterable): Tuples containing the values of one row each, in column order.
+        """
+        for row in rows:
+            self.append(row)
+
+    def column(self, name):
+        """Returns all values of a column.
+
+        The returned container is the one backing the table and must not be modified.
+
+        Args:
+            name (str): Name of the column.
+
+        Returns:
+            list or array.array: Returns the values of the column in row order.
+        """
+        return self._data[self._column_indexes[name]]
+
+    def row(self, idx):
+        """Returns the values of a single row.
+
+        Args:
+            idx (int): Position of the row.
+
+        Returns:
+            tuple: Returns the values of the row in column order.
+        """
+        return tuple(values[idx] for values in self._data)
+
+    def record(self, idx):
+        """Returns a single row as compact record.
+
+        Args:
+            idx (int): Position of the row.
+
+        Returns:
+            _EntityRecord: Returns the record holding the values of the row.
+        """
+        return self._record_class(*self.row(idx))
+
+    def __len__(self):
+        """Returns the number of rows of the table."""
+        return len(self._data[0])
+
+    def __getitem__(self, idx):
+        """Returns a single row as dataclass instance."""
+        return self._entity_class(*self.row(idx))
+
+    def __iter__(self):
+        """Iterates over all rows, creating one dataclass instance at a time."""
+        for row in zip(*self._data):
+            yield self._entity_class(*row)
+
+
+class ObjectTable(_ColumnarTable):
+    """Columnar container of Objects."""
+    _columns = (("id", "str"), ("object_type", "interned"), ("tenant", "interned"), ("marked_for_deletion", "b"))
+    _entity_class = Object
+    _record_class = ObjectRecord
+
+
+class ModelRevisionTable(_ColumnarTable):
+    """Columnar container of ModelRevisions."""
+    _columns = (("id", "str"), ("model", "interned"), ("author", "interned"), ("revision_number", "q"),
+                ("creation_date", "q"))
+    _entity_class = ModelRevision
+    _record_class = ModelRevisionRecord
+
+
+_TABLE_COLUMNS = {
+    "Objects": ("id", "object_type", "tenant", "marked_for_deletion"),
+    "Models": ("id", "title"),
+    "ModelRevisions": ("id", "model", "author", "revision_number", "creation_date"),
+    "Users": ("id", "first_name", "last_name"),
+    "Tenants": ("id", "name"),
+}
+
+_PLACEHOLDERS = {
+    "qmark": "?",
+    "numeric": ":{position}",
+    "named": ":{name}",
+    "format": "%s",
+    "pyformat": "%({name})s",
+}
+
+_MAX_PARAMETERS = 900
+
+
+def _validate_columns(table, columns):
+    """Checks that all columns exist in the table, as column names cannot be passed as bound parameters.
+
+    Args:
+        table (str): Name of the table the columns belong to.
+        columns (iterable): Names of the columns to be checked.
+
+    Raises:
+        ValueError: In case one of the columns is not part of the table.
+    """
+    unknown_columns = [column for column in columns if column not in _TABLE_COLUMNS[table]]
+    if unknown_columns:
+        raise ValueError(f"The table {table} has no column(s) {', '.join(map(str, unknown_columns))}.")
+
+
+def _compile_select(table, columns=None, where=None, paramstyle="qmark"):
+    """Compiles a filter and projection specification into a parameterized SELECT statement.
+
+    The specification is dialect neutral: where maps column names onto values. A single value is compared by
+    equality, a list, tuple or set of values is compared by IN and None is compared by IS NULL. All conditions are
+    combined by AND. The statement uses the placeholders of the given DB-API paramstyle.
+
+    Args:
+        table (str): Name of the table to select from.
+        columns (list): Names of the columns to be selected. All columns are selected in case this is None.
+        where (dict): Maps column names onto the values the rows are filtered by.
+        paramstyle (str): DB-API paramstyle of the database driver the statement is compiled for.
+
+    Returns:
+        tuple: Returns a tuple of (str, tuple or dict) containing the query and its parameters.
+    """
+    columns = _TABLE_COLUMNS[table] if columns is None else tuple(columns)
+    where = where or {}
+    _validate_columns(table, list(columns) + list(where))
+
+    placeholder = _PLACEHOLDERS[paramstyle]
+    named = paramstyle in ("named", "pyformat")
+    parameters = {} if named else []
+
+    def bind(column, value):
+        name = f"{column}_{len(parameters)}"
+        if named:
+            parameters[name] = value
+        else:
+            parameters.append(value)
+        return placeholder.format(name=name, position=len(parameters))
+
+    conditions = []
+    for column, value in where.items():
+        if value is None:
+            conditions.append(f"{column} IS NULL")
+        elif isinstance(value, (list, tuple, set, frozenset)):
+            if not value:
+                conditions.append("1 = 0")
+            else:
+                conditions.append(f"{column} IN ({', '.join(bind(column, item) for item in value)})")
+        else:
+            conditions.append(f"{column} = {bind(column, value)}")
+
+    query = f"SELECT {', '.join(columns)} FROM {table}"
+    if conditions:
+        query += f" WHERE {' AND '.join(conditions)}"
+
+    return query, parameters if named else tuple(parameters)
+
+
+def _split_where(where, max_parameters=_MAX_PARAMETERS):
+    """Splits a filter specification, so that no compiled statement exceeds the number of bound parameters.
+
+    The largest IN list is split into chunks, each chunk results in a separate filter specification.
+
+    Args:
+        where (dict): Maps column names onto the values the rows are filtered by.
+        max_parameters (int): Maximum number of parameters a single statement may contain.
+
+    Returns:
+        list: List of filter specifications that together select the same rows as the given one.
+    """
+    if not where:
+        return [where]
+
+    collections = {column: list(value) for column, value in where.items()
+                   if isinstance(value, (list, tuple, set, frozenset))}
+    parameter_count = sum(len(value) for value in collections.values()) + len(where) - len(collections)
+    if parameter_count <= max_parameters:
+        return [where]
+
+    column = max(collections, key=lambda name: len(collections[name]))
+    chunk_size = max_parameters - (parameter_count - len(collections[column]))
+    if chunk_size < 1:
+        raise ValueError("The filter contains too many values to be split into valid statements.")
+
+    values = list(dict.fromkeys(collections[column]))
+    return [dict(where, **{column: values[idx:idx + chunk_size]}) for idx in range(0, len(values), chunk_size)]
+
+
+def _create_entities(entity_class, table, columns, rows):
+    """Creates one entity per row.
+
+    Args:
+        entity_class (type): Class of the entities to be created.
+        table (str): Name of the table the rows were loaded from.
+        columns (list): Names of the loaded columns. The rows contain all columns in case this is None.
+        rows (iterable): Tuples containing the values of the loaded columns.
+
+    Yields:
+        object: One instance of entity_class per row.
+    """
+    if columns is None:
+        for row in rows:
+            yield entity_class(*row)
+    else:
+        missing_columns = dict.fromkeys(_TABLE_COLUMNS[table])
+        for row in rows:
+            yield entity_class(**dict(missing_columns, **dict(zip(columns, row))))
+
+
+def _entity_cache_key(database_file_path, table, where, columns):
+    """Returns the key under which the rows of a load are cached.
+
+    Args:
+        database_file_path (str): Path to the database file.
+        table (str): Name of the table the rows are loaded from.
+        where (dict): Maps column names onto the values the rows are filtered by.
+        columns (list): Names of the loaded columns.
+
+    Returns:
+        tuple: Returns the hashable key, or None in case the specification contains unhashable values.
+    """
+    try:
+        normalized_where = []
+        for column, value in sorted((where or {}).items()):
+            if isinstance(value, (list, tuple, set, frozenset)):
+                value = frozenset(value)
+            normalized_where.append((column, value))
+
+        key = (os.path.abspath(database_file_path), table, tuple(normalized_where),
+               tuple(columns) if columns is not None else None)
+        hash(key)
+    except TypeError:
+        return None
+
+    return key
+
+
 class DataLoader:
-    """The DataLoader is responsible to load all entities from the database. """
+    """The DataLoader is responsible to load all entities from the database.
+
+    Every entity type can either be loaded as a list by get_<entities>, or streamed by iter_<entities>. The iterators
+    fetch the rows in batches, so that only a single batch is kept in memory at any time.
+
+    All loaders accept a dialect neutral filter and projection specification, which is compiled into a parameterized
+    statement for the database driver:
 
-    def __init__(self, database_file_path):
+        data_loader.get_model_revisions(where={"model": model_id}, columns=["id", "creation_date"])
+
+    The where argument maps column names onto a value, a collection of values or None, see _compile_select. In case
+    columns is given, only these columns are loaded and all other attributes of the returned entities are None.
+
+    The rows loaded by get_<entities> are kept in an in-process cache, keyed by the database file, the table and the
+    specification. Cached rows are served until the database file changes, their time to live expires or they are
+    evicted. The iterators always stream from the database.
+    """
+
+    def __init__(self, database_file_path, paramstyle=dbapi.paramstyle, cache=ENTITY_CACHE):
         """Initializes the DataLoader.
 
         Args:
             database_file_path (str): String containing the path where the SQLite database file can be found.
+            paramstyle (str): DB-API paramstyle used for the compiled statements.
+            cache (LRUCache): Cache the rows loaded by get_<entities> are stored in. By default, all DataLoaders share
+                the module wide ENTITY_CACHE. The cache is bypassed in case this is None.
         """
         super(DataLoader, self).__init__()
         self.database_file = database_file_path
+        self.paramstyle = paramstyle
+        self.cache = cache
 
-    def _load_data_from_database(self, query):
+    def _load_data_from_database(self, query, parameters=()):
         """Loads the requested data from the database.
 
         This method is private and should therefore not be called directly!
 
         Args:
             query (str): Query to be executed.
+            parameters (tuple): Parameters bound to the placeholders of the query.
 
         Returns:
             list: List containing tuples, each representing one row of the query result.
         """
-        database = dbapi.connect(self.database_file)
-        cursor = database.cursor()
-        cursor.execute(query)
+        with get_connection_pool(self.database_file).connection() as database:
+            cursor = database.cursor()
+            with phase("query.execute"):
+                cursor.execute(query, parameters)
 
-        result = cursor.fetchall()
+            with phase("query.fetch") as measurement:
+                result = cursor.fetchall()
+                measurement.add_rows(len(result))
 
-        cursor.close()
-        database.close()
+            cursor.close()
 
         return result
 
-    def get_model_revisions(self):
+    def _iter_data_from_database(self, query, parameters=(), batch_size=DEFAULT_BATCH_SIZE):
+        """Streams the requested data from the database in batches.
+
+        This method is private and should therefore not be called directly! The pooled connection is held until the
+        generator is exhausted or closed.
+
+        Args:
+            query (str): Query to be executed.
+            parameters (tuple): Parameters bound to the placeholders of the query.
+            batch_size (int): Number of rows fetched from the cursor at once.
+
+        Yields:
+            tuple: One row of the query result.
+        """
+        with get_connection_pool(self.database_file).connection() as database:
+            cursor = database.cursor()
+            try:
+                with phase("query.execute"):
+                    cursor.execute(query, parameters)
+
+                while True:
+                    with phase("query.fetch") as measurement:
+                        rows = cursor.fetchmany(batch_size)
+                        measurement.add_rows(len(rows))
+                    if not rows:
+                        break
+                    yield from rows
+            finally:
+                cursor.close()
+
+    def _iter_rows(self, table, where, columns, batch_size):
+        """Streams the rows of a table, filtered and projected by the given specification.
+
+        Args:
+            table (str): Name of the table the rows are loaded from.
+            where (dict): Maps column names onto the values the rows are filtered by.
+            columns (list): Names of the columns to be loaded. All columns are loaded in case this is None.
+            batch_size (int): Number of rows fetched from the database at once.
+
+        Yields:
+            tuple: One selected row, containing the values of the selected columns.
+        """
+        for partial_where in _split_where(where):
+            query, parameters = _compile_select(table, columns, partial_where, self.paramstyle)
+            yield from self._iter_data_from_database(query, parameters, batch_size)
+
+    def _iter_entities(self, entity_class, table, where, columns, batch_size):
+        """Streams the entities of a table, filtered and projected by the given specification.
+
+        Args:
+            entity_class (type): Class of the entities to be created, one per row.
+            table (str): Name of the table the entities are loaded from.
+            where (dict): Maps column names onto the values the rows are filtered by.
+            columns (list): Names of the columns to be loaded. All columns are loaded in case this is None.
+            batch_size (int): Number of rows fetched from the database at once.
+
+        Yields:
+            object: One instance of entity_class per selected row.
+        """
+        yield from _create_entities(entity_class, table, columns, self._iter_rows(table, where, columns, batch_size))
+
+    def _load_rows(self, table, where, columns):
+        """Loads the rows of a table, answering from the entity cache while the database is unchanged.
+
+        Args:
+            table (str): Name of the table the rows are loaded from.
+            where (dict): Maps column names onto the values the rows are filtered by.
+            columns (list): Names of the columns to be loaded. All columns are loaded in case this is None.
+
+        Returns:
+            list: List containing tuples, each representing one selected row. The list may be shared with the cache
+                and must not be modified.
+        """
+        key = _entity_cache_key(self.database_file, table, where, columns) if self.cache is not None else None
+        if key is None:
+            return list(self._iter_rows(table, where, columns, DEFAULT_BATCH_SIZE))
+
+        version = get_database_version(self.database_file)
+        rows = self.cache.get(key, version)
+        if rows is None:
+            rows = list(self._iter_rows(table, where, columns, DEFAULT_BATCH_SIZE))
+            self.cache.put(key, rows, version)
+
+        return rows
+
+    def _load_entities(self, entity_class, table, where, columns):
+        """Loads the entities of a table, filtered and projected by the given specification.
+
+        Args:
+            entity_class (type): Class of the entities to be created, one per row.
+            table (str): Name of the table the entities are loaded from.
+            where (dict): Maps column names onto the values the rows are filtered by.
+            columns (list): Names of the columns to be loaded. All columns are loaded in case this is None.
+
+        Returns:
+            list: List containing one instance of entity_class per selected row.
+        """
+        rows = self._load_rows(table, where, columns)
+        with phase("data_loader.construct") as measurement:
+            measurement.add_rows(len(rows))
+            return list(_create_entities(entity_class, table, columns, rows))
+
+    def iter_model_revisions(self, where=None, columns=None, batch_size=DEFAULT_BATCH_SIZE):
+        """Lazily loads the ModelRevisions from the database.
+
+        Args:
+            where (dict): Filter specification, see DataLoader.
+            columns (list): Projection specification, see DataLoader.
+            batch_size (int): Number of rows fetched from the database at once.
+
+        Yields:
+            ModelRevision: One ModelRevision instance per selected tuple of the ModelRevisions table.
+        """
+        yield from self._iter_entities(ModelRevision, "ModelRevisions", where, columns, batch_size)
+
+    def iter_users(self, where=None, columns=None, batch_size=DEFAULT_BATCH_SIZE):
+        """Lazily loads the users of the application.
+
+        Args:
+            where (dict): Filter specification, see DataLoader.
+            columns (list): Projection specification, see DataLoader.
+            batch_size (int): Number of rows fetched from the database at once.
+
+        Yields:
+            User: One User instance per selected tuple of the Users table.
+        """
+        yield from self._iter_entities(User, "Users", where, columns, batch_size)
+
+    def iter_objects(self, where=None, columns=None, batch_size=DEFAULT_BATCH_SIZE):
+        """Lazily loads the objects of the application.
+
+        Args:
+            where (dict): Filter specification, see DataLoader.
+            columns (list): Projection specification, see DataLoader.
+            batch_size (int): Number of rows fetched from the database at once.
+
+        Yields:
+            Object: One Object instance per selected tuple of the Objects table.
+        """
+        yield from self._iter_entities(Object, "Objects", where, columns, batch_size)
+
+    def iter_tenants(self, where=None, columns=None, batch_size=DEFAULT_BATCH_SIZE):
+        """Lazily loads the tenants of the application.
+
+        Args:
+            where (dict): Filter specification, see DataLoader.
+            columns (list): Projection specification, see DataLoader.
+            batch_size (int): Number of rows fetched from the database at once.
+
+        Yields:
+            Tenant: One Tenant instance per selected tuple of the Tenants table.
+        """
+        yield from self._iter_entities(Tenant, "Tenants", where, columns, batch_size)
+
+    def iter_models(self, where=None, columns=None, batch_size=DEFAULT_BATCH_SIZE):
+        """Lazily loads the models of the application.
+
+        Args:
+            where (dict): Filter specification, see DataLoader.
+            columns (list): Projection specification, see DataLoader.
+            batch_size (int): Number of rows fetched from the database at once.
+
+        Yields:
+            Model: One Model instance per selected tuple of the Models table.
+        """
+        yield from self._iter_entities(Model, "Models", where, columns, batch_size)
+
+    def get_model_revisions(self, where=None, columns=None):
         """Loads all ModelRevisions from the database.
 
+        Args:
+            where (dict): Filter specification, see DataLoader.
+            columns (list): Projection specification, see DataLoader.
+
         Returns:
             list: Returns a list of ModelRevision instances, each containing the data of one tuple of the
                 ModelRevisions table.
         """
-        revisions = self._load_data_from_database("SELECT * FROM ModelRevisions")
-        revisions = [ModelRevision(*row) for row in revisions]
-        return revisions
+        return self._load_entities(ModelRevision, "ModelRevisions", where, columns)
 
-    def get_users(self):
+    def get_users(self, where=None, columns=None):
         """Returns the users of the application.
 
+        Args:
+            where (dict): Filter specification, see DataLoader.
+            columns (list): Projection specification, see DataLoader.
+
         Returns:
             list: List containing all users of the application.
         """
-        users = self._load_data_from_database("SELECT * FROM Users")
-        users = [User(*row) for row in users]
-        return users
+        return self._load_entities(User, "Users", where, columns)
 
-    def get_objects(self):
+    def get_objects(self, where=None, columns=None):
         """Returns the objects of the application.
 
+        Args:
+            where (dict): Filter specification, see DataLoader.
+            columns (list): Projection specification, see DataLoader.
+
         Returns:
             list: List containing all objects of the application.
         """
-        objects = self._load_data_from_database("SELECT * FROM Objects")
-        objects = [Object(*row) for row in objects]
-        return objects
+        return self._load_entities(Object, "Objects", where, columns)
 
-    def get_tenants(self):
+    def get_tenants(self, where=None, columns=None):
         """Returns the tenants of the application.
 
+        Args:
+            where (dict): Filter specification, see DataLoader.
+            columns (list): Projection specification, see DataLoader.
+
         Returns:
             list: List containing all tenants of the application.
         """
-        tenants = self._load_data_from_database("SELECT * FROM Tenants")
-        tenants = [Tenant(*row) for row in tenants]
-        return tenants
+        return self._load_entities(Tenant, "Tenants", where, columns)
 
-    def get_models(self):
-        """Returns the tenants of the application.
+    def get_models(self, where=None, columns=None):
+        """Returns the models of the application.
+
+        Args:
+            where (dict): Filter specification, see DataLoader.
+            columns (list): Projection specification, see DataLoader.
 
         Returns:
-            list: List containing all tenants of the application.
+            list: List containing all models of the application.
         """
-        models = self._load_data_from_database("SELECT * FROM Models")
-        models = [Model(*row) for row in models]
-        return models
+        return self._load_entities(Model, "Models", where, columns)
+
+    def get_model_revision_table(self, where=None, batch_size=DEFAULT_BATCH_SIZE):
+        """Loads the ModelRevisions into a columnar container.
+
+        Args:
+            where (dict): Filter specification, see DataLoader.
+            batch_size (int): Number of rows fetched from the database at once.
+
+        Returns:
+            ModelRevisionTable: Table containing the selected ModelRevisions.
+        """
+        return ModelRevisionTable.from_rows(self._iter_rows("ModelRevisions", where, None, batch_size))
+
+    def get_object_table(self, where=None, batch_size=DEFAULT_BATCH_SIZE):
+        """Loads the objects into a columnar container.
+
+        Args:
+            where (dict): Filter specification, see DataLoader.
+            batch_size (int): Number of rows fetched from the database at once.
+
+        Returns:
+            ObjectTable: Table containing the selected objects.
+        """
+        return ObjectTable.from_rows(self._iter_rows("Objects", where, None, batch_size))
+
+
+def _chronological_key(revision):
+    """Returns the key the revisions of a model are ordered by, revisions created at the same time are ordered by id.
+
+    Args:
+        revision (ModelRevision): Either a ModelRevision or a ModelRevisionRecord.
+
+    Returns:
+        tuple: Returns a tuple of (int, str) containing the creation date and the id of the revision.
+    """
+    return revision.creation_date, revision.id
+
+
+class EntityIndex:
+    """The EntityIndex holds hash maps answering the application logic questions without scanning whole tables.
+
+    The index is built in a single pass over the Objects, Models, Users and ModelRevisions tables. Afterwards, each
+    lookup only touches the entities that are part of its result. The index is shared by all callers, it therefore
+    holds immutable records and every lookup returns new dataclass instances.
+
+    Attributes:
+        objects_by_id (dict): Maps object ids onto ObjectRecords.
+        models_by_id (dict): Maps model ids onto ModelRecords.
+        users_by_id (dict): Maps user ids onto UserRecords.
+        tenant_ids (list): Ids of all tenants of the application.
+        active_model_ids_by_tenant (dict): Maps tenant ids onto the list of ids of their models not marked for
+            deletion.
+        revisions_by_model (dict): Maps model ids onto the list of their ModelRevisionRecords, ordered by creation
+            date and id.
+        revision_counts_by_tenant (dict): Maps tenant ids onto a dictionary, which maps the ids of the tenants users
+            that are not marked for deletion onto the number of revisions they created within the tenant.
+        most_active_user_ids_by_tenant (dict): Maps tenant ids onto the list of ids of the users with the highest
+            revision count within the tenant.
+    """
+
+    def __init__(self, objects, models, users, model_revisions):
+        """Initializes the EntityIndex.
+
+        Args:
+            objects (iterable): All Object instances of the application.
+            models (iterable): All Model instances of the application.
+            users (iterable): All User instances of the application.
+            model_revisions (iterable): All ModelRevision instances of the application.
+        """
+        super(EntityIndex, self).__init__()
+
+        self.objects_by_id = {database_object.id: ObjectRecord.from_entity(database_object)
+                              for database_object in objects}
+        self.models_by_id = {model.id: ModelRecord.from_entity(model) for model in models}
+        self.users_by_id = {user.id: UserRecord.from_entity(user) for user in users}
+
+        self.tenant_ids = []
+        self.active_model_ids_by_tenant = {}
+        for database_object in self.objects_by_id.values():
+            if database_object.object_type == "tenant":
+                self.tenant_ids.append(database_object.id)
+            elif database_object.object_type == "model" and not database_object.marked_for_deletion:
+                self.active_model_ids_by_tenant.setdefault(database_object.tenant, []).append(database_object.id)
+
+        self.revisions_by_model = {}
+        self.revision_counts_by_tenant = {}
+        for revision in model_revisions:
+            revision = ModelRevisionRecord.from_entity(revision)
+            self.revisions_by_model.setdefault(revision.model, []).append(revision)
+
+            revision_object = self.objects_by_id.get(revision.id)
+            author_object = self.objects_by_id.get(revision.author)
+            if revision_object is None or author_object is None or author_object.object_type != "user" \
+                    or author_object.marked_for_deletion or author_object.tenant != revision_object.tenant:
+                continue
+
+            revision_counts = self.revision_counts_by_tenant.setdefault(revision_object.tenant, {})
+            revision_counts[revision.author] = revision_counts.get(revision.author, 0) + 1
+
+        for revisions in self.revisions_by_model.values():
+            revisions.sort(key=_chronological_key)
+
+        self.most_active_user_ids_by_tenant = {}
+        for tenant_id, revision_counts in self.revision_counts_by_tenant.items():
+            max_revision_count = max(revision_counts.values())
+            self.most_active_user_ids_by_tenant[tenant_id] = [
+                author for author, count in revision_counts.items() if count == max_revision_count]
+
+    @classmethod
+    def from_data_loader(cls, data_loader):
+        """Builds the index from the entities streamed by a DataLoader.
+
+        Args:
+            data_loader (DataLoader): The DataLoader the entities are loaded with.
+
+        Returns:
+            EntityIndex: Returns the index over all entities of the database.
+        """
+        return cls(data_loader.iter_objects(), data_loader.iter_models(), data_loader.iter_users(),
+                   data_loader.iter_model_revisions())
+
+    @classmethod
+    def for_database(cls, database_file_path):
+        """Returns the index of a database, which is only rebuilt in case the database changed.
+
+        Args:
+            database_file_path (str): String containing the path where the SQLite database file can be found.
+
+        Returns:
+            EntityIndex: Returns the index over all entities of the database.
+        """
+        key = os.path.abspath(database_file_path)
+        version = get_database_version(database_file_path)
+
+        entity_index = _ENTITY_INDEX_CACHE.get(key, version)
+        if entity_index is None:
+            with phase("application_logic.entity_index"):
+                entity_index = cls.from_data_loader(DataLoader(database_file_path, cache=None))
+            _ENTITY_INDEX_CACHE.put(key, entity_index, version)
+
+        return entity_index
+
+    def get_chronological_ordered_model_revisions(self, model_id):
+        """Returns the revisions of a model.
+
+        Args:
+            model_id (str): The id of the model.
+
+        Returns:
+            list: Returns a list of ModelRevision instances, ordered by the creation date and id.
+        """
+        return [revision.to_entity() for revision in self.revisions_by_model.get(model_id, ())]
+
+    def get_most_active_users(self, tenant_id):
+        """Returns the users that created the most revisions within a tenant.
+
+        Args:
+            tenant_id (str): The id of the tenant.
+
+        Returns:
+            list: Returns a list of User instances.
+        """
+        return [self.users_by_id[user_id].to_entity()
+                for user_id in self.most_active_user_ids_by_tenant.get(tenant_id, ()) if user_id in self.users_by_id]
+
+    def get_active_model_titles(self, tenant_id):
+        """Returns the unordered titles of the models of a tenant that are not marked for deletion.
+
+        Args:
+            tenant_id (str): The id of the tenant.
+
+        Returns:
+            list: Returns a list of strings containing the model titles.
+        """
+        return [self.models_by_id[model_id].title for model_id in self.active_model_ids_by_tenant.get(tenant_id, ())
+                if model_id in self.models_by_id]
+
+
+def clear_caches():
+    """Clears all in-process caches of the application logic, e.g. to measure cold loads."""
+    ENTITY_CACHE.clear()
+    _ENTITY_INDEX_CACHE.clear()
+    _collation_keys.cache_clear()
+
+    with _TITLE_INDEXES_LOCK:
+        _TITLE_INDEXES.clear()
+
+
+def _get_entity_index(database_file_path):
+    """Returns the index answering the application logic questions for a database.
+
+    In case NumPy is available and USE_VECTORIZED_ENGINE is set, the VectorizedIndex is used, otherwise the
+    EntityIndex. Both return the same answers.
+
+    Args:
+        database_file_path (str): String containing the path where the SQLite database file can be found.
+
+    Returns:
+        EntityIndex or VectorizedIndex: Returns the index over all entities of the database.
+    """
+    if USE_VECTORIZED_ENGINE:
+        from coding_challenge.vectorized import NUMPY_AVAILABLE, VectorizedIndex
+        if NUMPY_AVAILABLE:
+            return VectorizedIndex.for_database(database_file_path)
+
+    return EntityIndex.for_database(database_file_path)
 
 
 def get_chronological_ordered_model_revisions(database_file_path, model_id):
     """This function returns an ordered list of model revisions for any given model.
 
+    Only the revisions of the model are loaded by the filtered query, instead of building the index over the whole
+    database. The query seeks the ModelRevisions_model index created by optimize_database and scans ModelRevisions on
+    databases without it. Use get_chronological_ordered_model_revisions_many for several models, both functions
+    order revisions created at the same time by their id.
+
     Args:
         database_file_path (str): String containing the path where the SQLite database file can be found.
         model_id (str): The id of the model for which the revisions should be retrieved.
 
     Returns:
-        list: Returns a list of model revisions, ordered by the creation date.
+        list: Returns a list of model revisions, ordered by the creation date and id.
     """
     data_loader = DataLoader(database_file_path)
-    model_revisions = data_loader.get_model_revisions()
-
-    # remove the line below in case you have implemented a solution
-    raise NotImplementedError
+    model_revisions = data_loader.get_model_revisions(where={"model": model_id})
+    model_revisions.sort(key=_chronological_key)
 
     return model_revisions
 
 
+def get_chronological_ordered_model_revisions_many(database_file_path, model_ids):
+    """This function returns the ordered lists of model revisions for several models at once.
+
+    All revisions are loaded and grouped once, instead of once per model.
+
+    Args:
+        database_file_path (str): String containing the path where the SQLite database file can be found.
+        model_ids (iterable): The ids of the models for which the revisions should be retrieved.
+
+    Returns:
+        dict: Returns a dictionary mapping each model id onto its list of model revisions, ordered by the creation
+            date and id.
+    """
+    entity_index = _get_entity_index(database_file_path)
+
+    return {model_id: entity_index.get_chronological_ordered_model_revisions(model_id) for model_id in model_ids}
+
+
 def get_most_active_user(database_file_path, tenant_id):
     """Returns a list of the most active user(s) for a specific tenant.
 
@@ -240,53 +1091,404 @@ def get_most_active_user(database_file_path, tenant_id):
     Returns:
         list: Returns a list of User instances representing the most active users of the tenant.
     """
-    data_loader = DataLoader(database_file_path)
-    most_active_users = []
-
-    # remove the line below in case you have implemented a solution
-    raise NotImplementedError
+    entity_index = _get_entity_index(database_file_path)
+    most_active_users = entity_index.get_most_active_users(tenant_id)
 
     return most_active_users
 
 
-def sort_string_list(string_list, case_sensitive):
-    """Retrieves a list of strings and returns it sorted, either case sensitive or case insensitive.
+def get_most_active_users_by_tenant(database_file_path, tenant_ids=None):
+    """Returns the most active user(s) for several tenants at once.
+
+    All revisions are loaded and grouped once, instead of once per tenant. The activity of a user is defined as in
+    get_most_active_user.
+
+    Args:
+        database_file_path (str): String containing the path where the SQLite database file can be found.
+        tenant_ids (iterable): The ids of the tenants the users should be retrieved for. All tenants are evaluated in
+            case this is None.
+
+    Returns:
+        dict: Returns a dictionary mapping each tenant id onto a list of User instances representing the most active
+            users of the tenant.
+    """
+    entity_index = _get_entity_index(database_file_path)
+    if tenant_ids is None:
+        tenant_ids = entity_index.tenant_ids
+
+    return {tenant_id: entity_index.get_most_active_users(tenant_id) for tenant_id in tenant_ids}
+
+
+@functools.lru_cache(maxsize=DEFAULT_COLLATION_KEY_CACHE_SIZE)
+def _collation_keys(string, collation=None):
+    """Computes the collation keys of a string for both sort orders at once.
+
+    The case insensitive key compares the case folded strings without diacritics first, so that accented characters
+    are sorted next to their base characters, and the case folded strings including diacritics second. The case
+    sensitive key extends it by a flag per character that is set for lower case letters. Strings that only differ in
+    case are therefore ordered by the position of their first capital letters, while the alphabetical order is
+    preserved. The string itself is the final tie breaker.
+
+    The keys are cached per collation, so that keys computed before the locale changed are not reused afterwards.
+
+    Args:
+        string (str): The string the keys are computed for.
+        collation (str): Name of the current LC_COLLATE locale the strings are compared by, or None in case the
+            comparison does not depend on the locale.
+
+    Returns:
+        tuple: Returns a tuple of (case insensitive key, case sensitive key).
+    """
+    decomposed_string = unicodedata.normalize("NFKD", string).casefold()
+    base_string = "".join(character for character in decomposed_string if not unicodedata.combining(character))
+    if collation is not None:
+        decomposed_string = locale.strxfrm(decomposed_string)
+        base_string = locale.strxfrm(base_string)
+
+    case_insensitive_key = (base_string, decomposed_string)
+    lower_case_flags = bytes(character.islower() for character in string)
+    return case_insensitive_key, case_insensitive_key + (lower_case_flags, string)
+
+
+class StringSorter:
+    """The StringSorter is the sorting engine behind sort_string_list.
+
+    The collation keys of a string are computed once and kept in a LRU cache, so that titles that are sorted
+    repeatedly do not pay for their keys again. Besides full sorts, the sorter supports partial sorts for pages of the
+    result and merging new strings into an already sorted list.
+    """
+
+    def __init__(self, case_sensitive, locale_aware=False):
+        """Initializes the StringSorter.
+
+        Args:
+            case_sensitive (bool): If True, capital letters come before small letters but preserving alphabetical
+                order. Otherwise, strings are sorted case insensitive.
+            locale_aware (bool): If True, the collation of the current locale is used for the alphabetical order.
+        """
+        super(StringSorter, self).__init__()
+
+        self.case_sensitive = case_sensitive
+        self.locale_aware = locale_aware
+
+    def key(self, string):
+        """Returns the collation key of a string.
+
+        Args:
+            string (str): The string the key is computed for.
+
+        Returns:
+            object: Returns the key the string is sorted by.
+        """
+        collation = locale.setlocale(locale.LC_COLLATE) if self.locale_aware else None
+        return _collation_keys(string, collation)[1 if self.case_sensitive else 0]
+
+    def sort(self, strings):
+        """Returns the strings in sorted order.
+
+        Args:
+            strings (iterable): Strings to be sorted.
+
+        Returns:
+            list: List containing the sorted strings.
+        """
+        return sorted(strings, key=self.key)
+
+    def page(self, strings, limit, offset=0):
+        """Returns a page of the sorted strings, without sorting all of them.
+
+        The first offset + limit strings are selected by a heap, which takes O(n log(offset + limit)) instead of
+        O(n log n).
+
+        Args:
+            strings (iterable): Strings to be sorted.
+            limit (int): Maximum number of strings returned.
+            offset (int): Number of strings skipped at the beginning of the sorted strings.
+
+        Returns:
+            list: List containing the strings at the positions offset to offset + limit of the sorted strings.
+        """
+        return heapq.nsmallest(offset + limit, strings, key=self.key)[offset:]
+
+    def merge(self, sorted_strings, new_strings):
+        """Merges new strings into an already sorted list of strings.
+
+        Only the new strings are sorted, the merge itself takes linear time.
+
+        Args:
+            sorted_strings (iterable): Strings already sorted by this sorter.
+            new_strings (iterable): Strings to be added.
+
+        Returns:
+            list: List containing all strings in sorted order.
+        """
+        return list(heapq.merge(sorted_strings, self.sort(new_strings), key=self.key))
 
-    Please implement the sorting of the strings within this function.
+
+def sort_string_list(string_list, case_sensitive, limit=None, offset=0):
+    """Retrieves a list of strings and returns it sorted, either case sensitive or case insensitive.
 
     Args:
         string_list (list): List of strings to be sorted.
         case_sensitive (bool): Determines if the list should be sorted case sensitive or case insensitive.
             If this is True, the list is sorted case sensitive, where capital letters come before small letters but
             preserving alphabetical order. In case the parameter is False, the list is sorted case insensitive.
+        limit (int): Maximum number of strings returned. In case it is given, only the first offset + limit strings
+            are sorted, see StringSorter.page. All strings starting at offset are returned in case this is None.
+        offset (int): Number of strings skipped at the beginning of the sorted list, 0 returns the list from its
+            first string.
 
     Returns:
         list: List containing the sorted strings.
     """
-    sorted_strings = string_list.copy()
+    sorter = StringSorter(case_sensitive)
+
+    if limit is not None:
+        return sorter.page(string_list, limit, offset)
+
+    sorted_strings = sorter.sort(string_list)
+    return sorted_strings[offset:] if offset else sorted_strings
+
+
+def merge_sorted_string_list(sorted_string_list, new_strings, case_sensitive):
+    """Merges new strings into a list that was sorted by sort_string_list.
+
+    Args:
+        sorted_string_list (list): List of strings sorted by sort_string_list with the same case_sensitive value.
+        new_strings (list): Strings to be added to the sorted list.
+        case_sensitive (bool): Determines if the list is sorted case sensitive or case insensitive.
+
+    Returns:
+        list: List containing all strings in sorted order.
+    """
+    return StringSorter(case_sensitive).merge(sorted_string_list, new_strings)
 
-    # remove the line below in case you have implemented a solution
-    raise NotImplementedError
 
-    return sorted_strings
+@dataclass(frozen=True)
+class TitleCursor:
+    """Position of a title within the ordered titles of a tenant, used to request the titles following it."""
+    title: str
+    model_id: str
 
 
-def get_ordered_list_of_active_model_titles(database_file_path, tenant_id, case_sensitive=False):
+class TitlePage(list):
+    """A page of ordered titles, together with the cursor the next page is requested by.
+
+    Attributes:
+        next_cursor (TitleCursor): Cursor of the last title of the page, None in case no titles follow.
+    """
+
+    def __init__(self, titles, next_cursor=None):
+        """Initializes the TitlePage.
+
+        Args:
+            titles (list): The titles of the page.
+            next_cursor (TitleCursor): Cursor of the last title of the page, None in case no titles follow.
+        """
+        super(TitlePage, self).__init__(titles)
+
+        self.next_cursor = next_cursor
+
+
+class TitleIndex:
+    """The TitleIndex maintains the sorted titles of the active models of every tenant.
+
+    Each tenant has one ordering per sort order of sort_string_list. An ordering consists of two parallel lists: the
+    sort keys, each containing the collation key of the title and the model id as tie breaker, and the titles
+    themselves. Changes are applied incrementally: new titles are merged into the orderings, removed titles are
+    filtered out, so that the titles are never sorted as a whole again.
+
+    The index is thread safe.
+    """
+
+    def __init__(self, locale_aware=False):
+        """Initializes an empty TitleIndex.
+
+        Args:
+            locale_aware (bool): If True, the titles are ordered by the collation of the current locale.
+        """
+        super(TitleIndex, self).__init__()
+
+        self._sorters = {case_sensitive: StringSorter(case_sensitive, locale_aware) for case_sensitive in (True, False)}
+        self._orderings = {}
+        self._models = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_database(cls, database_file_path):
+        """Returns the index of a database, which is refreshed in case the database changed.
+
+        Args:
+            database_file_path (str): String containing the path where the SQLite database file can be found.
+
+        Returns:
+            TitleIndex: Returns the index over the active model titles of the database.
+        """
+        key = os.path.abspath(database_file_path)
+        version = get_database_version(database_file_path)
+
+        with _TITLE_INDEXES_LOCK:
+            title_index, indexed_version = _TITLE_INDEXES.get(key, (None, None))
+            if title_index is None:
+                title_index = cls()
+
+            if indexed_version != version:
+                with phase("application_logic.title_index"):
+                    title_index.refresh(DataLoader(database_file_path, cache=None))
+                _TITLE_INDEXES[key] = (title_index, version)
+
+        return title_index
+
+    def _sort_key(self, case_sensitive, title, model_id):
+        """Returns the key a title is ordered by.
+
+        Args:
+            case_sensitive (bool): Determines the ordering the key is computed for.
+            title (str): The title of the model.
+            model_id (str): The id of the model.
+
+        Returns:
+            tuple: Returns a tuple of (collation key, model id).
+        """
+        return self._sorters[case_sensitive].key(title), model_id
+
+    def _add(self, tenant_id, models):
+        """Merges models into the orderings of a tenant, the lock has to be held by the caller.
+
+        Args:
+            tenant_id (str): The id of the tenant the models belong to.
+            models (list): List of tuples of (model id, title).
+        """
+        for case_sensitive in (True, False):
+            new_entries = sorted((self._sort_key(case_sensitive, title, model_id), title) for model_id, title in models)
+            keys, titles = self._orderings.get((tenant_id, case_sensitive), ([], []))
+            entries = heapq.merge(zip(keys, titles), new_entries, key=lambda entry: entry[0])
+
+            keys, titles = [], []
+            for key, title in entries:
+                keys.append(key)
+                titles.append(title)
+            self._orderings[(tenant_id, case_sensitive)] = (keys, titles)
+
+        for model_id, title in models:
+            self._models[model_id] = (tenant_id, title)
+
+    def _remove(self, tenant_id, model_ids):
+        """Removes models from the orderings of a tenant, the lock has to be held by the caller.
+
+        Args:
+            tenant_id (str): The id of the tenant the models belong to.
+            model_ids (set): The ids of the models to be removed.
+        """
+        for case_sensitive in (True, False):
+            keys, titles = self._orderings.get((tenant_id, case_sensitive), ([], []))
+            entries = [(key, title) for key, title in zip(keys, titles) if key[1] not in model_ids]
+            self._orderings[(tenant_id, case_sensitive)] = \
+                ([key for key, _ in entries], [title for _, title in entries])
+
+        for model_id in model_ids:
+            del self._models[model_id]
+
+    def add_model(self, tenant_id, model_id, title):
+        """Adds an active model to the index, replacing an older entry of the same model.
+
+        Args:
+            tenant_id (str): The id of the tenant the model belongs to.
+            model_id (str): The id of the model.
+            title (str): The title of the model.
+        """
+        with self._lock:
+            if model_id in self._models:
+                self._remove(self._models[model_id][0], {model_id})
+            self._add(tenant_id, [(model_id, title)])
+
+    def mark_model_for_deletion(self, model_id):
+        """Removes a model from the index, as models marked for deletion are not active anymore.
+
+        Args:
+            model_id (str): The id of the model.
+        """
+        with self._lock:
+            if model_id in self._models:
+                self._remove(self._models[model_id][0], {model_id})
+
+    def refresh(self, data_loader):
+        """Updates the index to the current state of the database.
+
+        Only the differences between the indexed and the current active models are applied to the orderings.
+
+        Args:
+            data_loader (DataLoader): The DataLoader the current models are loaded with.
+        """
+        model_objects = data_loader.iter_objects(
+            where={"object_type": "model", "marked_for_deletion": 0}, columns=["id", "tenant"])
+        tenants_by_model = {model_object.id: model_object.tenant for model_object in model_objects}
+        current_models = {model.id: (tenants_by_model[model.id], model.title)
+                          for model in data_loader.iter_models() if model.id in tenants_by_model}
+
+        with self._lock:
+            removed_models = {}
+            for model_id, (tenant_id, title) in self._models.items():
+                if current_models.get(model_id) != (tenant_id, title):
+                    removed_models.setdefault(tenant_id, set()).add(model_id)
+            for tenant_id, model_ids in removed_models.items():
+                self._remove(tenant_id, model_ids)
+
+            added_models = {}
+            for model_id, (tenant_id, title) in current_models.items():
+                if model_id not in self._models:
+                    added_models.setdefault(tenant_id, []).append((model_id, title))
+            for tenant_id, models in added_models.items():
+                self._add(tenant_id, models)
+
+    def get_titles(self, tenant_id, case_sensitive=False, after=None, limit=None):
+        """Returns a page of the ordered titles of the active models of a tenant.
+
+        Equal titles are ordered by their model ids, so that a cursor identifies a single position even in case several
+        models share a title, and remains valid while models are added or removed.
+
+        Args:
+            tenant_id (str): The id of the tenant.
+            case_sensitive (bool): Determines if the titles are ordered case sensitive or not.
+            after (TitleCursor): If given, only titles ordered after this cursor are returned.
+            limit (int): If given, at most limit titles are returned.
+
+        Returns:
+            TitlePage: Returns a list of strings containing the ordered model titles, together with the cursor of the
+                next page.
+        """
+        with self._lock:
+            keys, titles = self._orderings.get((tenant_id, case_sensitive), ([], []))
+
+            start = 0
+            if after is not None:
+                start = bisect.bisect_right(keys, self._sort_key(case_sensitive, after.title, after.model_id))
+
+            end = len(titles) if limit is None else min(start + limit, len(titles))
+            next_cursor = TitleCursor(titles[end - 1], keys[end - 1][1]) if start < end < len(titles) else None
+            return TitlePage(titles[start:end], next_cursor)
+
+
+def get_ordered_list_of_active_model_titles(database_file_path, tenant_id, case_sensitive=False, after=None,
+                                            limit=None):
     """Returns a list of all active model titles of a specific tenant.
 
-    The list is either sorted case-sensitive or case-insensitive.
+    The list is either sorted case-sensitive or case-insensitive, in the same order as by sort_string_list, with equal
+    titles ordered by their model ids. The titles are taken from the TitleIndex of the database, which is maintained
+    incrementally, so that the titles are not sorted again on every call. The list can be paginated by passing the
+    next_cursor of the previous page as after, until it is None.
 
     Args:
         database_file_path (str): String containing the path where the SQLite database file can be found.
         tenant_id (str): The id of the users that created the most revisions within the tenant.
         case_sensitive (bool): Determines if the titles should  be sorted case sensitive or not.
+        after (TitleCursor): If given, only titles ordered after this cursor are returned.
+        limit (int): If given, at most limit titles are returned.
 
     Returns:
-        list: Returns a list of strings containing the sorted model names.
+        TitlePage: Returns a list of strings containing the sorted model names, together with the cursor of the next
+            page.
     """
-    data_loader = DataLoader(database_file_path)
-
-    # remove the line below in case you have implemented a solution
-    raise NotImplementedError
+    title_index = TitleIndex.for_database(database_file_path)
 
-    return sort_string_list(titles, case_sensitive)
+    return title_index.get_titles(tenant_id, case_sensitive, after=after, limit=limit)
@@ -0,0 +1,264 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2019 CompuCom, All Rights Reserved
+# Created by Luis Fuentes
+
+"""This module contains the asyncio counterparts of the Section 4 queries and the DataLoader.
+
+The blocking functions are executed on the bounded thread pool of an **AsyncRunner**, so that the event loop is not
+stalled while a query is running. During a call, the worker thread pins a pooled connection, see
+ConnectionPool.pinned, so that all queries of the call share this connection. In case the awaiting task is cancelled
+or its timeout expires, the running statement is interrupted by this connection.
+
+Independent queries run concurrently by asyncio.gather:
+
+    active_tenants, lazy_users = await asyncio.gather(get_active_tenants(database_file_path),
+                                                      get_lazy_users(database_file_path))
+"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from coding_challenge import data_analysis_and_retrieval
+from coding_challenge.application_logic import DataLoader
+from coding_challenge.connection_pool import DEFAULT_POOL_SIZE, get_connection_pool
+
+
+DEFAULT_MAX_WORKERS = DEFAULT_POOL_SIZE
+
+_DEFAULT_RUNNER = None
+_DEFAULT_RUNNER_LOCK = threading.Lock()
+
+
+class _Call:
+    """State of a single call shared between the event loop and the worker thread."""
+
+    def __init__(self):
+        """Initializes the _Call."""
+        super(_Call, self).__init__()
+
+        self.connection = None
+        self.cancelled = False
+        self.lock = threading.Lock()
+
+    def cancel(self):
+        """Prevents the call from starting, or interrupts its running statement."""
+        with self.lock:
+            self.cancelled = True
+            if self.connection is not None:
+                self.connection.interrupt()
+
+
+class AsyncRunner:
+    """The AsyncRunner executes blocking database functions on a bounded thread pool."""
+
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS, timeout=None):
+        """Initializes the AsyncRunner.
+
+        Args:
+            max_workers (int): Maximum number of functions executed at the same time.
+            timeout (float): Default number of seconds after which a call is cancelled. Calls never time out in
+                case this is None.
+        """
+        super(AsyncRunner, self).__init__()
+
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="async-runner")
+
+    @staticmethod
+    def _execute(call, database_file_path, function, args, kwargs):
+        """Executes a function on the worker thread with a pinned connection.
+
+        Returns:
+            object: Returns the result of the function.
+        """
+        with get_connection_pool(database_file_path).pinned() as connection:
+            with call.lock:
+                if call.cancelled:
+                    raise asyncio.CancelledError()
+                call.connection = connection
+
+            try:
+                return function(*args, **kwargs)
+            finally:
+                with call.lock:
+                    call.connection = None
+
+    async def run(self, database_file_path, function, *args, timeout=None, **kwargs):
+        """Executes a blocking function accessing the database on the thread pool.
+
+        Args:
+            database_file_path (str): Path to the database file the function accesses.
+            function (callable): The blocking function.
+            *args: Positional arguments passed to the function.
+            timeout (float): Number of seconds after which the call is cancelled, the default timeout of the runner
+                is used in case this is None.
+            **kwargs: Keyword arguments passed to the function.
+
+        Returns:
+            object: Returns the result of the function.
+
+        Raises:
+            asyncio.TimeoutError: Raised in case the timeout expired.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        call = _Call()
+        future = asyncio.get_running_loop().run_in_executor(self._executor, self._execute, call, database_file_path,
+                                                            function, args, kwargs)
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except (asyncio.CancelledError, asyncio.TimeoutError):
+            call.cancel()
+            raise
+
+    def close(self, wait=True):
+        """Shuts the thread pool down.
+
+        Args:
+            wait (bool): If True, the running functions are awaited.
+        """
+        self._executor.shutdown(wait=wait)
+
+
+def get_async_runner():
+    """Returns the runner shared by all async functions of this module, creating it on first use.
+
+    Returns:
+        AsyncRunner: Returns the default runner.
+    """
+    global _DEFAULT_RUNNER
+
+    with _DEFAULT_RUNNER_LOCK:
+        if _DEFAULT_RUNNER is None:
+            _DEFAULT_RUNNER = AsyncRunner()
+        return _DEFAULT_RUNNER
+
+
+def close_async_runner():
+    """Shuts the default runner down, a new one is created on the next call."""
+    global _DEFAULT_RUNNER
+
+    with _DEFAULT_RUNNER_LOCK:
+        runner, _DEFAULT_RUNNER = _DEFAULT_RUNNER, None
+
+    if runner is not None:
+        runner.close()
+
+
+async def fetch_result_from_database(query, database_file_path, parameters=(), timeout=None):
+    """Executes a query and returns the result, see data_analysis_and_retrieval._fetch_result_from_database.
+
+    Args:
+        query (str): String containing the executable SQL query.
+        database_file_path (str): Path to the database file.
+        parameters (tuple): Parameters bound to the placeholders of the query.
+        timeout (float): Number of seconds after which the query is interrupted.
+
+    Returns:
+        list: Returns a list of lists, each containing one row of the requested result.
+    """
+    return await get_async_runner().run(database_file_path, data_analysis_and_retrieval._fetch_result_from_database,
+                                        query, database_file_path, parameters, timeout=timeout)
+
+
+async def get_purple_tenants_count(database_file_path, timeout=None):
+    """Async counterpart of data_analysis_and_retrieval.get_purple_tenants_count."""
+    return await get_async_runner().run(database_file_path, data_analysis_and_retrieval.get_purple_tenants_count,
+                                        database_file_path, timeout=timeout)
+
+
+async def get_active_tenants(database_file_path, timeout=None):
+    """Async counterpart of data_analysis_and_retrieval.get_active_tenants."""
+    return await get_async_runner().run(database_file_path, data_analysis_and_retrieval.get_active_tenants,
+                                        database_file_path, timeout=timeout)
+
+
+async def get_model_count_of_largest_tenant(database_file_path, timeout=None):
+    """Async counterpart of data_analysis_and_retrieval.get_model_count_of_largest_tenant."""
+    return await get_async_runner().run(database_file_path,
+                                        data_analysis_and_retrieval.get_model_count_of_largest_tenant,
+                                        database_file_path, timeout=timeout)
+
+
+async def get_revision_heaviest_tenant_one(database_file_path, timeout=None):
+    """Async counterpart of data_analysis_and_retrieval.get_revision_heaviest_tenant_one."""
+    return await get_async_runner().run(database_file_path,
+                                        data_analysis_and_retrieval.get_revision_heaviest_tenant_one,
+                                        database_file_path, timeout=timeout)
+
+
+async def get_revision_heaviest_tenant_two(database_file_path, timeout=None):
+    """Async counterpart of data_analysis_and_retrieval.get_revision_heaviest_tenant_two."""
+    return await get_async_runner().run(database_file_path,
+                                        data_analysis_and_retrieval.get_revision_heaviest_tenant_two,
+                                        database_file_path, timeout=timeout)
+
+
+async def get_lazy_users(database_file_path, timeout=None):
+    """Async counterpart of data_analysis_and_retrieval.get_lazy_users."""
+    return await get_async_runner().run(database_file_path, data_analysis_and_retrieval.get_lazy_users,
+                                        database_file_path, timeout=timeout)
+
+
+class AsyncDataLoader:
+    """Async counterpart of the DataLoader.
+
+    Every method executes the method of the same name of a DataLoader on the thread pool of the runner. The
+    iterators of the DataLoader hold a connection while they are consumed and are therefore not provided.
+    """
+
+    def __init__(self, database_file_path, runner=None, timeout=None, **data_loader_arguments):
+        """Initializes the AsyncDataLoader.
+
+        Args:
+            database_file_path (str): String containing the path where the SQLite database file can be found.
+            runner (AsyncRunner): Runner executing the DataLoader, the default runner is used in case this is None.
+            timeout (float): Number of seconds after which a call is cancelled.
+            **data_loader_arguments: Keyword arguments passed to the DataLoader, e.g. its cache.
+        """
+        super(AsyncDataLoader, self).__init__()
+
+        self.database_file = database_file_path
+        self.runner = runner
+        self.timeout = timeout
+        self.data_loader = DataLoader(database_file_path, **data_loader_arguments)
+
+    async def _run(self, method, *args, **kwargs):
+        """Executes a method of the DataLoader on the runner.
+
+        Returns:
+            object: Returns the result of the method.
+        """
+        runner = self.runner if self.runner is not None else get_async_runner()
+        return await runner.run(self.database_file, method, *args, timeout=self.timeout, **kwargs)
+
+    async def get_model_revisions(self, where=None, columns=None):
+        """Loads the ModelRevisions, see DataLoader.get_model_revisions."""
+        return await self._run(self.data_loader.get_model_revisions, where, columns)
+
+    async def get_users(self, where=None, columns=None):
+        """Loads the users, see DataLoader.get_users."""
+        return await self._run(self.data_loader.get_users, where, columns)
+
+    async def get_objects(self, where=None, columns=None):
+        """Loads the objects, see DataLoader.get_objects."""
+        return await self._run(self.data_loader.get_objects, where, columns)
+
+    async def get_tenants(self, where=None, columns=None):
+        """Loads the tenants, see DataLoader.get_tenants."""
+        return await self._run(self.data_loader.get_tenants, where, columns)
+
+    async def get_models(self, where=None, columns=None):
+        """Loads the models, see DataLoader.get_models."""
+        return await self._run(self.data_loader.get_models, where, columns)
+
+    async def get_model_revision_table(self, where=None):
+        """Loads the ModelRevisions into a columnar table, see DataLoader.get_model_revision_table."""
+        return await self._run(self.data_loader.get_model_revision_table, where)
+
+    async def get_object_table(self, where=None):
+        """Loads the objects into a columnar table, see DataLoader.get_object_table."""
+        return await self._run(self.data_loader.get_object_table, where)
@@ -0,0 +1,251 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2019 CompuCom, All Rights Reserved
+# Created by Luis Fuentes
+
+"""This module contains the in-process caches used by all parts of the coding challenge.
+
+Cached values are stored together with the version of the database they were loaded from. The version is determined
+by **get_database_version** from the database file itself, so that a cached value is discarded as soon as the
+database is changed by any connection or process.
+"""
+
+import os
+import pickle
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+
+# offset and length of the file change counter within the header of a SQLite database file
+_CHANGE_COUNTER_OFFSET = 24
+_CHANGE_COUNTER_LENGTH = 4
+
+
+@dataclass
+class CacheStatistics:
+    """Snapshot of the usage statistics of a LRUCache.
+
+    Attributes:
+        hits (int): Number of lookups answered from the cache.
+        misses (int): Number of lookups that did not find a valid entry.
+        evictions (int): Number of entries removed to stay within the size limit.
+        invalidations (int): Number of entries removed because they expired or their version changed.
+        entries (int): Number of entries currently cached.
+        size (int): Current size of all cached entries.
+    """
+    hits: int
+    misses: int
+    evictions: int
+    invalidations: int
+    entries: int
+    size: int
+
+    @property
+    def hit_rate(self):
+        """float: Share of lookups answered from the cache, 0.0 in case nothing was looked up yet."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class LRUCache:
+    """Thread-safe, size-bounded least-recently-used cache with optional time to live.
+
+    Every entry is stored with a version. A lookup only succeeds in case the entry is not expired and the version
+    passed to **get** equals the version passed to **put**.
+    """
+
+    def __init__(self, max_size=1024, ttl=None, sizeof=None):
+        """Initializes the LRUCache.
+
+        Args:
+            max_size (int): Maximum total size of all entries.
+            ttl (float): Number of seconds an entry stays valid. Entries never expire in case this is None.
+            sizeof (callable): Function returning the size of a value. Every value has the size 1 in case this is
+                None.
+        """
+        super(LRUCache, self).__init__()
+
+        self.max_size = max_size
+        self.ttl = ttl
+        self.sizeof = sizeof
+
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    def _remove(self, key):
+        """Removes an entry, the lock has to be held by the caller.
+
+        Args:
+            key (hashable): Key of the entry.
+        """
+        _, _, _, size = self._entries.pop(key)
+        self._size -= size
+
+    def get(self, key, version=None, default=None):
+        """Returns the cached value for the key.
+
+        Args:
+            key (hashable): Key of the entry.
+            version (hashable): Version the cached value has to belong to.
+            default (object): Value returned in case no valid entry exists.
+
+        Returns:
+            object: Returns the cached value or default.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return default
+
+            value, entry_version, expires_at, _ = entry
+            if entry_version != version or (expires_at is not None and expires_at <= time.monotonic()):
+                self._remove(key)
+                self._invalidations += 1
+                self._misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def put(self, key, value, version=None):
+        """Stores a value, evicting the least recently used entries if necessary.
+
+        Values larger than the maximum size of the cache are not stored.
+
+        Args:
+            key (hashable): Key of the entry.
+            value (object): Value to be cached.
+            version (hashable): Version the value belongs to.
+        """
+        size = self.sizeof(value) if self.sizeof is not None else 1
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            if size > self.max_size:
+                return
+
+            while self._entries and self._size + size > self.max_size:
+                self._remove(next(iter(self._entries)))
+                self._evictions += 1
+
+            self._entries[key] = (value, version, expires_at, size)
+            self._size += size
+
+    def invalidate(self, predicate=None):
+        """Removes entries from the cache.
+
+        Args:
+            predicate (callable): Function called with the key of each entry, entries are removed in case it returns
+                True. All entries are removed in case this is None.
+        """
+        with self._lock:
+            keys = [key for key in self._entries if predicate is None or predicate(key)]
+            for key in keys:
+                self._remove(key)
+            self._invalidations += len(keys)
+
+    def clear(self):
+        """Removes all entries from the cache."""
+        self.invalidate()
+
+    def statistics(self):
+        """Returns the current usage statistics of the cache.
+
+        Returns:
+            CacheStatistics: Snapshot of the cache statistics.
+        """
+        with self._lock:
+            return CacheStatistics(hits=self._hits, misses=self._misses, evictions=self._evictions,
+                                   invalidations=self._invalidations, entries=len(self._entries), size=self._size)
+
+    def save(self, file_path):
+        """Persists all entries to a file, which is replaced atomically.
+
+        Args:
+            file_path (str): Path to the file the entries are written to.
+        """
+        with self._lock:
+            entries = [(key, value, version) for key, (value, version, _, _) in self._entries.items()]
+
+        directory = os.path.dirname(os.path.abspath(file_path))
+        descriptor, temporary_file_path = tempfile.mkstemp(dir=directory)
+        try:
+            with os.fdopen(descriptor, "wb") as cache_file:
+                pickle.dump(entries, cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporary_file_path, file_path)
+        except BaseException:
+            os.remove(temporary_file_path)
+            raise
+
+    def load(self, file_path):
+        """Adds the entries persisted by **save** to the cache.
+
+        The time to live of the loaded entries starts anew. Entries of outdated versions are discarded on their first
+        lookup. Nothing is loaded in case the file does not exist.
+
+        Args:
+            file_path (str): Path to the file the entries are read from.
+
+        Returns:
+            int: Returns the number of loaded entries.
+        """
+        try:
+            with open(file_path, "rb") as cache_file:
+                entries = pickle.load(cache_file)
+        except FileNotFoundError:
+            return 0
+
+        for key, value, version in entries:
+            self.put(key, value, version)
+        return len(entries)
+
+    def __len__(self):
+        """Returns the number of cached entries."""
+        return len(self._entries)
+
+
+def get_database_version(database_file_path):
+    """Returns a token that changes whenever the database file is changed.
+
+    The token combines the identity, size and modification time of the database file and its write-ahead log with
+    the file change counter stored in the database header. SQLite increments this counter on every committed
+    transaction in rollback journal mode, which also drives PRAGMA data_version. In contrast to PRAGMA data_version,
+    the token is the same for all connections and processes and can therefore be persisted.
+
+    Args:
+        database_file_path (str): String containing the path where the SQLite database file can be found.
+
+    Returns:
+        tuple: Returns a hashable token identifying the current state of the database, or None in case the file does
+            not exist.
+    """
+    try:
+        stat = os.stat(database_file_path)
+        with open(database_file_path, "rb") as database_file:
+            database_file.seek(_CHANGE_COUNTER_OFFSET)
+            change_counter = database_file.read(_CHANGE_COUNTER_LENGTH)
+    except FileNotFoundError:
+        return None
+
+    try:
+        wal_stat = os.stat(f"{database_file_path}-wal")
+        wal_version = (wal_stat.st_size, wal_stat.st_mtime_ns)
+    except FileNotFoundError:
+        wal_version = None
+
+    return stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns, change_counter, wal_version
@@ -0,0 +1,348 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2019 CompuCom, All Rights Reserved
+# Created by Luis Fuentes
+
+"""This module contains the connection pool shared by all parts of the coding challenge.
+
+Opening a SQLite connection is not free: the file has to be opened, locked and the schema has to be parsed before
+the first statement can be prepared. The pools of this module keep connections open between queries, so that the
+Section 4 queries and the DataLoader only pay for the query itself.
+
+A pool is retrieved by **get_connection_pool** and hands out connections by its **connection** context manager:
+
+    with get_connection_pool(database_file_path).connection() as database:
+        cursor = database.cursor()
+        ...
+
+SQLite connections must not be used across fork(). A forked child process, e.g. a worker of a ProcessPoolExecutor,
+therefore starts without pools and opens its own connections.
+"""
+
+import os
+import sqlite3.dbapi2 as dbapi
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from urllib.request import pathname2url
+
+from coding_challenge.instrumentation import phase, count
+
+
+DEFAULT_POOL_SIZE = 8
+DEFAULT_CHECKOUT_TIMEOUT = 30.0
+
+_POOLS = {}
+_POOLS_LOCK = threading.Lock()
+_INHERITED_POOLS = []
+
+
+@dataclass
+class PoolMetrics:
+    """Snapshot of the usage statistics of a ConnectionPool.
+
+    Attributes:
+        checkouts (int): Number of connections handed out by the pool.
+        waits (int): Number of checkouts that had to wait for a connection to be returned.
+        wait_time (float): Total time in seconds spent waiting for connections.
+        connects (int): Number of connections opened by the pool.
+        discards (int): Number of connections closed because they failed the health check.
+        live_connections (int): Number of connections currently open, either idle or in use.
+        idle_connections (int): Number of open connections waiting in the pool.
+    """
+    checkouts: int
+    waits: int
+    wait_time: float
+    connects: int
+    discards: int
+    live_connections: int
+    idle_connections: int
+
+
+class ConnectionPool:
+    """The ConnectionPool keeps a bounded number of SQLite connections to a single database file.
+
+    The pool is thread safe. Connections are opened lazily, so that a pool never holds more connections than were
+    used concurrently. In case all connections are in use, a checkout waits until a connection is returned.
+    """
+
+    def __init__(self, database_file_path, max_size=DEFAULT_POOL_SIZE, read_only=True,
+                 timeout=DEFAULT_CHECKOUT_TIMEOUT, health_check=True):
+        """Initializes the ConnectionPool.
+
+        Args:
+            database_file_path (str): String containing the path where the SQLite database file can be found.
+            max_size (int): Maximum number of connections that are open at the same time.
+            read_only (bool): If True, the connections are opened as read-only URI connections.
+            timeout (float): Number of seconds a checkout waits for a free connection before giving up.
+            health_check (bool): If True, idle connections are validated before they are handed out.
+        """
+        super(ConnectionPool, self).__init__()
+
+        if max_size < 1:
+            raise ValueError("The pool size has to be at least one.")
+
+        self.database_file = database_file_path
+        self.max_size = max_size
+        self.read_only = read_only
+        self.timeout = timeout
+        self.health_check = health_check
+
+        self._condition = threading.Condition()
+        self._pinned = threading.local()
+        self._idle = []
+        self._live = 0
+        self._closed = False
+
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_time = 0.0
+        self._connects = 0
+        self._discards = 0
+
+    def _file_identity(self):
+        """Returns the identity of the database file, which changes in case the file is replaced.
+
+        Returns:
+            tuple: Returns a tuple of (int, int) containing the device and inode of the file, or None in case the
+                file does not exist.
+        """
+        try:
+            stat = os.stat(self.database_file)
+        except FileNotFoundError:
+            return None
+
+        return stat.st_dev, stat.st_ino
+
+    def _connect(self):
+        """Opens a new connection to the database.
+
+        Returns:
+            sqlite3.Connection: Returns the new connection.
+        """
+        with phase("connection.connect"):
+            if self.read_only:
+                uri = f"file:{pathname2url(os.path.abspath(self.database_file))}?mode=ro"
+                return dbapi.connect(uri, uri=True, check_same_thread=False)
+
+            return dbapi.connect(self.database_file, check_same_thread=False)
+
+    def _is_healthy(self, connection, identity):
+        """Checks if an idle connection can still be used.
+
+        A connection is unhealthy in case the database file was replaced since it was opened, or in case it does not
+        answer a trivial query anymore.
+
+        Args:
+            connection (sqlite3.Connection): Connection to be checked.
+            identity (tuple): Identity of the database file at the time the connection was opened.
+
+        Returns:
+            bool: True, in case the connection can be handed out.
+        """
+        if identity != self._file_identity():
+            return False
+
+        try:
+            connection.execute("SELECT 1").fetchone()
+        except dbapi.Error:
+            return False
+
+        return True
+
+    def _acquire(self):
+        """Takes a connection out of the pool, opening a new one if the pool is not exhausted.
+
+        Returns:
+            tuple: Returns a tuple of (sqlite3.Connection, tuple) containing the connection and the identity of the
+                database file the connection belongs to.
+        """
+        deadline = time.monotonic() + self.timeout
+        wait_started = None
+
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise RuntimeError(f"The connection pool for {self.database_file} has been closed.")
+
+                if self._idle:
+                    entry = self._idle.pop()
+                    break
+
+                if self._live < self.max_size:
+                    self._live += 1
+                    entry = None
+                    break
+
+                if wait_started is None:
+                    wait_started = time.monotonic()
+                    self._waits += 1
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._wait_time += time.monotonic() - wait_started
+                    raise TimeoutError(f"No connection to {self.database_file} became available within "
+                                       f"{self.timeout} seconds.")
+                self._condition.wait(remaining)
+
+            self._checkouts += 1
+            if wait_started is not None:
+                self._wait_time += time.monotonic() - wait_started
+
+        count("connection.checkouts")
+        if wait_started is not None:
+            count("connection.waits")
+
+        if entry is not None:
+            if not self.health_check or self._is_healthy(*entry):
+                return entry
+
+            entry[0].close()
+            with self._condition:
+                self._discards += 1
+            count("connection.discards")
+
+        try:
+            identity = self._file_identity()
+            connection = self._connect()
+        except BaseException:
+            with self._condition:
+                self._live -= 1
+                self._condition.notify()
+            raise
+
+        with self._condition:
+            self._connects += 1
+
+        return connection, identity
+
+    def _release(self, connection, identity):
+        """Returns a connection into the pool.
+
+        Args:
+            connection (sqlite3.Connection): Connection that was handed out by the pool.
+            identity (tuple): Identity of the database file at the time the connection was opened.
+        """
+        if connection.in_transaction:
+            connection.rollback()
+
+        with self._condition:
+            if self._closed:
+                self._live -= 1
+                connection.close()
+            else:
+                self._idle.append((connection, identity))
+            self._condition.notify()
+
+    @contextmanager
+    def connection(self):
+        """Checks out a connection for the duration of the with block.
+
+        In case a connection is pinned to the current thread by **pinned**, the pinned connection is handed out.
+
+        Yields:
+            sqlite3.Connection: A connection to the pools database, exclusively used by the caller.
+        """
+        pinned = getattr(self._pinned, "connection", None)
+        if pinned is not None:
+            yield pinned
+            return
+
+        connection, identity = self._acquire()
+        try:
+            yield connection
+        finally:
+            self._release(connection, identity)
+
+    @contextmanager
+    def pinned(self):
+        """Pins a connection to the current thread for the duration of the with block.
+
+        All checkouts of the current thread within the block, including nested ones, share the pinned connection.
+        This allows to interrupt everything a thread executes on the pool by a single connection.
+
+        Yields:
+            sqlite3.Connection: The connection pinned to the current thread.
+        """
+        if getattr(self._pinned, "connection", None) is not None:
+            yield self._pinned.connection
+            return
+
+        connection, identity = self._acquire()
+        self._pinned.connection = connection
+        try:
+            yield connection
+        finally:
+            self._pinned.connection = None
+            self._release(connection, identity)
+
+    def metrics(self):
+        """Returns the current usage statistics of the pool.
+
+        Returns:
+            PoolMetrics: Snapshot of the pool statistics.
+        """
+        with self._condition:
+            return PoolMetrics(checkouts=self._checkouts, waits=self._waits, wait_time=self._wait_time,
+                               connects=self._connects, discards=self._discards, live_connections=self._live,
+                               idle_connections=len(self._idle))
+
+    def close(self):
+        """Closes all idle connections. Connections still in use are closed as soon as they are returned."""
+        with self._condition:
+            self._closed = True
+            for connection, _ in self._idle:
+                connection.close()
+            self._live -= len(self._idle)
+            self._idle = []
+            self._condition.notify_all()
+
+
+def get_connection_pool(database_file_path, read_only=True):
+    """Returns the connection pool for the given database file, creating it on first use.
+
+    Args:
+        database_file_path (str): String containing the path where the SQLite database file can be found.
+        read_only (bool): Determines if the pool hands out read-only or writable connections.
+
+    Returns:
+        ConnectionPool: The pool shared by all callers using the same database file.
+    """
+    key = (os.path.abspath(database_file_path), read_only)
+
+    with _POOLS_LOCK:
+        pool = _POOLS.get(key)
+        if pool is None:
+            pool = ConnectionPool(database_file_path, read_only=read_only)
+            _POOLS[key] = pool
+
+    return pool
+
+
+def close_connection_pools():
+    """Closes all connection pools, e.g. before the database files are recreated."""
+    with _POOLS_LOCK:
+        pools = list(_POOLS.values())
+        _POOLS.clear()
+
+    for pool in pools:
+        pool.close()
+
+
+def _forget_connection_pools():
+    """Forgets the pools inherited from the parent process, called in the child process after a fork.
+
+    The inherited connections are neither used nor closed, but kept referenced, since closing them could release file
+    locks or reset the WAL state the parent process still depends on.
+    """
+    global _POOLS, _POOLS_LOCK
+
+    _INHERITED_POOLS.append(_POOLS)
+    _POOLS = {}
+    _POOLS_LOCK = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_connection_pools)
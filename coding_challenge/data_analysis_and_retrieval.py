@@ -8,28 +8,151 @@
 
 Please implement your queries in the functions named get_<name_of_the_query>. An example implementation for the query
 **purple_tenants_count** can be found in **get_purple_tenants_count**.
+
+The queries aggregating per tenant answer from the TenantStats table in case it exists, see tenant_stats.
 """
 
+import atexit
+import os
+import re
 import sqlite3.dbapi2 as dbapi
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+from coding_challenge.caching import LRUCache, get_database_version
+from coding_challenge.connection_pool import DEFAULT_POOL_SIZE, get_connection_pool
+from coding_challenge.instrumentation import phase, register_cache
+from coding_challenge.tenant_stats import has_tenant_stats
+
+
+DEFAULT_QUERY_RESULT_CACHE_SIZE = 100000
+DEFAULT_REPORT_WORKERS = 4
+
+# caches the results of all queries by their normalized text, parameters and database, the size is counted in rows
+QUERY_RESULT_CACHE = LRUCache(max_size=DEFAULT_QUERY_RESULT_CACHE_SIZE, sizeof=len)
+register_cache("query_result", QUERY_RESULT_CACHE)
+
+_RECORDED_QUERIES = threading.local()
+
+# string literals and quoted identifiers, whose whitespace is kept, or any other whitespace
+_QUERY_WHITESPACE = re.compile(r"""('(?:[^']|'')*'|"(?:[^"]|"")*")|\s+""")
+
+
+@contextmanager
+def record_queries():
+    """Records all queries executed by the current thread within the context.
+
+    Yields:
+        list: Yields the list the queries are appended to, as tuples of (query, parameters, database_file_path).
+    """
+    previous = getattr(_RECORDED_QUERIES, "queries", None)
+    _RECORDED_QUERIES.queries = queries = []
+    try:
+        yield queries
+    finally:
+        _RECORDED_QUERIES.queries = previous
 
 
-def _fetch_result_from_database(query, database_file_path):
+def _normalize_query(query):
+    """Collapses all whitespace outside of string literals, so that equivalent queries share a cache entry.
+
+    Args:
+        query (str): String containing the SQL query.
+
+    Returns:
+        str: Returns the normalized query.
+    """
+    return _QUERY_WHITESPACE.sub(lambda match: match.group(1) or " ", query).strip()
+
+
+def clear_query_result_cache(database_file_path=None):
+    """Removes cached query results.
+
+    Args:
+        database_file_path (str): Only the results of this database are removed. All results are removed in case
+            this is None.
+    """
+    if database_file_path is None:
+        QUERY_RESULT_CACHE.clear()
+    else:
+        database_file_path = os.path.abspath(database_file_path)
+        QUERY_RESULT_CACHE.invalidate(lambda key: key[2] == database_file_path)
+
+
+def persist_query_result_cache(file_path):
+    """Loads the query results persisted to the file, and persists the cached results to it on exit.
+
+    Results of databases that were changed in the meantime are discarded on their first lookup.
+
+    Args:
+        file_path (str): Path to the file the query results are persisted to.
+
+    Returns:
+        int: Returns the number of loaded results.
+    """
+    atexit.register(QUERY_RESULT_CACHE.save, file_path)
+    return QUERY_RESULT_CACHE.load(file_path)
+
+
+def _fetch_result_from_database(query, database_file_path, parameters=()):
     """"Executes the query and returns the result.
 
+    The query is executed on a pooled, read-only connection. Results are cached in QUERY_RESULT_CACHE, together with
+    the version of the database, so that a cached result is only returned as long as the database is unchanged. In
+    case queries are recorded by **record_queries**, the query is recorded as well.
+
     Args:
         query (str): String containing the executable SQL query.
         database_file_path (str): Path to the database file.
+        parameters (tuple): Parameters bound to the placeholders of the query.
 
     Returns:
         list: Returns a list of lists, each containing one row of the requested result.
     """
-    database = dbapi.connect(database_file_path)
-    cursor = database.cursor()
-    cursor.execute(query)
-    result = cursor.fetchall()
-    cursor.close()
-    database.close()
-    return result
+    queries = getattr(_RECORDED_QUERIES, "queries", None)
+    if queries is not None:
+        queries.append((query, tuple(parameters), database_file_path))
+
+    key = (_normalize_query(query), tuple(parameters), os.path.abspath(database_file_path))
+    version = get_database_version(database_file_path)
+    result = QUERY_RESULT_CACHE.get(key, version)
+    if result is not None:
+        return list(result)
+
+    with get_connection_pool(database_file_path).connection() as database:
+        cursor = database.cursor()
+        with phase("query.execute"):
+            cursor.execute(query, parameters)
+        with phase("query.fetch") as measurement:
+            result = cursor.fetchall()
+            measurement.add_rows(len(result))
+        cursor.close()
+
+    QUERY_RESULT_CACHE.put(key, result, version)
+    return list(result)
+
+
+# queries shared by the query functions and run_report_suite
+_PURPLE_TENANTS_COUNT_QUERY = """
+    SELECT COUNT(*)
+    FROM   Tenants
+    WHERE  name LIKE '%purple%'
+"""
+
+_LAZY_USERS_QUERY = """
+    SELECT users.id
+    FROM   Objects users
+    WHERE      users.object_type = 'user'
+           AND users.marked_for_deletion = 0
+           AND users.id NOT IN (
+               SELECT author
+               FROM   ModelRevisions
+               WHERE  author IS NOT NULL
+           )
+"""
 
 
 def get_purple_tenants_count(database_file_path):
@@ -42,13 +165,7 @@ def get_purple_tenants_count(database_file_path):
         list: Returns a list containing the results of the query. In this specific case, the list should only
             contain a single entry.
     """
-    query = """
-        SELECT COUNT(*)
-        FROM   Tenants
-        WHERE  name LIKE '%purple%'
-    """
-
-    return _fetch_result_from_database(query, database_file_path)
+    return _fetch_result_from_database(_PURPLE_TENANTS_COUNT_QUERY, database_file_path)
 
 
 def get_active_tenants(database_file_path):
@@ -64,10 +181,28 @@ def get_active_tenants(database_file_path):
             with the id of an active tenant. In case the tenants with the ids "a", "b", and "c" are active, the
             result is [("a",), ("b",), ("c",)].
     """
-    # remove the line below in case you have implemented the query.
-    raise NotImplementedError
+    if has_tenant_stats(database_file_path):
+        return _fetch_result_from_database("""
+            SELECT tenants.id
+            FROM   Tenants tenants
+            WHERE  EXISTS (
+                       SELECT 1
+                       FROM   TenantStats stats
+                       WHERE      stats.tenant = tenants.id
+                              AND stats.active_users > 0
+                   )
+        """, database_file_path)
 
     query = """
+        SELECT tenants.id
+        FROM   Tenants tenants
+        WHERE  EXISTS (
+                   SELECT 1
+                   FROM   Objects users
+                   WHERE      users.tenant = tenants.id
+                          AND users.object_type = 'user'
+                          AND users.marked_for_deletion = 0
+               )
     """
 
     return _fetch_result_from_database(query, database_file_path)
@@ -85,10 +220,35 @@ def get_model_count_of_largest_tenant(database_file_path):
         list: Returns a list containing the result of the query. In this specific case, the list contains a
             single tuple with one element. In case the largest tenant has 300 models, the result is [(300,)].
     """
-    # remove the line below in case you have implemented the query.
-    raise NotImplementedError
+    if has_tenant_stats(database_file_path):
+        return _fetch_result_from_database("""
+            SELECT COALESCE((
+                SELECT   models
+                FROM     TenantStats
+                WHERE    active_users > 0
+                ORDER BY active_users DESC, tenant
+                LIMIT    1
+            ), 0)
+        """, database_file_path)
 
     query = """
+        WITH active_user_counts AS (
+            SELECT   tenant, COUNT(*) AS active_users
+            FROM     Objects
+            WHERE        object_type = 'user'
+                     AND marked_for_deletion = 0
+            GROUP BY tenant
+        ),
+        largest_tenant AS (
+            SELECT   tenant
+            FROM     active_user_counts
+            ORDER BY active_users DESC, tenant
+            LIMIT    1
+        )
+        SELECT COUNT(*)
+        FROM   Objects models
+        WHERE      models.object_type = 'model'
+               AND models.tenant = (SELECT tenant FROM largest_tenant)
     """
 
     return _fetch_result_from_database(query, database_file_path)
@@ -104,10 +264,23 @@ def get_revision_heaviest_tenant_one(database_file_path):
         list: Returns a list containing the result of the query. In this specific case, the list contains a
             single tuple with one element. In case the largest tenant has the id 42, the result is [(42,)].
     """
-    # remove the line below in case you have implemented the query.
-    raise NotImplementedError
+    if has_tenant_stats(database_file_path):
+        return _fetch_result_from_database("""
+            SELECT   tenant
+            FROM     TenantStats
+            WHERE    undeleted_revisions > 0
+            ORDER BY undeleted_revisions DESC, tenant
+            LIMIT    1
+        """, database_file_path)
 
     query = """
+        SELECT   tenant
+        FROM     Objects
+        WHERE        object_type = 'revision'
+                 AND marked_for_deletion = 0
+        GROUP BY tenant
+        ORDER BY COUNT(*) DESC, tenant
+        LIMIT    1
     """
 
     return _fetch_result_from_database(query, database_file_path)
@@ -126,10 +299,42 @@ def get_revision_heaviest_tenant_two(database_file_path):
             single tuple with one element. In case the latest model of the largest tenant is called 'master-process',
             the result is [("master-process",)].
     """
-    # remove the line below in case you have implemented the query.
-    raise NotImplementedError
+    if has_tenant_stats(database_file_path):
+        return _fetch_result_from_database("""
+            SELECT models.title
+            FROM   Models models
+            WHERE  models.id = (
+                       SELECT   latest_model
+                       FROM     TenantStats
+                       WHERE    undeleted_revisions > 0
+                       ORDER BY undeleted_revisions DESC, tenant
+                       LIMIT    1
+                   )
+        """, database_file_path)
 
     query = """
+        WITH revision_heaviest_tenant AS (
+            SELECT   tenant
+            FROM     Objects
+            WHERE        object_type = 'revision'
+                     AND marked_for_deletion = 0
+            GROUP BY tenant
+            ORDER BY COUNT(*) DESC, tenant
+            LIMIT    1
+        ),
+        active_tenant_models AS (
+            SELECT models.id, models.title
+            FROM   Models models, Objects objects
+            WHERE      models.id = objects.id
+                   AND objects.object_type = 'model'
+                   AND objects.marked_for_deletion = 0
+                   AND objects.tenant = (SELECT tenant FROM revision_heaviest_tenant)
+        )
+        SELECT   active_tenant_models.title
+        FROM     active_tenant_models, ModelRevisions revisions
+        WHERE    revisions.model = active_tenant_models.id
+        ORDER BY revisions.creation_date DESC
+        LIMIT    1
     """
 
     return _fetch_result_from_database(query, database_file_path)
@@ -146,10 +351,169 @@ def get_lazy_users(database_file_path):
             tuples, each containing the id of an active user that never edited a model. In case the lazy
             users have the ids "a", "b", and "c", the result is [("a",), ("b",), ("c",)].
     """
-    # remove the line below in case you have implemented the query.
-    raise NotImplementedError
+    return _fetch_result_from_database(_LAZY_USERS_QUERY, database_file_path)
 
-    query = """
+
+# all query functions of Section 4, in the order of the challenge
+QUERY_FUNCTIONS = (
+    get_purple_tenants_count,
+    get_active_tenants,
+    get_model_count_of_largest_tenant,
+    get_revision_heaviest_tenant_one,
+    get_revision_heaviest_tenant_two,
+    get_lazy_users,
+)
+
+
+# number of objects per tenant, type and deletion flag, shared by all reports counting objects of a tenant
+_OBJECT_COUNTS_QUERY = """
+    SELECT   tenant, object_type, marked_for_deletion, COUNT(*)
+    FROM     Objects
+    GROUP BY tenant, object_type, marked_for_deletion
+"""
+
+_TENANTS_QUERY = """
+    SELECT id
+    FROM   Tenants
+"""
+
+_LATEST_MODEL_TITLE_QUERY = """
+    SELECT   models.title
+    FROM     Models models, Objects objects, ModelRevisions revisions
+    WHERE        models.id = objects.id
+             AND objects.object_type = 'model'
+             AND objects.marked_for_deletion = 0
+             AND objects.tenant = ?
+             AND revisions.model = models.id
+    ORDER BY revisions.creation_date DESC
+    LIMIT    1
+"""
+
+
+@dataclass
+class ReportSuite:
+    """Answers of all Section 4 reports computed by run_report_suite.
+
+    Attributes:
+        results (dict): Maps the names of the query functions onto their results.
+        timings (dict): Maps the names of the executed queries onto their runtime in seconds.
+        total_seconds (float): Runtime of the complete suite.
     """
+    results: dict
+    timings: dict
+    total_seconds: float
 
-    return _fetch_result_from_database(query, database_file_path)
+
+def _count_objects(object_counts, object_type, marked_for_deletion=None):
+    """Sums the shared object counts per tenant.
+
+    Args:
+        object_counts (list): Rows of the _OBJECT_COUNTS_QUERY.
+        object_type (str): Type of the counted objects.
+        marked_for_deletion (int): Only objects with this deletion flag are counted, all in case this is None.
+
+    Returns:
+        dict: Returns a dictionary mapping the tenant ids onto the number of objects.
+    """
+    counts = {}
+    for tenant, row_type, row_marked_for_deletion, count in object_counts:
+        if row_type == object_type and (marked_for_deletion is None or row_marked_for_deletion == marked_for_deletion):
+            counts[tenant] = counts.get(tenant, 0) + count
+    return counts
+
+
+def _largest(counts):
+    """Returns the tenant with the largest count, ties are broken by the smallest tenant id like the SQL queries."""
+    return min(counts.items(), key=lambda item: (-item[1], item[0]))[0] if counts else None
+
+
+def enable_write_ahead_log(database_file_path):
+    """Switches the database into write-ahead log mode, which allows readers to run concurrently with a writer.
+
+    The journal mode is persisted inside the database file.
+
+    Args:
+        database_file_path (str): String containing the path where the SQLite database file can be found.
+
+    Returns:
+        str: Returns the journal mode of the database after the switch.
+    """
+    database = dbapi.connect(database_file_path)
+    journal_mode = database.execute("PRAGMA journal_mode = WAL").fetchone()[0]
+    database.close()
+    return journal_mode
+
+
+def run_report_suite(database_file_path, workers=DEFAULT_REPORT_WORKERS, write_ahead_log=False):
+    """Computes the answers of all Section 4 reports at once.
+
+    The queries are executed concurrently by a thread pool on pooled read-only connections, SQLite releases the GIL
+    while a statement is executed. In case the TenantStats table exists, the query functions themselves are executed
+    concurrently, as they answer from the precomputed statistics. Otherwise, the reports that count objects per tenant
+    share a single aggregation of the Objects table, instead of each scanning it again. Reports returning several rows
+    may return them in a different order than the query functions.
+
+    The database is only switched into write-ahead log mode on request. The switch is persisted in the database file,
+    it is therefore a write a reporting call should not perform implicitly, and it fails on read-only files. Once the
+    database is in write-ahead log mode, the read-only connections of the pool no longer block and are no longer
+    blocked by a writer.
+
+    Args:
+        database_file_path (str): String containing the path where the SQLite database file can be found.
+        workers (int): Number of queries executed at the same time, at most the size of the connection pool.
+        write_ahead_log (bool): If True, the database is switched into write-ahead log mode first, see
+            enable_write_ahead_log.
+
+    Returns:
+        ReportSuite: Returns the answers of all reports, keyed by the names of the query functions, together with
+            the runtime of every executed query, or of every query function in case the TenantStats table is used.
+    """
+    if write_ahead_log:
+        enable_write_ahead_log(database_file_path)
+
+    start = time.perf_counter()
+    timings = {}
+
+    def timed(name, query, parameters=()):
+        query_start = time.perf_counter()
+        result = _fetch_result_from_database(query, database_file_path, parameters)
+        timings[name] = time.perf_counter() - query_start
+        return result
+
+    def timed_function(function):
+        function_start = time.perf_counter()
+        result = function(database_file_path)
+        timings[function.__name__] = time.perf_counter() - function_start
+        return result
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, DEFAULT_POOL_SIZE))) as executor:
+        if has_tenant_stats(database_file_path):
+            futures = [(function.__name__, executor.submit(timed_function, function)) for function in QUERY_FUNCTIONS]
+            results = {name: future.result() for name, future in futures}
+            return ReportSuite(results, timings, time.perf_counter() - start)
+
+        object_counts = executor.submit(timed, "object_counts", _OBJECT_COUNTS_QUERY)
+        tenants = executor.submit(timed, "tenants", _TENANTS_QUERY)
+        purple_tenants_count = executor.submit(timed, "purple_tenants_count", _PURPLE_TENANTS_COUNT_QUERY)
+        lazy_users = executor.submit(timed, "lazy_users", _LAZY_USERS_QUERY)
+
+        object_counts = object_counts.result()
+        revision_heaviest_tenant = _largest(_count_objects(object_counts, "revision", 0))
+        latest_model_title = None
+        if revision_heaviest_tenant is not None:
+            latest_model_title = executor.submit(timed, "latest_model_title", _LATEST_MODEL_TITLE_QUERY,
+                                                 (revision_heaviest_tenant,))
+
+        active_user_counts = _count_objects(object_counts, "user", 0)
+        largest_tenant = _largest(active_user_counts)
+
+        results = {
+            "get_purple_tenants_count": purple_tenants_count.result(),
+            "get_active_tenants": [(tenant,) for (tenant,) in tenants.result() if tenant in active_user_counts],
+            "get_model_count_of_largest_tenant": [(_count_objects(object_counts, "model").get(largest_tenant, 0),)],
+            "get_revision_heaviest_tenant_one": [(revision_heaviest_tenant,)] if revision_heaviest_tenant else [],
+            "get_revision_heaviest_tenant_two": latest_model_title.result() if latest_model_title else [],
+            "get_lazy_users": lazy_users.result(),
+        }
+
+    return ReportSuite(results, timings, time.perf_counter() - start)
@@ -4,13 +4,694 @@
 # Copyright (c) 2019 CompuCom, All Rights Reserved
 # Created by Luis Fuentes
 
-"""This module contains the forecasting part of the coding challenge."""
+"""This module contains the forecasting part of the coding challenge.
+
+The forecast is based on a **GrowthSeries**, which holds the number of models and revisions created within each time
+bucket of a given width, together with their cumulative totals. The series is bucketed by SQL in a single query and
+cached per database and bucket width, so that forecasts of different horizons share the same series.
+
+The growth rates of the series are forecasted by a **ForecastModel**. All models are registered in FORECAST_MODELS,
+further models are added by registering a factory creating an unfitted instance:
+
+    FORECAST_MODELS["holt_fast"] = functools.partial(HoltModel, alpha=0.8, beta=0.3)
+
+The models are compared by **backtest_models**, which forecasts the last buckets of the series from rolling origins
+and reports the errors and runtime of every model. Unless a model is requested explicitly, the forecast uses the
+model with the lowest mean absolute error on the series to be forecasted.
+
+The growth of every tenant is forecasted by **forecast_growth_by_tenant**, which loads the bucket counts of all
+tenants by a single query and fits the models of the tenants on worker processes.
+"""
+
+import argparse
+import copy
+import math
+import os
+import pickle
+import tempfile
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from itertools import accumulate
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:
+    shared_memory = None
 
 from coding_challenge.application_logic import Model, ModelRevision, Object, Tenant, User
+from coding_challenge.caching import LRUCache, get_database_version
 from coding_challenge.data_analysis_and_retrieval import _fetch_result_from_database as fetch_results_from_database
+from coding_challenge.instrumentation import phase, register_cache
+
+
+DEFAULT_GROWTH_SERIES_CACHE_SIZE = 16
+
+# number of rolling origins a model is evaluated at, and the minimum number of growth rates it is fitted on
+DEFAULT_BACKTEST_ORIGINS = 20
+DEFAULT_MIN_HISTORY = 10
+
+DEFAULT_FORECAST_MODEL = "geometric_mean"
+DEFAULT_FORECAST_HORIZON = 3
+
+_GROWTH_SERIES_CACHE = LRUCache(max_size=DEFAULT_GROWTH_SERIES_CACHE_SIZE)
+_SELECTED_MODEL_CACHE = LRUCache(max_size=DEFAULT_GROWTH_SERIES_CACHE_SIZE)
+register_cache("growth_series", _GROWTH_SERIES_CACHE)
+
+# number of models and revisions created per bucket together with the latest creation date, a model is created with
+# its first revision
+_GROWTH_SERIES_QUERY_TEMPLATE = """
+    SELECT   bucket, SUM(models), SUM(revisions), MAX(latest_creation_date)
+    FROM     (
+                 SELECT   creation_date / ?1 - (creation_date % ?1 < 0) AS bucket,
+                          0 AS models,
+                          COUNT(*) AS revisions,
+                          MAX(creation_date) AS latest_creation_date
+                 FROM     ModelRevisions
+                 WHERE    {revision_condition}
+                 GROUP BY bucket
+                 UNION ALL
+                 SELECT   first_creation_date / ?1 - (first_creation_date % ?1 < 0) AS bucket,
+                          COUNT(*) AS models,
+                          0 AS revisions,
+                          NULL AS latest_creation_date
+                 FROM     (
+                              SELECT   MIN(creation_date) AS first_creation_date
+                              FROM     ModelRevisions revisions
+                              WHERE    {model_condition}
+                              GROUP BY model
+                          )
+                 GROUP BY bucket
+             )
+    GROUP BY bucket
+    ORDER BY bucket
+"""
+
+_GROWTH_SERIES_QUERY = _GROWTH_SERIES_QUERY_TEMPLATE.format(revision_condition="1 = 1", model_condition="1 = 1")
+
+# number of models and revisions created per tenant and bucket, the tenant of a revision is the one of its model
+_TENANT_GROWTH_SERIES_QUERY = """
+    SELECT   tenant, bucket, SUM(models), SUM(revisions)
+    FROM     (
+                 SELECT   objects.tenant AS tenant,
+                          revisions.creation_date / ?1 - (revisions.creation_date % ?1 < 0) AS bucket,
+                          0 AS models,
+                          COUNT(*) AS revisions
+                 FROM     ModelRevisions revisions, Objects objects
+                 WHERE    objects.id = revisions.model
+                 GROUP BY objects.tenant, bucket
+                 UNION ALL
+                 SELECT   tenant,
+                          first_creation_date / ?1 - (first_creation_date % ?1 < 0) AS bucket,
+                          COUNT(*) AS models,
+                          0 AS revisions
+                 FROM     (
+                              SELECT   objects.tenant AS tenant, MIN(revisions.creation_date) AS first_creation_date
+                              FROM     ModelRevisions revisions, Objects objects
+                              WHERE    objects.id = revisions.model
+                              GROUP BY revisions.model
+                          )
+                 GROUP BY tenant, bucket
+             )
+    GROUP BY tenant, bucket
+    ORDER BY tenant, bucket
+"""
+
+# only reads the revisions created after the high-water mark ?2, using the indexes created by optimize_database
+_NEW_GROWTH_SERIES_QUERY = _GROWTH_SERIES_QUERY_TEMPLATE.format(
+    revision_condition="creation_date > ?2",
+    model_condition="""
+                                       creation_date > ?2
+                                   AND NOT EXISTS (SELECT 1 FROM ModelRevisions earlier
+                                                   WHERE earlier.model = revisions.model
+                                                         AND earlier.creation_date <= ?2)""")
+
+
+class GrowthSeries:
+    """Number of models and revisions per time bucket.
+
+    Bucket t contains all entities created within [t * interval_width, (t + 1) * interval_width). The series covers
+    all buckets from the first to the last bucket containing an entity, empty buckets in between are included.
+
+    Attributes:
+        interval_width (int): Width of a bucket, in units of the creation date.
+        first_bucket (int): Number of the first bucket of the series.
+        model_counts (array.array): Number of models created within each bucket.
+        revision_counts (array.array): Number of revisions created within each bucket.
+        totals (array.array): Number of models and revisions created up to the end of each bucket.
+    """
+
+    def __init__(self, interval_width, first_bucket, model_counts, revision_counts):
+        """Initializes the GrowthSeries.
+
+        Args:
+            interval_width (int): Width of a bucket, in units of the creation date.
+            first_bucket (int): Number of the first bucket of the series.
+            model_counts (iterable): Number of models created within each bucket.
+            revision_counts (iterable): Number of revisions created within each bucket.
+        """
+        super(GrowthSeries, self).__init__()
+
+        self.interval_width = interval_width
+        self.first_bucket = first_bucket
+        self.model_counts = array("q", model_counts)
+        self.revision_counts = array("q", revision_counts)
+        self.totals = array("q", accumulate(models + revisions for models, revisions in
+                                            zip(self.model_counts, self.revision_counts)))
+
+    @classmethod
+    def from_bucket_counts(cls, interval_width, bucket_counts):
+        """Creates the series from the counts of the non-empty buckets.
+
+        Args:
+            interval_width (int): Width of a bucket, in units of the creation date.
+            bucket_counts (list): Tuples starting with (bucket, models, revisions), ordered by bucket.
+
+        Returns:
+            GrowthSeries: Returns the series, filling the empty buckets.
+        """
+        series = cls(interval_width, 0, (), ())
+        series.extend(bucket_counts)
+        return series
+
+    @classmethod
+    def from_model_revision_table(cls, model_revision_table, interval_width):
+        """Creates the series in a single pass over loaded ModelRevisions, e.g. of a SnapshotLoader.
+
+        Args:
+            model_revision_table (ModelRevisionTable): The ModelRevisions.
+            interval_width (int): Width of a bucket, in units of the creation date.
+
+        Returns:
+            GrowthSeries: Returns the series.
+        """
+        revisions, first_creation_dates = {}, {}
+        for model, creation_date in zip(model_revision_table.column("model"),
+                                        model_revision_table.column("creation_date")):
+            bucket = creation_date // interval_width
+            revisions[bucket] = revisions.get(bucket, 0) + 1
+            if first_creation_dates.get(model, creation_date) >= creation_date:
+                first_creation_dates[model] = creation_date
+
+        models = {}
+        for creation_date in first_creation_dates.values():
+            bucket = creation_date // interval_width
+            models[bucket] = models.get(bucket, 0) + 1
+
+        return cls.from_bucket_counts(interval_width, [(bucket, models.get(bucket, 0), revision_count)
+                                                       for bucket, revision_count in sorted(revisions.items())])
+
+    def __len__(self):
+        """Returns the number of buckets of the series."""
+        return len(self.totals)
+
+    def extend(self, bucket_counts):
+        """Adds the entities created within the last bucket of the series or after it.
+
+        Only the added buckets and the last bucket are touched, independent of the length of the series.
+
+        Args:
+            bucket_counts (list): Tuples starting with (bucket, models, revisions), ordered by bucket.
+
+        Returns:
+            int: Returns the index of the first bucket that changed.
+
+        Raises:
+            ValueError: In case entities are added to a bucket preceding the last bucket of the series.
+        """
+        if not bucket_counts:
+            return len(self)
+        if not len(self):
+            self.first_bucket = bucket_counts[0][0]
+
+        start = max(len(self) - 1, 0)
+        if bucket_counts[0][0] - self.first_bucket < start:
+            raise ValueError("Entities can only be added to the last bucket of the series or after it.")
+
+        size = bucket_counts[-1][0] - self.first_bucket + 1
+        self.model_counts.extend(array("q", bytes(8 * (size - len(self)))))
+        self.revision_counts.extend(array("q", bytes(8 * (size - len(self)))))
+        for bucket, models, revisions, *_ in bucket_counts:
+            self.model_counts[bucket - self.first_bucket] += models
+            self.revision_counts[bucket - self.first_bucket] += revisions
+
+        total = self.totals[start - 1] if start else 0
+        del self.totals[start:]
+        for models, revisions in zip(self.model_counts[start:], self.revision_counts[start:]):
+            total += models + revisions
+            self.totals.append(total)
+
+        return start
+
+    def get_growth_rates(self):
+        """Returns the growth rate of every bucket, relative to its preceding bucket.
+
+        The growth rate of bucket t2 is totals_{t2} / totals_{t1}, with t1 being the bucket preceding t2. Buckets
+        preceded by a bucket without any entities have no growth rate.
+
+        Returns:
+            array.array: Returns the growth rates, starting with the first bucket that has one.
+        """
+        return array("d", (total / previous_total for previous_total, total in zip(self.totals, self.totals[1:])
+                           if previous_total))
+
+
+def _check_interval_width(interval_width):
+    """Checks that the interval width is a positive integer.
+
+    Args:
+        interval_width (int): Width of a bucket, in units of the creation date.
+
+    Raises:
+        ValueError: In case the interval width is not a positive integer.
+    """
+    if not isinstance(interval_width, int) or interval_width <= 0:
+        raise ValueError(f"The interval width has to be a positive integer, not {interval_width!r}.")
+
+
+def get_growth_series(database_file_path, interval_width):
+    """Returns the growth series of a database, which is only rebuilt in case the database changed.
+
+    Args:
+        database_file_path (str): String containing the path where the SQLite database file can be found.
+        interval_width (int): Width of a bucket, in units of the creation date.
+
+    Returns:
+        GrowthSeries: Returns the series, which is shared by all callers and must not be modified.
+    """
+    _check_interval_width(interval_width)
+
+    key = (os.path.abspath(database_file_path), interval_width)
+    version = get_database_version(database_file_path)
+
+    series = _GROWTH_SERIES_CACHE.get(key, version)
+    if series is None:
+        bucket_counts = fetch_results_from_database(_GROWTH_SERIES_QUERY, database_file_path, (interval_width,))
+        series = GrowthSeries.from_bucket_counts(interval_width, bucket_counts)
+        _GROWTH_SERIES_CACHE.put(key, series, version)
+
+    return series
+
+
+def clear_growth_series_cache():
+    """Clears all cached growth series and model selections, e.g. to measure cold forecasts."""
+    _GROWTH_SERIES_CACHE.clear()
+    _SELECTED_MODEL_CACHE.clear()
+
+
+class ForecastModel:
+    """Base class of the models forecasting a series of growth rates.
+
+    A model is created unfitted, fitted on the past values by fit and then forecasts the following values. Models
+    are fitted incrementally: update continues the fit with values following the already fitted ones, so that a
+    fitted model never has to see the same value twice. Without any past values, every model forecasts a growth rate
+    of 1, i.e. no growth.
+    """
+
+    def reset(self):
+        """Discards the fitted values."""
+        raise NotImplementedError
+
+    def update(self, values):
+        """Continues the fit with the values following the already fitted ones.
+
+        Args:
+            values (sequence): The new growth rates, in chronological order.
+
+        Returns:
+            ForecastModel: Returns the fitted model itself.
+        """
+        raise NotImplementedError
+
+    def fit(self, values):
+        """Fits the model on the past values, discarding an earlier fit.
+
+        Args:
+            values (sequence): The past growth rates, in chronological order.
+
+        Returns:
+            ForecastModel: Returns the fitted model itself.
+        """
+        self.reset()
+        return self.update(values)
+
+    def forecast(self, intervals):
+        """Forecasts the values following the past values.
+
+        Args:
+            intervals (int): Number of values to be forecasted.
+
+        Returns:
+            list: Returns the forecasted growth rates.
+        """
+        raise NotImplementedError
+
+
+class MovingAverageModel(ForecastModel):
+    """Forecasts the mean of the latest values."""
+
+    def __init__(self, window=5):
+        """Initializes the MovingAverageModel.
+
+        Args:
+            window (int): Number of latest values the mean is taken of.
+        """
+        super(MovingAverageModel, self).__init__()
+
+        self.window = window
+        self.reset()
+
+    def reset(self):
+        """Discards the fitted values, see ForecastModel.reset."""
+        self.latest_values = []
+
+    def update(self, values):
+        """Continues the fit with new values, see ForecastModel.update."""
+        self.latest_values = (self.latest_values + list(values[-self.window:]))[-self.window:]
+        return self
+
+    def forecast(self, intervals):
+        """Forecasts the values following the past values, see ForecastModel.forecast."""
+        mean = sum(self.latest_values) / len(self.latest_values) if self.latest_values else 1.0
+        return [mean] * intervals
+
+
+class GeometricMeanModel(ForecastModel):
+    """Forecasts the geometric mean of all values, i.e. the average growth rate of the whole history."""
+
+    def __init__(self):
+        """Initializes the GeometricMeanModel."""
+        super(GeometricMeanModel, self).__init__()
+
+        self.reset()
+
+    def reset(self):
+        """Discards the fitted values, see ForecastModel.reset."""
+        self.logarithm_sum = 0.0
+        self.size = 0
+
+    def update(self, values):
+        """Continues the fit with new values, see ForecastModel.update."""
+        self.logarithm_sum += math.fsum(map(math.log, values))
+        self.size += len(values)
+        return self
+
+    def forecast(self, intervals):
+        """Forecasts the values following the past values, see ForecastModel.forecast."""
+        return [math.exp(self.logarithm_sum / self.size) if self.size else 1.0] * intervals
+
+
+class ExponentialSmoothingModel(ForecastModel):
+    """Forecasts the exponentially smoothed level of the values."""
+
+    def __init__(self, alpha=0.3):
+        """Initializes the ExponentialSmoothingModel.
+
+        Args:
+            alpha (float): Smoothing factor of the level, between 0 and 1.
+        """
+        super(ExponentialSmoothingModel, self).__init__()
+
+        self.alpha = alpha
+        self.reset()
+
+    def reset(self):
+        """Discards the fitted values, see ForecastModel.reset."""
+        self.level = None
+
+    def update(self, values):
+        """Continues the fit with new values, see ForecastModel.update."""
+        for value in values:
+            self.level = value if self.level is None else self.level + self.alpha * (value - self.level)
+        return self
+
+    def forecast(self, intervals):
+        """Forecasts the values following the past values, see ForecastModel.forecast."""
+        return [1.0 if self.level is None else self.level] * intervals
+
+
+class HoltModel(ForecastModel):
+    """Forecasts the exponentially smoothed level and trend of the values, known as Holt's linear method."""
+
+    def __init__(self, alpha=0.3, beta=0.1):
+        """Initializes the HoltModel.
+
+        Args:
+            alpha (float): Smoothing factor of the level, between 0 and 1.
+            beta (float): Smoothing factor of the trend, between 0 and 1.
+        """
+        super(HoltModel, self).__init__()
+
+        self.alpha = alpha
+        self.beta = beta
+        self.reset()
+
+    def reset(self):
+        """Discards the fitted values, see ForecastModel.reset."""
+        self.level = None
+        self.trend = None
+
+    def update(self, values):
+        """Continues the fit with new values, see ForecastModel.update.
+
+        The level starts at the first value and the trend at the difference of the first two values.
+        """
+        for value in values:
+            if self.level is None:
+                self.level = value
+                continue
+            if self.trend is None:
+                self.trend = value - self.level
+
+            previous_level = self.level
+            self.level = self.alpha * value + (1 - self.alpha) * (self.level + self.trend)
+            self.trend = self.beta * (self.level - previous_level) + (1 - self.beta) * self.trend
+        return self
+
+    def forecast(self, intervals):
+        """Forecasts the values following the past values, see ForecastModel.forecast."""
+        level = 1.0 if self.level is None else self.level
+        trend = 0.0 if self.trend is None else self.trend
+        return [level + interval * trend for interval in range(1, intervals + 1)]
+
+
+class LeastSquaresTrendModel(ForecastModel):
+    """Forecasts the linear trend of the latest values, fitted by least squares."""
+
+    def __init__(self, window=20):
+        """Initializes the LeastSquaresTrendModel.
+
+        Args:
+            window (int): Number of latest values the trend is fitted on.
+        """
+        super(LeastSquaresTrendModel, self).__init__()
+
+        self.window = window
+        self.reset()
+
+    def reset(self):
+        """Discards the fitted values, see ForecastModel.reset."""
+        self.latest_values = []
+
+    def update(self, values):
+        """Continues the fit with new values, see ForecastModel.update."""
+        self.latest_values = (self.latest_values + list(values[-self.window:]))[-self.window:]
+        return self
+
+    def forecast(self, intervals):
+        """Forecasts the values following the past values, see ForecastModel.forecast."""
+        size = len(self.latest_values)
+        if not size:
+            return [1.0] * intervals
+
+        mean_x = (size - 1) / 2
+        mean_y = sum(self.latest_values) / size
+        variance = sum((x - mean_x) ** 2 for x in range(size))
+        covariance = sum((x - mean_x) * (y - mean_y) for x, y in enumerate(self.latest_values))
+        slope = covariance / variance if variance else 0.0
+        intercept = mean_y - slope * mean_x
+        return [intercept + slope * (size - 1 + interval) for interval in range(1, intervals + 1)]
+
+
+# maps the names of the models onto factories creating an unfitted instance
+FORECAST_MODELS = {
+    "geometric_mean": GeometricMeanModel,
+    "moving_average": MovingAverageModel,
+    "exponential_smoothing": ExponentialSmoothingModel,
+    "holt": HoltModel,
+    "least_squares_trend": LeastSquaresTrendModel,
+}
+
+
+@dataclass
+class BacktestResult:
+    """Accuracy and runtime of a model, evaluated on the growth rates of a single interval width.
+
+    Attributes:
+        model (str): Name of the model.
+        interval_width (int): Width of the buckets of the evaluated series.
+        origins (int): Number of rolling origins the model was evaluated at.
+        mean_absolute_error (float): Mean absolute error of all forecasted values.
+        root_mean_squared_error (float): Root of the mean squared error of all forecasted values.
+        mean_absolute_percentage_error (float): Mean absolute error relative to the actual values, in percent.
+        seconds (float): Time spent fitting and forecasting at all origins.
+    """
+    model: str
+    interval_width: int
+    origins: int
+    mean_absolute_error: float = None
+    root_mean_squared_error: float = None
+    mean_absolute_percentage_error: float = None
+    seconds: float = 0.0
 
 
-def get_forecasted_model_revision_growth_rate(database_file_path, interval_width, forecasting_intervals):
+def backtest(values, model_name, horizon, interval_width=None, origins=DEFAULT_BACKTEST_ORIGINS,
+             min_history=DEFAULT_MIN_HISTORY):
+    """Evaluates a model by forecasting the latest values of a series from rolling origins.
+
+    At every origin, the model is fitted on all values before the origin and forecasts the following horizon values.
+    The origins are the latest ones at which at least min_history values are known and horizon values follow. The
+    model is fitted once up to the first origin and then updated by one value per origin.
+
+    Args:
+        values (sequence): The growth rates, in chronological order.
+        model_name (str): Name of the model in FORECAST_MODELS.
+        horizon (int): Number of values forecasted from every origin.
+        interval_width (int): Width of the buckets of the series, only stored in the result.
+        origins (int): Maximum number of origins.
+        min_history (int): Minimum number of values a model is fitted on.
+
+    Returns:
+        BacktestResult: Returns the errors of the model, which are None in case the series is too short.
+    """
+    model_factory = FORECAST_MODELS[model_name]
+    last_origin = len(values) - horizon
+    origin_range = range(max(min_history, last_origin - origins + 1), last_origin + 1)
+
+    errors = []
+    start = time.perf_counter()
+    model = model_factory().fit(values[:origin_range.start]) if origin_range else None
+    for origin in origin_range:
+        forecast = model.forecast(horizon)
+        errors.extend((predicted - actual, actual) for predicted, actual in zip(forecast, values[origin:]))
+        model.update(values[origin:origin + 1])
+    seconds = time.perf_counter() - start
+
+    result = BacktestResult(model_name, interval_width, len(origin_range), seconds=seconds)
+    if errors:
+        result.mean_absolute_error = math.fsum(abs(error) for error, _ in errors) / len(errors)
+        result.root_mean_squared_error = math.sqrt(math.fsum(error ** 2 for error, _ in errors) / len(errors))
+        result.mean_absolute_percentage_error = 100 * math.fsum(abs(error / actual) for error, actual in errors
+                                                                if actual) / len(errors)
+
+    return result
+
+
+def select_forecast_model(values, horizon, model_names=None):
+    """Selects the model with the lowest mean absolute error in the backtest of a series.
+
+    Args:
+        values (sequence): The growth rates, in chronological order.
+        horizon (int): Number of values to be forecasted.
+        model_names (list): Names of the candidate models, all registered models are candidates in case this is None.
+
+    Returns:
+        str: Returns the name of the best model, or DEFAULT_FORECAST_MODEL in case the series is too short.
+    """
+    results = [backtest(values, model_name, horizon) for model_name in model_names or FORECAST_MODELS]
+    results = [result for result in results if result.mean_absolute_error is not None]
+    if not results:
+        return DEFAULT_FORECAST_MODEL
+
+    return min(results, key=lambda result: result.mean_absolute_error).model
+
+
+def _backtest_interval_width(arguments):
+    """Backtests several models on the growth rates of a single interval width.
+
+    Args:
+        arguments (tuple): Tuple of (database_file_path, interval_width, horizon, model_names, origins).
+
+    Returns:
+        list: Returns one BacktestResult per model.
+    """
+    database_file_path, interval_width, horizon, model_names, origins = arguments
+    growth_rates = get_growth_series(database_file_path, interval_width).get_growth_rates()
+    return [backtest(growth_rates, model_name, horizon, interval_width, origins) for model_name in model_names]
+
+
+def backtest_models(database_file_path, interval_widths, horizon=3, model_names=None,
+                    origins=DEFAULT_BACKTEST_ORIGINS, workers=1):
+    """Evaluates the models on the growth rates of several interval widths.
+
+    The interval widths are evaluated by worker processes in case more than one worker is requested. The workers
+    look up the models by name, so models registered after the start of the interpreter are only available to them
+    in case the processes are forked.
+
+    Args:
+        database_file_path (str): String containing the path where the SQLite database file can be found.
+        interval_widths (list): The interval widths the growth rates are bucketed by.
+        horizon (int): Number of values forecasted from every origin.
+        model_names (list): Names of the evaluated models, all registered models are evaluated in case this is None.
+        origins (int): Maximum number of rolling origins per model and interval width.
+        workers (int): Number of worker processes.
+
+    Returns:
+        list: Returns one BacktestResult per interval width and model.
+    """
+    model_names = list(model_names or FORECAST_MODELS)
+    tasks = [(database_file_path, interval_width, horizon, model_names, origins) for interval_width in interval_widths]
+
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as executor:
+            results = list(executor.map(_backtest_interval_width, tasks))
+    else:
+        results = [_backtest_interval_width(task) for task in tasks]
+
+    return [result for interval_width_results in results for result in interval_width_results]
+
+
+def format_backtest_report(results):
+    """Formats backtest results as table.
+
+    Args:
+        results (list): BacktestResult instances.
+
+    Returns:
+        str: Returns the report.
+    """
+    def number(value, digits=6):
+        return "-" if value is None else f"{value:.{digits}f}"
+
+    lines = [f"{'model':<24}{'width':>8}{'origins':>9}{'mae':>12}{'rmse':>12}{'mape %':>10}{'seconds':>10}"]
+    for result in results:
+        lines.append(f"{result.model:<24}{result.interval_width:>8}{result.origins:>9}"
+                     f"{number(result.mean_absolute_error):>12}{number(result.root_mean_squared_error):>12}"
+                     f"{number(result.mean_absolute_percentage_error, 3):>10}{number(result.seconds, 4):>10}")
+    return "\n".join(lines)
+
+
+def _forecast_growth_rates(growth_rates, forecasting_intervals, model_name):
+    """Fits a model on the growth rates and forecasts the following ones.
+
+    Args:
+        growth_rates (sequence): The past growth rates, in chronological order.
+        forecasting_intervals (int): Number of forecasted intervals.
+        model_name (str): Name of the model in FORECAST_MODELS, the best model is selected in case this is None.
+
+    Returns:
+        list: Returns the forecasted growth rates, raised to 1 in case they are lower.
+    """
+    if model_name is None:
+        model_name = select_forecast_model(growth_rates, forecasting_intervals)
+
+    forecast = FORECAST_MODELS[model_name]().fit(growth_rates).forecast(forecasting_intervals)
+    return [max(1.0, growth_rate) for growth_rate in forecast]
+
+
+def get_forecasted_model_revision_growth_rate(database_file_path, interval_width, forecasting_intervals,
+                                              model_name=None):
     """This function returns the expected model growth rate of the application.
 
     The growth rate between two time buckets is defined as
@@ -20,14 +701,323 @@ def get_forecasted_model_revision_growth_rate(database_file_path, interval_width
     where t1 and t2 represent the number of entities at that time. The expected model growth is an estimate based on
     past values.
 
+    The number of entities at a time are all models and revisions created up to the end of its bucket, see
+    GrowthSeries.get_growth_rates. The growth rates are forecasted by the given model, or by the model that
+    forecasted the latest growth rates best, see select_forecast_model. The selection is cached until the database
+    changes. As the number of entities never decreases, forecasted growth rates below 1 are raised to 1.
+
     Args:
         database_file_path (str): String containing the path where the SQLite database file can be found.
         interval_with (int): Determines the number of concrete values for t that are put into time bucket for analysis.
             In a real scenario, this could be one day in case the model growth should be forecasted on a daily basis.
         forecasting_intervals (int): Determines, how many intervals should be forecasted.
+        model_name (str): Name of the model in FORECAST_MODELS, the best model is selected in case this is None.
 
     Returns:
         list: Returns a list containing the forecasted model growth values. In case two intervals should be forecasted,
             the result could be [1.2, 1.3], with the values depending on the model growth.
     """
-    raise NotImplementedError
+    series = get_growth_series(database_file_path, interval_width)
+    growth_rates = series.get_growth_rates()
+
+    if model_name is None:
+        key = (os.path.abspath(database_file_path), interval_width, forecasting_intervals)
+        version = get_database_version(database_file_path)
+        model_name = _SELECTED_MODEL_CACHE.get(key, version)
+        if model_name is None:
+            with phase("forecasting.select_model"):
+                model_name = select_forecast_model(growth_rates, forecasting_intervals)
+            _SELECTED_MODEL_CACHE.put(key, model_name, version)
+
+    return _forecast_growth_rates(growth_rates, forecasting_intervals, model_name)
+
+
+@dataclass
+class TenantForecasts:
+    """Forecasted growth rates of all tenants computed by forecast_growth_by_tenant.
+
+    Attributes:
+        forecasts (dict): Maps the tenant ids onto their forecasted growth rates.
+        timings (dict): Maps the phases "load" and "forecast" onto their runtime in seconds.
+        total_seconds (float): Runtime of the complete forecast.
+    """
+    forecasts: dict
+    timings: dict
+    total_seconds: float
+
+
+def _forecast_tenants(arguments):
+    """Forecasts the growth rates of several tenants from the packed bucket counts of all tenants.
+
+    The bucket counts are packed into a single buffer of machine integers, holding the buckets, the model counts and
+    the revision counts of all rows one after another.
+
+    Args:
+        arguments (tuple): Tuple of (buffer, rows, tenants, interval_width, forecasting_intervals, model_name).
+            buffer is either the name of a shared memory block or a bytes-like object, tenants is a list of tuples of
+            (tenant_id, first_row, end_row).
+
+    Returns:
+        dict: Returns a dictionary mapping the tenant ids onto their forecasted growth rates.
+    """
+    buffer, rows, tenants, interval_width, forecasting_intervals, model_name = arguments
+
+    block = shared_memory.SharedMemory(name=buffer) if isinstance(buffer, str) else None
+    try:
+        forecasts = {}
+        with memoryview(block.buf if block is not None else buffer).cast("B").cast("q") as values:
+            for tenant_id, start, end in tenants:
+                bucket_counts = list(zip(values[start:end].tolist(), values[rows + start:rows + end].tolist(),
+                                         values[2 * rows + start:2 * rows + end].tolist()))
+                growth_rates = GrowthSeries.from_bucket_counts(interval_width, bucket_counts).get_growth_rates()
+                forecasts[tenant_id] = _forecast_growth_rates(growth_rates, forecasting_intervals, model_name)
+        return forecasts
+    finally:
+        if block is not None:
+            block.close()
+
+
+def forecast_growth_by_tenant(database_file_path, interval_width, forecasting_intervals, workers=1,
+                              model_name=None):
+    """Forecasts the growth rates of every tenant, see get_forecasted_model_revision_growth_rate.
+
+    The bucket counts of all tenants are loaded by a single query grouped by the tenant of the models, the tenants
+    without any revisions are therefore not forecasted. In case more than one worker is requested, the counts are
+    placed into a shared memory block, so that the worker processes fitting the models of the tenants read them
+    without copying. Without shared memory support, the counts are passed to the workers by pickling them.
+
+    Args:
+        database_file_path (str): String containing the path where the SQLite database file can be found.
+        interval_width (int): Width of a bucket, in units of the creation date.
+        forecasting_intervals (int): Number of forecasted intervals.
+        workers (int): Number of worker processes.
+        model_name (str): Name of the model in FORECAST_MODELS, the best model is selected per tenant in case this
+            is None.
+
+    Returns:
+        TenantForecasts: Returns the forecasts of all tenants together with the runtime of the load and the fit.
+    """
+    _check_interval_width(interval_width)
+    start = time.perf_counter()
+
+    tenant_bucket_counts = fetch_results_from_database(_TENANT_GROWTH_SERIES_QUERY, database_file_path,
+                                                       (interval_width,))
+    rows = len(tenant_bucket_counts)
+    values = array("q", (bucket for _, bucket, _, _ in tenant_bucket_counts))
+    values.extend(models for _, _, models, _ in tenant_bucket_counts)
+    values.extend(revisions for _, _, _, revisions in tenant_bucket_counts)
+
+    tenants = []
+    for row, (tenant_id, _, _, _) in enumerate(tenant_bucket_counts):
+        if not tenants or tenants[-1][0] != tenant_id:
+            tenants.append([tenant_id, row, row])
+        tenants[-1][2] = row + 1
+
+    load_seconds = time.perf_counter() - start
+    forecast_start = time.perf_counter()
+
+    forecasts = {}
+    if workers > 1 and len(tenants) > 1:
+        chunk_size = -(-len(tenants) // (4 * workers))
+        chunks = [tenants[idx:idx + chunk_size] for idx in range(0, len(tenants), chunk_size)]
+
+        block = None
+        if shared_memory is not None and values:
+            block = shared_memory.SharedMemory(create=True, size=len(values) * values.itemsize)
+            block.buf[:len(values) * values.itemsize] = values.tobytes()
+        try:
+            buffer = block.name if block is not None else values.tobytes()
+            tasks = [(buffer, rows, chunk, interval_width, forecasting_intervals, model_name) for chunk in chunks]
+            with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as executor:
+                for chunk_forecasts in executor.map(_forecast_tenants, tasks):
+                    forecasts.update(chunk_forecasts)
+        finally:
+            if block is not None:
+                block.close()
+                block.unlink()
+    else:
+        forecasts = _forecast_tenants((values, rows, tenants, interval_width, forecasting_intervals, model_name))
+
+    forecast_seconds = time.perf_counter() - forecast_start
+    return TenantForecasts(forecasts, {"load": load_seconds, "forecast": forecast_seconds},
+                           time.perf_counter() - start)
+
+
+class ForecastState:
+    """Forecast of the growth rates that is kept up to date incrementally, e.g. by an hourly job.
+
+    The state holds the growth series, the latest creation date processed so far, called the high-water mark, and a
+    model fitted on all growth rates but the last one. As new revisions are created after the high-water mark, they
+    only change the last bucket of the series or add buckets after it. Therefore, **update** only reads the new
+    revisions and continues the fit with the growth rates that became final, while the last growth rate is only
+    added to a copy of the model when forecasting. The state is persisted by **save** and restored by **load**.
+
+    Revisions created at or before the high-water mark after an update, e.g. by importing old data, are never seen.
+    The state has to be built anew in that case.
+
+    Attributes:
+        database_file (str): Absolute path of the database file.
+        interval_width (int): Width of a bucket, in units of the creation date.
+        model_name (str): Name of the model in FORECAST_MODELS, selected on the first update in case it is None.
+        horizon (int): Number of forecasted intervals the model is selected for.
+        high_water_mark (int): The latest creation date processed, None in case no revision was processed.
+        series (GrowthSeries): The number of models and revisions per bucket.
+    """
+
+    def __init__(self, database_file_path, interval_width, model_name=None, horizon=DEFAULT_FORECAST_HORIZON):
+        """Initializes an empty ForecastState.
+
+        Args:
+            database_file_path (str): String containing the path where the SQLite database file can be found.
+            interval_width (int): Width of a bucket, in units of the creation date.
+            model_name (str): Name of the model in FORECAST_MODELS, the best model is selected in case this is None.
+            horizon (int): Number of forecasted intervals the model is selected for.
+        """
+        super(ForecastState, self).__init__()
+        _check_interval_width(interval_width)
+
+        self.database_file = os.path.abspath(database_file_path)
+        self.interval_width = interval_width
+        self.model_name = model_name
+        self.horizon = horizon
+        self.high_water_mark = None
+        self.series = GrowthSeries(interval_width, 0, (), ())
+        self._model = None
+
+    @classmethod
+    def build(cls, database_file_path, interval_width, model_name=None, horizon=DEFAULT_FORECAST_HORIZON):
+        """Creates a state holding all revisions of the database.
+
+        Args:
+            database_file_path (str): String containing the path where the SQLite database file can be found.
+            interval_width (int): Width of a bucket, in units of the creation date.
+            model_name (str): Name of the model in FORECAST_MODELS, the best model is selected in case this is None.
+            horizon (int): Number of forecasted intervals the model is selected for.
+
+        Returns:
+            ForecastState: Returns the state.
+        """
+        state = cls(database_file_path, interval_width, model_name, horizon)
+        state.update()
+        return state
+
+    def update(self):
+        """Adds the revisions created after the high-water mark.
+
+        Returns:
+            int: Returns the number of added revisions.
+        """
+        if self.high_water_mark is None:
+            bucket_counts = fetch_results_from_database(_GROWTH_SERIES_QUERY, self.database_file,
+                                                        (self.interval_width,))
+        else:
+            bucket_counts = fetch_results_from_database(_NEW_GROWTH_SERIES_QUERY, self.database_file,
+                                                        (self.interval_width, self.high_water_mark))
+        if not bucket_counts:
+            return 0
+
+        start = self.series.extend(bucket_counts)
+        self.high_water_mark = max(latest for _, _, _, latest in bucket_counts if latest is not None)
+
+        if self.model_name is None:
+            self.model_name = select_forecast_model(self.series.get_growth_rates(), self.horizon)
+        if self._model is None:
+            self._model = FORECAST_MODELS[self.model_name]()
+
+        # the growth rate idx is totals[idx + 1] / totals[idx], all but the last one are final
+        totals = self.series.totals
+        self._model.update([totals[idx + 1] / totals[idx] for idx in range(max(start - 1, 0), len(totals) - 2)])
+
+        return sum(revisions for _, _, revisions, _ in bucket_counts)
+
+    def forecast(self, intervals):
+        """Forecasts the growth rates following the last bucket, see get_forecasted_model_revision_growth_rate.
+
+        Args:
+            intervals (int): Number of forecasted intervals.
+
+        Returns:
+            list: Returns the forecasted growth rates.
+        """
+        if self._model is None:
+            return [1.0] * intervals
+
+        totals = self.series.totals
+        model = copy.deepcopy(self._model).update([totals[-1] / totals[-2]] if len(totals) > 1 else [])
+        return [max(1.0, growth_rate) for growth_rate in model.forecast(intervals)]
+
+    def save(self, file_path):
+        """Persists the state to a file, which is replaced atomically.
+
+        Args:
+            file_path (str): Path to the file the state is written to.
+        """
+        directory = os.path.dirname(os.path.abspath(file_path))
+        descriptor, temporary_file_path = tempfile.mkstemp(dir=directory)
+        try:
+            with os.fdopen(descriptor, "wb") as state_file:
+                pickle.dump(self, state_file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporary_file_path, file_path)
+        except BaseException:
+            os.remove(temporary_file_path)
+            raise
+
+    @classmethod
+    def load(cls, file_path):
+        """Restores a state persisted by **save**.
+
+        Args:
+            file_path (str): Path to the file the state is read from.
+
+        Returns:
+            ForecastState: Returns the state, or None in case the file does not exist.
+        """
+        try:
+            with open(file_path, "rb") as state_file:
+                return pickle.load(state_file)
+        except FileNotFoundError:
+            return None
+
+
+def forecast_incrementally(database_file_path, state_file_path, interval_width, forecasting_intervals):
+    """Forecasts the growth rates like get_forecasted_model_revision_growth_rate, reading only new revisions.
+
+    The ForecastState persisted in the state file is updated by the revisions created since the last call and saved
+    again. A new state is built in case the file does not exist or holds the state of another database, interval
+    width or number of forecasted intervals, as the model was selected for the horizon of the state.
+
+    Args:
+        database_file_path (str): String containing the path where the SQLite database file can be found.
+        state_file_path (str): Path to the file the ForecastState is persisted in.
+        interval_width (int): Width of a bucket, in units of the creation date.
+        forecasting_intervals (int): Number of forecasted intervals.
+
+    Returns:
+        list: Returns the forecasted growth rates.
+    """
+    state = ForecastState.load(state_file_path)
+    if state is None or state.database_file != os.path.abspath(database_file_path) \
+            or state.interval_width != interval_width or state.horizon != forecasting_intervals:
+        state = ForecastState.build(database_file_path, interval_width, horizon=forecasting_intervals)
+        state.save(state_file_path)
+    elif state.update():
+        state.save(state_file_path)
+
+    return state.forecast(forecasting_intervals)
+
+
+# this part is executed if the module is called directly
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(prog="python -m coding_challenge.forecasting",
+                                     description="Backtests the forecasting models on the growth rates.")
+    parser.add_argument("database_file_path", help="path to the database file")
+    parser.add_argument("--widths", type=int, nargs="+", default=[50, 100, 500, 1000, 5000],
+                        help="interval widths the growth rates are bucketed by")
+    parser.add_argument("--horizon", type=int, default=3, help="number of forecasted intervals")
+    parser.add_argument("--origins", type=int, default=DEFAULT_BACKTEST_ORIGINS, help="number of rolling origins")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="number of worker processes")
+    options = parser.parse_args()
+
+    print(format_backtest_report(backtest_models(options.database_file_path, options.widths, options.horizon,
+                                                 origins=options.origins, workers=options.workers)))
@@ -0,0 +1,488 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2019 CompuCom, All Rights Reserved
+# Created by Luis Fuentes
+
+"""This module contains the instrumentation of the hot paths of the coding challenge.
+
+The loaders and queries measure their phases, e.g. opening connections, executing statements, fetching rows and
+constructing entities, by the **phase** context manager:
+
+    with phase("query.fetch") as measurement:
+        rows = cursor.fetchall()
+        measurement.add_rows(len(rows))
+
+Every phase accumulates its number of calls, its runtime, the rows it processed and, in case memory tracing is
+enabled, the net number of bytes it allocated. Together with the counters added by **count**, e.g. the checkouts,
+waits and discards of the connection pools, and the hit rates of the registered caches, the metrics are written to the
+sinks by **flush**. Sinks exist for the logging module, JSON lines and the Prometheus text format.
+
+The instrumentation is disabled by default and costs a single flag check per phase in that case. It is enabled by
+**enable_instrumentation**, or by setting the environment variable CODING_CHALLENGE_INSTRUMENTATION before the
+package is imported, to either "logging", "jsonl:<file>" or "prometheus:<file>". The metrics are flushed when the
+interpreter exits in that case.
+
+Independently, **profiled** wraps arbitrary code into cProfile and dumps the collected statistics.
+"""
+
+import atexit
+import contextlib
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import re
+import tempfile
+import threading
+import time
+import tracemalloc
+from dataclasses import dataclass, asdict
+
+
+INSTRUMENTATION_ENVIRONMENT_VARIABLE = "CODING_CHALLENGE_INSTRUMENTATION"
+
+PROMETHEUS_PREFIX = "coding_challenge"
+
+LOGGER = logging.getLogger(__name__)
+
+_ENABLED = False
+_TRACE_MEMORY = False
+_STARTED_TRACEMALLOC = False
+_SINKS = []
+_PHASES = {}
+_COUNTERS = {}
+_CACHES = {}
+_LOCK = threading.Lock()
+
+
+@dataclass
+class PhaseStatistics:
+    """Accumulated measurements of a single phase.
+
+    Attributes:
+        calls (int): Number of times the phase was executed.
+        seconds (float): Total runtime of all executions.
+        max_seconds (float): Runtime of the slowest execution.
+        rows (int): Number of rows processed by all executions.
+        allocated_bytes (int): Net number of bytes allocated by all executions, only measured with memory tracing.
+    """
+    calls: int = 0
+    seconds: float = 0.0
+    max_seconds: float = 0.0
+    rows: int = 0
+    allocated_bytes: int = 0
+
+
+class _Measurement:
+    """Measurement of a single execution of a phase."""
+
+    def __init__(self, name):
+        """Initializes the _Measurement.
+
+        Args:
+            name (str): Name of the phase.
+        """
+        super(_Measurement, self).__init__()
+
+        self.name = name
+        self.rows = 0
+        self._start = None
+        self._memory = 0
+
+    def add_rows(self, rows):
+        """Adds to the number of rows processed by the phase.
+
+        Args:
+            rows (int): Number of processed rows.
+        """
+        self.rows += rows
+
+    def __enter__(self):
+        """Starts the measurement."""
+        if _TRACE_MEMORY:
+            self._memory = tracemalloc.get_traced_memory()[0]
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Stops the measurement and adds it to the statistics of the phase."""
+        seconds = time.perf_counter() - self._start
+        allocated_bytes = tracemalloc.get_traced_memory()[0] - self._memory if _TRACE_MEMORY else 0
+
+        with _LOCK:
+            statistics = _PHASES.get(self.name)
+            if statistics is None:
+                statistics = _PHASES[self.name] = PhaseStatistics()
+            statistics.calls += 1
+            statistics.seconds += seconds
+            statistics.max_seconds = max(statistics.max_seconds, seconds)
+            statistics.rows += self.rows
+            statistics.allocated_bytes += allocated_bytes
+
+
+class _DisabledMeasurement:
+    """Measurement used while the instrumentation is disabled, which does nothing."""
+
+    def add_rows(self, rows):
+        """Ignores the processed rows."""
+
+    def __enter__(self):
+        """Does nothing."""
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Does nothing."""
+
+
+_DISABLED_MEASUREMENT = _DisabledMeasurement()
+
+
+def phase(name):
+    """Measures the execution of a phase.
+
+    Args:
+        name (str): Name of the phase, dotted by the component, e.g. "query.execute".
+
+    Returns:
+        contextmanager: Returns a context manager yielding the measurement, which counts the processed rows by
+            add_rows.
+    """
+    if not _ENABLED:
+        return _DISABLED_MEASUREMENT
+    return _Measurement(name)
+
+
+def count(name, value=1):
+    """Adds to a counter.
+
+    Args:
+        name (str): Name of the counter.
+        value (int): Value added to the counter.
+    """
+    if not _ENABLED:
+        return
+
+    with _LOCK:
+        _COUNTERS[name] = _COUNTERS.get(name, 0) + value
+
+
+def register_cache(name, cache):
+    """Registers a cache, so that its statistics are part of the metrics.
+
+    Args:
+        name (str): Name of the cache.
+        cache (LRUCache): The cache, providing a statistics method.
+    """
+    with _LOCK:
+        _CACHES[name] = cache
+
+
+def is_enabled():
+    """Checks if the instrumentation is enabled.
+
+    Returns:
+        bool: True, in case phases and counters are measured.
+    """
+    return _ENABLED
+
+
+def enable_instrumentation(sinks=None, trace_memory=False):
+    """Enables the instrumentation.
+
+    Args:
+        sinks (list): Sinks the metrics are written to by flush. The metrics are logged in case this is None.
+        trace_memory (bool): If True, the memory allocated by each phase is measured by tracemalloc, which slows down
+            all allocations. Tracing started by the caller before is kept running when the instrumentation is disabled.
+    """
+    global _ENABLED, _TRACE_MEMORY
+
+    with _LOCK:
+        _SINKS[:] = [LoggingSink()] if sinks is None else list(sinks)
+
+    if trace_memory and not tracemalloc.is_tracing():
+        _start_tracemalloc()
+    elif not trace_memory:
+        _stop_tracemalloc()
+    _TRACE_MEMORY = trace_memory
+    _ENABLED = True
+
+
+def disable_instrumentation():
+    """Disables the instrumentation, the collected metrics are kept until they are reset."""
+    global _ENABLED, _TRACE_MEMORY
+
+    _ENABLED = False
+    _TRACE_MEMORY = False
+    _stop_tracemalloc()
+
+
+def _start_tracemalloc():
+    """Starts tracing the memory allocations and remembers that this module started it."""
+    global _STARTED_TRACEMALLOC
+
+    tracemalloc.start()
+    _STARTED_TRACEMALLOC = True
+
+
+def _stop_tracemalloc():
+    """Stops tracing the memory allocations, in case it was started by this module."""
+    global _STARTED_TRACEMALLOC
+
+    if _STARTED_TRACEMALLOC:
+        _STARTED_TRACEMALLOC = False
+        tracemalloc.stop()
+
+
+def reset_metrics():
+    """Discards all measured phases and counters."""
+    with _LOCK:
+        _PHASES.clear()
+        _COUNTERS.clear()
+
+
+def get_metrics():
+    """Returns a snapshot of all metrics.
+
+    Returns:
+        dict: Returns a dictionary containing the statistics of all "phases", all "counters" and the statistics of
+            all registered "caches", each keyed by name. The statistics of the caches include their hit rate.
+    """
+    with _LOCK:
+        phases = {name: asdict(statistics) for name, statistics in _PHASES.items()}
+        counters = dict(_COUNTERS)
+        caches = dict(_CACHES)
+
+    cache_statistics = {}
+    for name, cache in caches.items():
+        statistics = cache.statistics()
+        cache_statistics[name] = dict(asdict(statistics), hit_rate=statistics.hit_rate)
+
+    return {"phases": phases, "counters": counters, "caches": cache_statistics}
+
+
+def flush():
+    """Writes a snapshot of all metrics to the sinks.
+
+    Returns:
+        dict: Returns the written metrics.
+    """
+    metrics = get_metrics()
+    with _LOCK:
+        sinks = list(_SINKS)
+
+    for sink in sinks:
+        sink.write(metrics)
+    return metrics
+
+
+class LoggingSink:
+    """Writes the metrics to a logger, one message per phase, counter and cache."""
+
+    def __init__(self, logger=LOGGER, level=logging.INFO):
+        """Initializes the LoggingSink.
+
+        Args:
+            logger (logging.Logger): Logger the metrics are written to.
+            level (int): Level of the messages.
+        """
+        super(LoggingSink, self).__init__()
+
+        self.logger = logger
+        self.level = level
+
+    def write(self, metrics):
+        """Writes the metrics.
+
+        Args:
+            metrics (dict): The metrics, see get_metrics.
+        """
+        for name, statistics in sorted(metrics["phases"].items()):
+            self.logger.log(self.level, "phase %s: %d calls, %.6f s (max %.6f s), %d rows, %d bytes", name,
+                            statistics["calls"], statistics["seconds"], statistics["max_seconds"],
+                            statistics["rows"], statistics["allocated_bytes"])
+        for name, value in sorted(metrics["counters"].items()):
+            self.logger.log(self.level, "counter %s: %s", name, value)
+        for name, statistics in sorted(metrics["caches"].items()):
+            self.logger.log(self.level, "cache %s: %d hits, %d misses, hit rate %.3f", name, statistics["hits"],
+                            statistics["misses"], statistics["hit_rate"])
+
+
+class JsonLinesSink:
+    """Appends the metrics as a single JSON line to a file."""
+
+    def __init__(self, file_path):
+        """Initializes the JsonLinesSink.
+
+        Args:
+            file_path (str): Path to the file the lines are appended to.
+        """
+        super(JsonLinesSink, self).__init__()
+
+        self.file_path = file_path
+
+    def write(self, metrics):
+        """Writes the metrics.
+
+        Args:
+            metrics (dict): The metrics, see get_metrics.
+        """
+        line = json.dumps(dict(metrics, timestamp=time.time(), pid=os.getpid()), sort_keys=True)
+        with open(self.file_path, "a") as metrics_file:
+            metrics_file.write(line + "\n")
+
+
+def _metric_name(*parts):
+    """Returns a valid Prometheus metric name.
+
+    Args:
+        *parts (str): Parts of the name, joined by underscores.
+
+    Returns:
+        str: Returns the name with all invalid characters replaced by underscores.
+    """
+    return re.sub(r"[^a-zA-Z0-9_]", "_", "_".join((PROMETHEUS_PREFIX, ) + parts))
+
+
+def format_prometheus(metrics):
+    """Formats the metrics in the Prometheus text exposition format.
+
+    Args:
+        metrics (dict): The metrics, see get_metrics.
+
+    Returns:
+        str: Returns the formatted metrics.
+    """
+    lines = []
+
+    def family(name, metric_type, description, samples):
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        for labels, value in samples:
+            label_text = ",".join(f'{key}="{label}"' for key, label in labels.items())
+            lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+
+    phases = sorted(metrics["phases"].items())
+    for field, metric_type, description in (
+            ("calls", "counter", "Number of executions of the phase."),
+            ("seconds", "counter", "Total runtime of the phase in seconds."),
+            ("max_seconds", "gauge", "Runtime of the slowest execution of the phase in seconds."),
+            ("rows", "counter", "Number of rows processed by the phase."),
+            ("allocated_bytes", "counter", "Net number of bytes allocated by the phase.")):
+        suffix = "_total" if metric_type == "counter" else ""
+        family(_metric_name("phase", field) + suffix, metric_type, description,
+               [({"phase": name}, statistics[field]) for name, statistics in phases])
+
+    for name, value in sorted(metrics["counters"].items()):
+        family(_metric_name(name) + "_total", "counter", f"Counter {name}.", [({}, value)])
+
+    caches = sorted(metrics["caches"].items())
+    for field, metric_type, description in (
+            ("hits", "counter", "Number of lookups answered from the cache."),
+            ("misses", "counter", "Number of lookups not answered from the cache."),
+            ("hit_rate", "gauge", "Share of lookups answered from the cache.")):
+        suffix = "_total" if metric_type == "counter" else ""
+        family(_metric_name("cache", field) + suffix, metric_type, description,
+               [({"cache": name}, statistics[field]) for name, statistics in caches])
+
+    return "\n".join(lines) + "\n"
+
+
+class PrometheusSink:
+    """Writes the metrics in the Prometheus text format into a file, e.g. for the textfile collector.
+
+    The file is replaced atomically on every write, so that a collector never reads a partial file.
+    """
+
+    def __init__(self, file_path):
+        """Initializes the PrometheusSink.
+
+        Args:
+            file_path (str): Path to the file the metrics are written to.
+        """
+        super(PrometheusSink, self).__init__()
+
+        self.file_path = file_path
+
+    def write(self, metrics):
+        """Writes the metrics.
+
+        Args:
+            metrics (dict): The metrics, see get_metrics.
+        """
+        directory = os.path.dirname(os.path.abspath(self.file_path))
+        descriptor, temporary_file_path = tempfile.mkstemp(dir=directory)
+        try:
+            with os.fdopen(descriptor, "w") as metrics_file:
+                metrics_file.write(format_prometheus(metrics))
+            os.replace(temporary_file_path, self.file_path)
+        except BaseException:
+            os.remove(temporary_file_path)
+            raise
+
+
+@contextlib.contextmanager
+def profiled(stats_file_path=None, sort="cumulative", limit=20):
+    """Profiles the enclosed code by cProfile.
+
+    Can be used as context manager or, by contextlib.ContextDecorator semantics, as decorator of a function:
+
+        with profiled("load.prof"):
+            DataLoader(database_file_path).get_model_revisions()
+
+    Args:
+        stats_file_path (str): Path to the file the statistics are dumped to, readable by pstats. The statistics are
+            logged instead in case this is None.
+        sort (str): Key the logged statistics are sorted by.
+        limit (int): Number of logged functions.
+
+    Yields:
+        cProfile.Profile: The running profiler.
+    """
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        if stats_file_path is not None:
+            profiler.dump_stats(stats_file_path)
+        else:
+            stream = io.StringIO()
+            pstats.Stats(profiler, stream=stream).sort_stats(sort).print_stats(limit)
+            LOGGER.info("profile:\n%s", stream.getvalue())
+
+
+def _sinks_from_environment(value):
+    """Creates the sinks configured by the environment variable.
+
+    Args:
+        value (str): Value of the environment variable, "logging", "jsonl:<file>" or "prometheus:<file>". Several
+            sinks are separated by commas.
+
+    Returns:
+        list: Returns the configured sinks.
+
+    Raises:
+        ValueError: In case a sink is unknown.
+    """
+    sinks = []
+    for specification in filter(None, (part.strip() for part in value.split(","))):
+        kind, _, file_path = specification.partition(":")
+        if kind in ("1", "logging"):
+            sinks.append(LoggingSink())
+        elif kind == "jsonl" and file_path:
+            sinks.append(JsonLinesSink(file_path))
+        elif kind == "prometheus" and file_path:
+            sinks.append(PrometheusSink(file_path))
+        else:
+            raise ValueError(f"Unknown instrumentation sink {specification!r} in "
+                             f"{INSTRUMENTATION_ENVIRONMENT_VARIABLE}.")
+    return sinks
+
+
+if os.environ.get(INSTRUMENTATION_ENVIRONMENT_VARIABLE, "0") not in ("", "0"):
+    enable_instrumentation(_sinks_from_environment(os.environ[INSTRUMENTATION_ENVIRONMENT_VARIABLE]))
+    atexit.register(flush)
@@ -0,0 +1,356 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2019 CompuCom, All Rights Reserved
+# Created by Luis Fuentes
+
+"""This module inspects the query plans of the Section 4 queries and suggests the indexes they are missing.
+
+Every function of **QUERY_FUNCTIONS** is executed while its queries are recorded. The plan of each recorded query is
+retrieved by EXPLAIN QUERY PLAN and searched for full table scans, automatic indexes, which SQLite builds for a single
+statement, and temporary B-trees used for sorting and grouping.
+
+For every table that is fully scanned or automatically indexed, candidate indexes are derived from the columns the
+query compares, groups and orders by. Each candidate is created within a transaction that is rolled back afterwards,
+and only suggested in case it reduces the number of problems in the plan. Run
+
+    python -m coding_challenge.query_diagnostics resources/magic_database.db --format json
+
+to print the report, and pass --create-indexes to create the suggested indexes.
+"""
+
+import argparse
+import json
+import re
+import sqlite3.dbapi2 as dbapi
+import time
+from dataclasses import dataclass, asdict, field
+
+from coding_challenge.data_analysis_and_retrieval import QUERY_FUNCTIONS, record_queries, clear_query_result_cache
+
+
+_SCAN_STEP = re.compile(r"^SCAN (?:TABLE )?(\w+)(?: AS (\w+))?(?: USING (COVERING )?INDEX .*)?$")
+_AUTOMATIC_INDEX_STEP = re.compile(r"^SEARCH (?:TABLE )?(\w+)(?: AS (\w+))? USING AUTOMATIC ")
+_TEMP_B_TREE_STEP = re.compile(r"^USE TEMP B-TREE ")
+_ORDERING_CLAUSE = re.compile(r"\b(?:GROUP|ORDER)\s+BY\s+(.+?)(?=\bLIMIT\b|\bHAVING\b|\bORDER\b|\)|$)",
+                              flags=re.IGNORECASE | re.DOTALL)
+
+# words that follow a table name but are no alias
+_KEYWORDS = frozenset([
+    "as", "cross", "except", "from", "group", "having", "inner", "intersect", "join", "left", "limit", "natural",
+    "on", "order", "outer", "union", "using", "where", "window",
+])
+
+
+@dataclass
+class QueryDiagnosis:
+    """Diagnosis of a single query executed by a query function.
+
+    Attributes:
+        function (str): Name of the query function.
+        query (str): The executed query.
+        runtime_seconds (float): Runtime of the query function.
+        plan (list): Details of all steps of the query plan, in the order reported by SQLite.
+        full_scans (list): Steps scanning a complete table.
+        automatic_indexes (list): Steps building an automatic index for this query only.
+        temp_b_trees (list): Steps using a temporary B-tree for sorting or grouping.
+        suggested_indexes (list): CREATE INDEX statements reducing the number of problems in the plan.
+        runtime_seconds_after (float): Runtime of the query function after the suggested indexes were created.
+        parameters (tuple): Parameters bound to the placeholders of the query.
+    """
+    function: str
+    query: str
+    runtime_seconds: float
+    plan: list
+    full_scans: list = field(default_factory=list)
+    automatic_indexes: list = field(default_factory=list)
+    temp_b_trees: list = field(default_factory=list)
+    suggested_indexes: list = field(default_factory=list)
+    runtime_seconds_after: float = None
+    parameters: tuple = ()
+
+    @property
+    def problems(self):
+        """int: Number of full scans, automatic indexes and temporary B-trees in the plan."""
+        return len(self.full_scans) + len(self.automatic_indexes) + len(self.temp_b_trees)
+
+
+def explain_query_plan(connection, query, parameters=()):
+    """Returns the plan of a query.
+
+    Args:
+        connection (sqlite3.Connection): Connection the query is explained by.
+        query (str): The query.
+        parameters (tuple): Parameters bound to the placeholders of the query.
+
+    Returns:
+        list: Returns the details of all steps of the plan.
+    """
+    return [row[3] for row in connection.execute(f"EXPLAIN QUERY PLAN {query}", parameters).fetchall()]
+
+
+def _get_table_columns(connection):
+    """Returns the columns of all tables.
+
+    Args:
+        connection (sqlite3.Connection): Connection to the database.
+
+    Returns:
+        dict: Returns a dictionary mapping the lower case table names onto tuples of (table name, column names).
+    """
+    tables = {}
+    for (table,) in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table' "
+                                       "AND name NOT LIKE 'sqlite_%'").fetchall():
+        columns = [row[1] for row in connection.execute(f"PRAGMA table_info({table})").fetchall()]
+        tables[table.lower()] = (table, columns)
+    return tables
+
+
+def _get_aliases(query, tables):
+    """Maps the aliases of a query onto the tables they refer to.
+
+    Args:
+        query (str): The query.
+        tables (dict): Tables of the database, as returned by _get_table_columns.
+
+    Returns:
+        dict: Returns a dictionary mapping the lower case aliases onto the lower case table names.
+    """
+    aliases = {}
+    for table in tables:
+        for match in re.finditer(rf"\b{table}\b\s+(?:AS\s+)?(\w+)", query, flags=re.IGNORECASE):
+            alias = match.group(1).lower()
+            if alias not in _KEYWORDS:
+                aliases[alias] = table
+    return aliases
+
+
+def _classify_plan(plan, tables, aliases):
+    """Searches a query plan for full scans, automatic indexes and temporary B-trees.
+
+    Args:
+        plan (list): Details of all steps of the plan.
+        tables (dict): Tables of the database, as returned by _get_table_columns.
+        aliases (dict): Aliases of the query, as returned by _get_aliases.
+
+    Returns:
+        tuple: Returns a tuple of three lists containing the details of the full scans, automatic indexes and
+            temporary B-trees, and a list of the (lower case alias, lower case table) pairs of the problematic steps.
+    """
+    full_scans, automatic_indexes, temp_b_trees, problem_tables = [], [], [], []
+
+    for detail in plan:
+        if _TEMP_B_TREE_STEP.match(detail):
+            temp_b_trees.append(detail)
+            continue
+
+        scan = _SCAN_STEP.match(detail)
+        automatic_index = _AUTOMATIC_INDEX_STEP.match(detail)
+        match = scan or automatic_index
+        if match is None:
+            continue
+
+        alias = (match.group(2) or match.group(1)).lower()
+        table = aliases.get(alias, alias if alias in tables else None)
+        if table is None:
+            continue
+
+        if automatic_index is not None:
+            automatic_indexes.append(detail)
+        elif " USING " not in detail:
+            full_scans.append(detail)
+        else:
+            continue
+        problem_tables.append((alias, table))
+
+    return full_scans, automatic_indexes, temp_b_trees, problem_tables
+
+
+def _get_candidate_indexes(query, alias, table, tables):
+    """Derives the candidate indexes for a table of a query.
+
+    The columns compared by equality come first, followed by the columns the query groups and orders by, followed by
+    all other columns of the table used by the query, so that the widest candidate covers the query.
+
+    Args:
+        query (str): The query.
+        alias (str): Lower case alias of the table within the query.
+        table (str): Lower case name of the table.
+        tables (dict): Tables of the database, as returned by _get_table_columns.
+
+    Returns:
+        list: Returns the candidates, each a tuple of column names, ordered from the widest to the narrowest.
+    """
+    qualifier = rf"\b{alias}\." if alias != table else r"(?<![\w.])"
+
+    def references(pattern):
+        return [column for column in tables[table][1]
+                if re.search(pattern.format(column=rf"{qualifier}{column}\b"), query, flags=re.IGNORECASE)]
+
+    used = references("{column}")
+    equal = references(r"{column}\s*(?:=|\bIN\b|\bIS\b)") + references(r"=\s*{column}")
+    equal = [column for column in used if column in equal]
+
+    ordered = []
+    for clause in _ORDERING_CLAUSE.findall(query):
+        ordered += [column for column in used if column not in equal and column not in ordered and
+                    re.search(rf"{qualifier}{column}\b", clause, flags=re.IGNORECASE)]
+
+    if not equal and not ordered:
+        return []
+
+    others = [column for column in used if column not in equal and column not in ordered]
+    candidates = []
+    for candidate in (equal + ordered + others, equal + ordered, equal):
+        if candidate and tuple(candidate) not in candidates:
+            candidates.append(tuple(candidate))
+    return candidates
+
+
+def _index_statement(table, columns):
+    """Returns the CREATE INDEX statement of a suggested index."""
+    return f"CREATE INDEX IF NOT EXISTS {table}_{'_'.join(columns)} ON {table} ({', '.join(columns)})"
+
+
+def diagnose_query(connection, function_name, query, runtime_seconds, parameters=()):
+    """Diagnoses a single query and searches for the indexes that improve its plan.
+
+    The candidate indexes are created within a transaction, which is rolled back before returning.
+
+    Args:
+        connection (sqlite3.Connection): Writable connection in autocommit mode.
+        function_name (str): Name of the query function that executed the query.
+        query (str): The query.
+        runtime_seconds (float): Runtime of the query function.
+        parameters (tuple): Parameters bound to the placeholders of the query.
+
+    Returns:
+        QueryDiagnosis: Returns the diagnosis of the query.
+    """
+    tables = _get_table_columns(connection)
+    aliases = _get_aliases(query, tables)
+
+    plan = explain_query_plan(connection, query, parameters)
+    full_scans, automatic_indexes, temp_b_trees, problem_tables = _classify_plan(plan, tables, aliases)
+    diagnosis = QueryDiagnosis(function_name, query, runtime_seconds, plan, full_scans, automatic_indexes,
+                               temp_b_trees, parameters=parameters)
+
+    problems = diagnosis.problems
+    connection.execute("BEGIN")
+    try:
+        for alias, table in problem_tables:
+            best = None
+            for columns in _get_candidate_indexes(query, alias, table, tables):
+                statement = _index_statement(tables[table][0], columns)
+                connection.execute("SAVEPOINT candidate")
+                connection.execute(statement)
+                candidate_problems = sum(len(steps) for steps in _classify_plan(
+                    explain_query_plan(connection, query, parameters), tables, aliases)[:3])
+                connection.execute("ROLLBACK TO candidate")
+                connection.execute("RELEASE candidate")
+
+                if candidate_problems < problems and (best is None or candidate_problems <= best[0]):
+                    best = (candidate_problems, statement)
+
+            if best is not None:
+                problems = best[0]
+                connection.execute(best[1])
+                diagnosis.suggested_indexes.append(best[1])
+    finally:
+        connection.execute("ROLLBACK")
+
+    return diagnosis
+
+
+def _run_function(function, database_file_path):
+    """Runs a query function while recording its queries, bypassing previously cached results.
+
+    Returns:
+        tuple: Returns a tuple of the runtime in seconds and the recorded queries, as tuples of (query, parameters).
+    """
+    clear_query_result_cache(database_file_path)
+    with record_queries() as queries:
+        start = time.perf_counter()
+        function(database_file_path)
+        runtime_seconds = time.perf_counter() - start
+    return runtime_seconds, [(query, parameters) for query, parameters, _ in queries]
+
+
+def diagnose_queries(database_file_path, functions=QUERY_FUNCTIONS, create_indexes=False):
+    """Diagnoses all queries executed by the query functions.
+
+    Args:
+        database_file_path (str): String containing the path where the SQLite database file can be found.
+        functions (iterable): Query functions, each called with the path to the database file.
+        create_indexes (bool): If True, the suggested indexes are created, the statistics of the query planner are
+            updated, and the functions are measured again.
+
+    Returns:
+        list: Returns a list of QueryDiagnosis, one per executed query.
+    """
+    diagnoses = []
+    connection = dbapi.connect(database_file_path, isolation_level=None)
+    try:
+        for function in functions:
+            runtime_seconds, queries = _run_function(function, database_file_path)
+            for query, parameters in queries:
+                diagnoses.append(diagnose_query(connection, function.__name__, query, runtime_seconds, parameters))
+
+        if create_indexes:
+            statements = []
+            for diagnosis in diagnoses:
+                statements += [statement for statement in diagnosis.suggested_indexes if statement not in statements]
+            for statement in statements:
+                connection.execute(statement)
+            connection.execute("ANALYZE")
+    finally:
+        connection.close()
+
+    if create_indexes:
+        runtimes = {function.__name__: _run_function(function, database_file_path)[0] for function in functions
+                    if any(diagnosis.function == function.__name__ for diagnosis in diagnoses)}
+        for diagnosis in diagnoses:
+            diagnosis.runtime_seconds_after = runtimes[diagnosis.function]
+
+    return diagnoses
+
+
+def format_report(diagnoses, output_format="table"):
+    """Formats the diagnoses as JSON or as a human readable table.
+
+    Args:
+        diagnoses (list): List of QueryDiagnosis.
+        output_format (str): Either "json" or "table".
+
+    Returns:
+        str: Returns the formatted report.
+    """
+    if output_format == "json":
+        return json.dumps([dict(asdict(diagnosis), problems=diagnosis.problems) for diagnosis in diagnoses],
+                          indent=2)
+
+    lines = [f"{'function':<40} {'runtime':>12} {'after':>12} {'scans':>6} {'auto':>5} {'temp':>5}"]
+    for diagnosis in diagnoses:
+        after = "-" if diagnosis.runtime_seconds_after is None else f"{diagnosis.runtime_seconds_after * 1000:.2f} ms"
+        lines.append(f"{diagnosis.function:<40} {diagnosis.runtime_seconds * 1000:>9.2f} ms {after:>12} "
+                     f"{len(diagnosis.full_scans):>6} {len(diagnosis.automatic_indexes):>5} "
+                     f"{len(diagnosis.temp_b_trees):>5}")
+        for detail in diagnosis.full_scans + diagnosis.automatic_indexes + diagnosis.temp_b_trees:
+            lines.append(f"    {detail}")
+        for statement in diagnosis.suggested_indexes:
+            lines.append(f"    suggested: {statement}")
+    return "\n".join(lines)
+
+
+# this part is executed if the module is called directly
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(prog="python -m coding_challenge.query_diagnostics",
+                                     description="Inspects the query plans of the Section 4 queries.")
+    parser.add_argument("database_file_path", help="path to the database file")
+    parser.add_argument("--format", choices=("table", "json"), default="table", help="format of the report")
+    parser.add_argument("--create-indexes", action="store_true", help="create the suggested indexes")
+    options = parser.parse_args()
+
+    print(format_report(diagnose_queries(options.database_file_path, create_indexes=options.create_indexes),
+                        options.format))
@@ -0,0 +1,375 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2019 CompuCom, All Rights Reserved
+# Created by Luis Fuentes
+
+"""This module exports the database into a columnar snapshot and loads the entities back from it.
+
+A snapshot is a directory containing one file per column and a manifest.json describing them. Integer columns are
+stored as raw machine integers. String columns are dictionary-encoded: every distinct string is stored once in a
+UTF-8 dictionary, the rows only store the 32 bit code of their string. A code of -1 represents NULL.
+
+The **SnapshotLoader** memory-maps these files, so that integer columns are read without copying them and string
+columns without parsing SQLite pages. It offers the interface of the DataLoader and can be passed wherever a
+DataLoader is expected, e.g. to EntityIndex.from_data_loader:
+
+    export_snapshot(database_file_path, snapshot_path)
+    entity_index = EntityIndex.from_data_loader(SnapshotLoader(snapshot_path))
+
+A snapshot is not updated with the database, it has to be exported again after the database changed.
+"""
+
+import argparse
+import json
+import mmap
+import os
+import shutil
+import sys
+import tempfile
+from array import array
+
+from coding_challenge.application_logic import DataLoader, DEFAULT_BATCH_SIZE, ModelRevisionTable, ObjectTable, \
+    _TABLE_COLUMNS, _validate_columns
+from coding_challenge.connection_pool import get_connection_pool
+
+
+SNAPSHOT_FORMAT = 1
+
+MANIFEST_FILE_NAME = "manifest.json"
+
+# typecodes of the integer columns, all other columns are dictionary-encoded strings
+_INTEGER_COLUMNS = {
+    ("Objects", "marked_for_deletion"): "b",
+    ("ModelRevisions", "revision_number"): "q",
+    ("ModelRevisions", "creation_date"): "q",
+}
+
+_CODE_TYPECODE = "i"
+_OFFSET_TYPECODE = "q"
+
+
+def _write_array(directory, file_name, values):
+    """Writes an array into a file of the snapshot.
+
+    Args:
+        directory (str): Directory of the snapshot.
+        file_name (str): Name of the file.
+        values (array.array): The values to be written.
+
+    Returns:
+        str: Returns the name of the file.
+    """
+    with open(os.path.join(directory, file_name), "wb") as snapshot_file:
+        values.tofile(snapshot_file)
+    return file_name
+
+
+def _export_table(database, directory, table, batch_size):
+    """Writes the columns of a table into the snapshot directory.
+
+    Args:
+        database (sqlite3.Connection): Connection to the database.
+        directory (str): Directory of the snapshot.
+        table (str): Name of the table.
+        batch_size (int): Number of rows fetched from the database at once.
+
+    Returns:
+        dict: Returns the manifest entry of the table.
+
+    Raises:
+        ValueError: In case an integer column contains NULL.
+    """
+    columns = _TABLE_COLUMNS[table]
+    values = [array(_INTEGER_COLUMNS.get((table, column), _CODE_TYPECODE)) for column in columns]
+    dictionaries = [None if (table, column) in _INTEGER_COLUMNS else {} for column in columns]
+
+    cursor = database.cursor()
+    try:
+        cursor.execute(f"SELECT {', '.join(columns)} FROM {table}")
+        rows = cursor.fetchmany(batch_size)
+        while rows:
+            for row in rows:
+                for column_values, dictionary, value in zip(values, dictionaries, row):
+                    if dictionary is not None:
+                        value = -1 if value is None else dictionary.setdefault(value, len(dictionary))
+                    column_values.append(value)
+            rows = cursor.fetchmany(batch_size)
+    except TypeError:
+        raise ValueError(f"The integer columns of the table {table} must not contain NULL.")
+    finally:
+        cursor.close()
+
+    manifest = {"rows": len(values[0]), "columns": {}}
+    for column, column_values, dictionary in zip(columns, values, dictionaries):
+        entry = {"typecode": column_values.typecode,
+                 "values": _write_array(directory, f"{table}.{column}.values", column_values)}
+
+        if dictionary is not None:
+            encoded = [string.encode("utf-8") for string in dictionary]
+            offsets = array(_OFFSET_TYPECODE, [0])
+            for string in encoded:
+                offsets.append(offsets[-1] + len(string))
+            with open(os.path.join(directory, f"{table}.{column}.dictionary"), "wb") as dictionary_file:
+                dictionary_file.write(b"".join(encoded))
+            entry["dictionary"] = f"{table}.{column}.dictionary"
+            entry["offsets"] = _write_array(directory, f"{table}.{column}.offsets", offsets)
+
+        manifest["columns"][column] = entry
+
+    return manifest
+
+
+def export_snapshot(database_file_path, snapshot_path, batch_size=DEFAULT_BATCH_SIZE):
+    """Exports all tables of the database into a columnar snapshot, replacing an existing one.
+
+    The snapshot is written into a temporary directory first, so that readers never see a partial snapshot. An
+    existing snapshot is renamed aside and only removed after the new one took its place, in case the swap fails it
+    is restored. Between both renames, the snapshot path is missing for a moment.
+
+    Args:
+        database_file_path (str): String containing the path where the SQLite database file can be found.
+        snapshot_path (str): Path of the snapshot directory.
+        batch_size (int): Number of rows fetched from the database at once.
+
+    Returns:
+        dict: Returns the manifest of the snapshot.
+    """
+    snapshot_path = os.path.abspath(snapshot_path)
+    directory = tempfile.mkdtemp(prefix=".snapshot-", dir=os.path.dirname(snapshot_path))
+    try:
+        manifest = {"format": SNAPSHOT_FORMAT, "byteorder": sys.byteorder, "tables": {}}
+        with get_connection_pool(database_file_path).connection() as database:
+            for table in _TABLE_COLUMNS:
+                manifest["tables"][table] = _export_table(database, directory, table, batch_size)
+
+        with open(os.path.join(directory, MANIFEST_FILE_NAME), "w") as manifest_file:
+            json.dump(manifest, manifest_file, indent=2)
+
+        retired_directory = None
+        if os.path.isdir(snapshot_path):
+            retired_directory = f"{directory}.retired"
+            os.replace(snapshot_path, retired_directory)
+
+        try:
+            os.replace(directory, snapshot_path)
+        except BaseException:
+            if retired_directory is not None:
+                os.replace(retired_directory, snapshot_path)
+            raise
+    except BaseException:
+        shutil.rmtree(directory, ignore_errors=True)
+        raise
+
+    if retired_directory is not None:
+        shutil.rmtree(retired_directory, ignore_errors=True)
+
+    return manifest
+
+
+class _Column:
+    """Memory-mapped column of a snapshot.
+
+    Attributes:
+        values (memoryview): The integers of the column, or the codes of a dictionary-encoded column.
+        dictionary (list): The decoded strings of a dictionary-encoded column, followed by None, so that the code -1
+            is decoded into None. None in case the column is an integer column.
+    """
+
+    def __init__(self, directory, entry):
+        """Initializes the _Column.
+
+        Args:
+            directory (str): Directory of the snapshot.
+            entry (dict): Manifest entry of the column.
+        """
+        super(_Column, self).__init__()
+
+        self.values = self._map(os.path.join(directory, entry["values"]), entry["typecode"])
+        self.dictionary = None
+        self._codes_by_value = None
+
+        if "dictionary" in entry:
+            offsets = self._map(os.path.join(directory, entry["offsets"]), _OFFSET_TYPECODE)
+            strings = self._map(os.path.join(directory, entry["dictionary"]), "B")
+            self.dictionary = [str(strings[start:end], "utf-8") for start, end in zip(offsets, offsets[1:])]
+            self.dictionary.append(None)
+
+    @staticmethod
+    def _map(file_path, typecode):
+        """Memory-maps a file of the snapshot as a read-only sequence of machine values.
+
+        Args:
+            file_path (str): Path of the file.
+            typecode (str): Typecode of the values stored in the file.
+
+        Returns:
+            memoryview: Returns the values of the file.
+        """
+        with open(file_path, "rb") as snapshot_file:
+            if os.fstat(snapshot_file.fileno()).st_size == 0:
+                return memoryview(b"").cast(typecode)
+            return memoryview(mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)).cast(typecode)
+
+    def decode(self, positions=None):
+        """Returns an iterator over the values of the column.
+
+        Args:
+            positions (iterable): The positions of the rows to be returned. All rows are returned in case this is
+                None.
+
+        Returns:
+            iterator: Returns an iterator over the values of the selected rows.
+        """
+        values = self.values if positions is None else map(self.values.__getitem__, positions)
+        return values if self.dictionary is None else map(self.dictionary.__getitem__, values)
+
+    def matches(self, value):
+        """Returns the predicate selecting the rows whose value matches a filter value, see _compile_select.
+
+        Args:
+            value (object): A single value, a collection of values or None.
+
+        Returns:
+            callable: Returns a predicate accepting the stored value of a row.
+        """
+        if value is None:
+            return (-1).__eq__ if self.dictionary is not None else (lambda stored: False)
+
+        accepted = value if isinstance(value, (list, tuple, set, frozenset)) else (value,)
+        accepted = [item for item in accepted if item is not None]
+        if self.dictionary is not None:
+            if self._codes_by_value is None:
+                self._codes_by_value = {string: code for code, string in enumerate(self.dictionary[:-1])}
+            accepted = [self._codes_by_value[item] for item in accepted if item in self._codes_by_value]
+
+        return frozenset(accepted).__contains__
+
+
+class SnapshotLoader(DataLoader):
+    """The SnapshotLoader loads all entities from a columnar snapshot instead of the database.
+
+    All methods of the DataLoader are supported, including the filter and projection specification. The tables
+    returned by get_model_revision_table and get_object_table share the memory-mapped integer columns of the snapshot
+    and must not be modified. As a snapshot never changes, no rows are cached.
+
+    Attributes:
+        snapshot_path (str): Path of the snapshot directory.
+        manifest (dict): The manifest of the snapshot.
+    """
+
+    def __init__(self, snapshot_path):
+        """Initializes the SnapshotLoader.
+
+        Args:
+            snapshot_path (str): Path of the snapshot directory.
+
+        Raises:
+            ValueError: In case the snapshot was written in another format or byte order.
+        """
+        super(SnapshotLoader, self).__init__(snapshot_path, cache=None)
+
+        self.snapshot_path = snapshot_path
+        with open(os.path.join(snapshot_path, MANIFEST_FILE_NAME)) as manifest_file:
+            self.manifest = json.load(manifest_file)
+
+        if self.manifest.get("format") != SNAPSHOT_FORMAT or self.manifest.get("byteorder") != sys.byteorder:
+            raise ValueError(f"The snapshot {snapshot_path} was not written by this version or on this platform.")
+
+        self._columns = {}
+
+    def _column(self, table, column):
+        """Returns a column of the snapshot, mapping its files on first use.
+
+        Args:
+            table (str): Name of the table.
+            column (str): Name of the column.
+
+        Returns:
+            _Column: Returns the mapped column.
+        """
+        key = (table, column)
+        if key not in self._columns:
+            self._columns[key] = _Column(self.snapshot_path, self.manifest["tables"][table]["columns"][column])
+        return self._columns[key]
+
+    def _select(self, table, where):
+        """Returns the positions of the rows of a table matching a filter specification.
+
+        Args:
+            table (str): Name of the table.
+            where (dict): Maps column names onto the values the rows are filtered by.
+
+        Returns:
+            iterable: Returns the positions of the selected rows in ascending order, or None in case all rows are
+                selected.
+        """
+        if not where:
+            return None
+
+        positions = range(self.manifest["tables"][table]["rows"])
+        for column, value in where.items():
+            values = self._column(table, column).values
+            matches = self._column(table, column).matches(value)
+            positions = [position for position in positions if matches(values[position])]
+
+        return positions
+
+    def _iter_rows(self, table, where, columns, batch_size):
+        """Streams the rows of a table from the snapshot, filtered and projected by the given specification.
+
+        Args:
+            table (str): Name of the table the rows are loaded from.
+            where (dict): Maps column names onto the values the rows are filtered by.
+            columns (list): Names of the columns to be loaded. All columns are loaded in case this is None.
+            batch_size (int): Not used, as the rows are decoded one at a time.
+
+        Returns:
+            iterator: Returns an iterator over the selected rows, containing the values of the selected columns.
+        """
+        columns = _TABLE_COLUMNS[table] if columns is None else tuple(columns)
+        _validate_columns(table, list(columns) + list(where or {}))
+
+        positions = self._select(table, where)
+        return zip(*(self._column(table, column).decode(positions) for column in columns))
+
+    def _load_table(self, table_class, table, where, batch_size):
+        """Loads a table into a columnar container, sharing the integer columns of the snapshot.
+
+        Args:
+            table_class (type): Class of the columnar container.
+            table (str): Name of the table.
+            where (dict): Filter specification, see DataLoader.
+            batch_size (int): Number of rows decoded at once.
+
+        Returns:
+            _ColumnarTable: Returns the container holding the selected rows.
+        """
+        if where:
+            return table_class.from_rows(self._iter_rows(table, where, None, batch_size))
+
+        return table_class.from_columns([
+            column.values if column.dictionary is None else list(column.decode())
+            for column in (self._column(table, name) for name in _TABLE_COLUMNS[table])])
+
+    def get_model_revision_table(self, where=None, batch_size=DEFAULT_BATCH_SIZE):
+        """Loads the ModelRevisions into a columnar container, see DataLoader.get_model_revision_table."""
+        return self._load_table(ModelRevisionTable, "ModelRevisions", where, batch_size)
+
+    def get_object_table(self, where=None, batch_size=DEFAULT_BATCH_SIZE):
+        """Loads the objects into a columnar container, see DataLoader.get_object_table."""
+        return self._load_table(ObjectTable, "Objects", where, batch_size)
+
+
+# this part is executed if the module is called directly
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(prog="python -m coding_challenge.snapshot",
+                                     description="Exports the database into a columnar snapshot.")
+    parser.add_argument("database_file_path", help="path to the database file")
+    parser.add_argument("snapshot_path", help="path of the snapshot directory")
+    options = parser.parse_args()
+
+    exported = export_snapshot(options.database_file_path, options.snapshot_path)
+    for table_name, table_manifest in exported["tables"].items():
+        print(f"{table_name}: {table_manifest['rows']} rows")
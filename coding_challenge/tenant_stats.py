@@ -0,0 +1,336 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2019 CompuCom, All Rights Reserved
+# Created by Luis Fuentes
+
+"""This module maintains the TenantStats table, a materialized summary of the per-tenant aggregates of Section 4.
+
+For every tenant referenced by an object, TenantStats stores
+
+  * active_users, the number of users not marked for deletion,
+  * models, the number of models including the deleted ones,
+  * undeleted_revisions, the number of revisions not marked for deletion, and
+  * latest_edit and latest_model, the creation date and the model of the latest revision of a model that is not
+    marked for deletion.
+
+The table is built once by **create_tenant_stats** and kept up to date by triggers on Objects, Models and
+ModelRevisions, so that inserting, deleting or flagging rows adjusts the affected tenants only. Writers that bypass
+the triggers, e.g. by temporarily dropping them for a bulk load, can apply their changes by **refresh_tenant_stats**.
+As soon as the table exists, the Section 4 functions answer from it.
+"""
+
+import os
+import sqlite3.dbapi2 as dbapi
+import threading
+from dataclasses import dataclass
+
+from coding_challenge.caching import get_database_version
+
+
+TENANT_STATS_TABLE = "TenantStats"
+
+_DETECTED = {}
+_DETECTED_LOCK = threading.Lock()
+
+# the latest revision of an undeleted model of the tenant stored in the row of TenantStats that is updated
+_LATEST_EDIT = """
+    SELECT   revisions.creation_date, revisions.model
+    FROM     Objects objects, Models models, ModelRevisions revisions
+    WHERE        objects.tenant = TenantStats.tenant
+             AND objects.object_type = 'model'
+             AND objects.marked_for_deletion = 0
+             AND models.id = objects.id
+             AND revisions.model = models.id
+    ORDER BY revisions.creation_date DESC
+    LIMIT    1
+"""
+
+
+def _contribution(row, sign):
+    """Returns the SET clause adding or subtracting the contribution of an Objects row to the counters.
+
+    Args:
+        row (str): Either "NEW" or "OLD".
+        sign (str): Either "+" or "-".
+
+    Returns:
+        str: Returns the SET clause.
+    """
+    return f"""
+        active_users = active_users {sign} ({row}.object_type = 'user' AND {row}.marked_for_deletion = 0),
+        models = models {sign} ({row}.object_type = 'model'),
+        undeleted_revisions = undeleted_revisions {sign}
+                              ({row}.object_type = 'revision' AND {row}.marked_for_deletion = 0)
+    """
+
+
+def _recompute_latest_edit(tenant, condition=""):
+    """Returns the statement recomputing the latest edit of a tenant.
+
+    Args:
+        tenant (str): SQL expression evaluating to the id of the tenant.
+        condition (str): Additional condition the recomputation depends on, starting with AND.
+
+    Returns:
+        str: Returns the UPDATE statement.
+    """
+    return f"""
+        UPDATE {TENANT_STATS_TABLE} SET (latest_edit, latest_model) = ({_LATEST_EDIT})
+        WHERE tenant = {tenant} {condition};"""
+
+
+_SCHEMA = (
+    f"""
+    CREATE TABLE {TENANT_STATS_TABLE} (
+        tenant              VARCHAR(32) PRIMARY KEY,
+        active_users        INTEGER     NOT NULL DEFAULT 0,
+        models              INTEGER     NOT NULL DEFAULT 0,
+        undeleted_revisions INTEGER     NOT NULL DEFAULT 0,
+        latest_edit         INTEGER,
+        latest_model        VARCHAR(32)
+    )""",
+    f"CREATE INDEX {TENANT_STATS_TABLE}_active_users ON {TENANT_STATS_TABLE} (active_users DESC, tenant)",
+    f"CREATE INDEX {TENANT_STATS_TABLE}_undeleted_revisions ON {TENANT_STATS_TABLE} "
+    f"(undeleted_revisions DESC, tenant)",
+    f"""
+    CREATE TRIGGER {TENANT_STATS_TABLE}_object_insert AFTER INSERT ON Objects
+    BEGIN
+        INSERT OR IGNORE INTO {TENANT_STATS_TABLE} (tenant) VALUES (NEW.tenant);
+        UPDATE {TENANT_STATS_TABLE} SET {_contribution("NEW", "+")} WHERE tenant = NEW.tenant;
+        {_recompute_latest_edit("NEW.tenant", "AND NEW.object_type = 'model' AND "
+                                              "EXISTS (SELECT 1 FROM ModelRevisions WHERE model = NEW.id)")}
+    END""",
+    f"""
+    CREATE TRIGGER {TENANT_STATS_TABLE}_object_delete AFTER DELETE ON Objects
+    BEGIN
+        UPDATE {TENANT_STATS_TABLE} SET {_contribution("OLD", "-")} WHERE tenant = OLD.tenant;
+        {_recompute_latest_edit("OLD.tenant", "AND OLD.object_type = 'model' AND latest_model = OLD.id")}
+    END""",
+    f"""
+    CREATE TRIGGER {TENANT_STATS_TABLE}_object_update
+    AFTER UPDATE OF object_type, tenant, marked_for_deletion ON Objects
+    BEGIN
+        UPDATE {TENANT_STATS_TABLE} SET {_contribution("OLD", "-")} WHERE tenant = OLD.tenant;
+        INSERT OR IGNORE INTO {TENANT_STATS_TABLE} (tenant) VALUES (NEW.tenant);
+        UPDATE {TENANT_STATS_TABLE} SET {_contribution("NEW", "+")} WHERE tenant = NEW.tenant;
+        {_recompute_latest_edit("OLD.tenant", "AND 'model' IN (OLD.object_type, NEW.object_type)")}
+        {_recompute_latest_edit("NEW.tenant", "AND 'model' IN (OLD.object_type, NEW.object_type) "
+                                              "AND NEW.tenant IS NOT OLD.tenant")}
+    END""",
+    f"""
+    CREATE TRIGGER {TENANT_STATS_TABLE}_revision_insert AFTER INSERT ON ModelRevisions
+    BEGIN
+        UPDATE {TENANT_STATS_TABLE} SET latest_edit = NEW.creation_date, latest_model = NEW.model
+        WHERE      tenant = (SELECT tenant FROM Objects
+                             WHERE id = NEW.model AND object_type = 'model' AND marked_for_deletion = 0)
+               AND EXISTS (SELECT 1 FROM Models WHERE id = NEW.model)
+               AND (latest_edit IS NULL OR NEW.creation_date > latest_edit);
+    END""",
+    f"""
+    CREATE TRIGGER {TENANT_STATS_TABLE}_revision_delete AFTER DELETE ON ModelRevisions
+    BEGIN
+        {_recompute_latest_edit("(SELECT tenant FROM Objects WHERE id = OLD.model)")}
+    END""",
+    f"""
+    CREATE TRIGGER {TENANT_STATS_TABLE}_revision_update AFTER UPDATE OF model, creation_date ON ModelRevisions
+    BEGIN
+        {_recompute_latest_edit("(SELECT tenant FROM Objects WHERE id = OLD.model)")}
+        {_recompute_latest_edit("(SELECT tenant FROM Objects WHERE id = NEW.model)")}
+    END""",
+    f"""
+    CREATE TRIGGER {TENANT_STATS_TABLE}_model_insert AFTER INSERT ON Models
+    BEGIN
+        {_recompute_latest_edit("(SELECT tenant FROM Objects WHERE id = NEW.id)")}
+    END""",
+    f"""
+    CREATE TRIGGER {TENANT_STATS_TABLE}_model_delete AFTER DELETE ON Models
+    BEGIN
+        {_recompute_latest_edit("(SELECT tenant FROM Objects WHERE id = OLD.id)")}
+    END""",
+    f"""
+    CREATE TRIGGER {TENANT_STATS_TABLE}_model_update AFTER UPDATE OF id ON Models
+    BEGIN
+        {_recompute_latest_edit("(SELECT tenant FROM Objects WHERE id = OLD.id)")}
+        {_recompute_latest_edit("(SELECT tenant FROM Objects WHERE id = NEW.id)")}
+    END""",
+)
+
+_TRIGGERS = ("object_insert", "object_delete", "object_update", "model_insert", "model_delete", "model_update",
+             "revision_insert", "revision_delete", "revision_update")
+
+_POPULATE = f"""
+    INSERT INTO {TENANT_STATS_TABLE} (tenant, active_users, models, undeleted_revisions)
+    SELECT   tenant,
+             SUM(object_type = 'user' AND marked_for_deletion = 0),
+             SUM(object_type = 'model'),
+             SUM(object_type = 'revision' AND marked_for_deletion = 0)
+    FROM     Objects
+    WHERE    {{condition}}
+    GROUP BY tenant
+"""
+
+
+@dataclass
+class TenantStatistics:
+    """Row of the TenantStats table.
+
+    Attributes:
+        tenant (str): Id of the tenant.
+        active_users (int): Number of users not marked for deletion.
+        models (int): Number of models, including the ones marked for deletion.
+        undeleted_revisions (int): Number of revisions not marked for deletion.
+        latest_edit (int): Creation date of the latest revision of a model not marked for deletion.
+        latest_model (str): Id of the model the latest revision belongs to.
+    """
+    tenant: str
+    active_users: int
+    models: int
+    undeleted_revisions: int
+    latest_edit: int
+    latest_model: str
+
+
+def _populate(cursor, tenant_ids=None):
+    """Computes the rows of the given tenants from the raw tables.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor the statements are executed by, inside of a transaction.
+        tenant_ids (list): Tenants to be computed, all tenants are computed in case this is None.
+    """
+    if tenant_ids is None:
+        cursor.execute(_POPULATE.format(condition="1 = 1"))
+        cursor.execute(f"UPDATE {TENANT_STATS_TABLE} SET (latest_edit, latest_model) = ({_LATEST_EDIT})")
+        return
+
+    for tenant_id in tenant_ids:
+        cursor.execute(f"DELETE FROM {TENANT_STATS_TABLE} WHERE tenant = ?", (tenant_id,))
+        cursor.execute(_POPULATE.format(condition="tenant = ?"), (tenant_id,))
+        cursor.execute(_recompute_latest_edit("?"), (tenant_id,))
+
+
+def _drop(cursor):
+    """Drops the TenantStats table and its triggers, in case they exist.
+
+    The triggers are defined on Objects, Models and ModelRevisions and therefore not dropped together with the table.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor the statements are executed by, inside of a transaction.
+    """
+    for trigger in _TRIGGERS:
+        cursor.execute(f"DROP TRIGGER IF EXISTS {TENANT_STATS_TABLE}_{trigger}")
+    cursor.execute(f"DROP TABLE IF EXISTS {TENANT_STATS_TABLE}")
+
+
+def create_tenant_stats(database_file_path):
+    """Creates the TenantStats table together with its triggers, replacing existing ones.
+
+    Args:
+        database_file_path (str): String containing the path where the SQLite database file can be found.
+    """
+    database = dbapi.connect(database_file_path, isolation_level=None)
+    cursor = database.cursor()
+    cursor.execute("BEGIN")
+    try:
+        _drop(cursor)
+        for statement in _SCHEMA:
+            cursor.execute(statement)
+        _populate(cursor)
+        cursor.execute("COMMIT")
+    except BaseException:
+        cursor.execute("ROLLBACK")
+        raise
+    finally:
+        cursor.close()
+        database.close()
+
+
+def drop_tenant_stats(database_file_path):
+    """Drops the TenantStats table together with its triggers.
+
+    Args:
+        database_file_path (str): String containing the path where the SQLite database file can be found.
+    """
+    database = dbapi.connect(database_file_path, isolation_level=None)
+    cursor = database.cursor()
+    cursor.execute("BEGIN")
+    try:
+        _drop(cursor)
+        cursor.execute("COMMIT")
+    except BaseException:
+        cursor.execute("ROLLBACK")
+        raise
+    finally:
+        cursor.close()
+        database.close()
+
+
+def refresh_tenant_stats(database_file_path, tenant_ids=None):
+    """Recomputes the rows of the given tenants, applying changes made while the triggers were missing.
+
+    Args:
+        database_file_path (str): String containing the path where the SQLite database file can be found.
+        tenant_ids (list): Tenants to be recomputed, all tenants are recomputed in case this is None.
+    """
+    database = dbapi.connect(database_file_path, isolation_level=None)
+    cursor = database.cursor()
+    cursor.execute("BEGIN")
+    try:
+        if tenant_ids is None:
+            cursor.execute(f"DELETE FROM {TENANT_STATS_TABLE}")
+        _populate(cursor, tenant_ids)
+        cursor.execute("COMMIT")
+    except BaseException:
+        cursor.execute("ROLLBACK")
+        raise
+    finally:
+        cursor.close()
+        database.close()
+
+
+def has_tenant_stats(database_file_path):
+    """Checks if the database contains the TenantStats table.
+
+    The result is cached until the database changes.
+
+    Args:
+        database_file_path (str): String containing the path where the SQLite database file can be found.
+
+    Returns:
+        bool: True, in case the table exists.
+    """
+    key = os.path.abspath(database_file_path)
+    version = get_database_version(database_file_path)
+    if version is None:
+        return False
+
+    with _DETECTED_LOCK:
+        detected = _DETECTED.get(key)
+    if detected is not None and detected[0] == version:
+        return detected[1]
+
+    database = dbapi.connect(database_file_path)
+    exists = database.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                              (TENANT_STATS_TABLE,)).fetchone() is not None
+    database.close()
+
+    with _DETECTED_LOCK:
+        _DETECTED[key] = (version, exists)
+    return exists
+
+
+def get_tenant_stats(database_file_path, tenant_id):
+    """Returns the statistics of a single tenant.
+
+    Args:
+        database_file_path (str): String containing the path where the SQLite database file can be found.
+        tenant_id (str): Id of the tenant.
+
+    Returns:
+        TenantStatistics: Returns the statistics of the tenant, or None in case no object belongs to the tenant.
+    """
+    database = dbapi.connect(database_file_path)
+    row = database.execute(f"SELECT tenant, active_users, models, undeleted_revisions, latest_edit, latest_model "
+                           f"FROM {TENANT_STATS_TABLE} WHERE tenant = ?", (tenant_id,)).fetchone()
+    database.close()
+    return TenantStatistics(*row) if row is not None else None
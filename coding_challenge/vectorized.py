@@ -0,0 +1,251 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2019 CompuCom, All Rights Reserved
+# Created by Luis Fuentes
+
+"""This module contains the optional NumPy engine of the application logic.
+
+The **VectorizedIndex** answers the same questions as the EntityIndex, but keeps the Objects and ModelRevisions in
+NumPy arrays. All ids are dictionary-encoded into integer codes, so that grouping and counting are done by
+np.bincount, maximum searches by ufunc.at, and the chronological order of the revisions by a single np.lexsort.
+
+NumPy is not a requirement of the coding challenge. In case it cannot be imported, NUMPY_AVAILABLE is False and the
+application logic falls back to the EntityIndex.
+"""
+
+import os
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from coding_challenge.application_logic import DataLoader, ModelRevision, UserRecord, _ENTITY_INDEX_CACHE
+from coding_challenge.caching import get_database_version
+from coding_challenge.instrumentation import phase
+
+
+NUMPY_AVAILABLE = np is not None
+
+
+def _encode(values, codes):
+    """Dictionary-encodes values into integer codes, assigning new codes to unknown values.
+
+    Args:
+        values (iterable): The values to be encoded.
+        codes (dict): Maps the known values onto their codes, extended by the unknown values.
+
+    Returns:
+        numpy.ndarray: Returns the codes of the values.
+    """
+    return np.fromiter((codes.setdefault(value, len(codes)) for value in values), dtype=np.int64)
+
+
+class VectorizedIndex:
+    """The VectorizedIndex answers the application logic questions from dictionary-encoded NumPy arrays.
+
+    The interface equals the one of the EntityIndex, and so do all answers, including the order of the most active
+    users and the order of revisions with the same creation date.
+
+    Attributes:
+        ids (list): Maps the codes onto the ids, tenant ids and object types they encode.
+        tenant_ids (list): Ids of all tenants of the application.
+    """
+
+    def __init__(self, object_table, model_revision_table, models, users):
+        """Initializes the VectorizedIndex.
+
+        Args:
+            object_table (ObjectTable): All objects of the application.
+            model_revision_table (ModelRevisionTable): All ModelRevisions of the application.
+            models (iterable): All Model instances of the application.
+            users (iterable): All User instances of the application.
+        """
+        super(VectorizedIndex, self).__init__()
+
+        self._codes = {}
+        object_ids = _encode(object_table.column("id"), self._codes)
+        object_tenants = _encode(object_table.column("tenant"), self._codes)
+        object_types = _encode(object_table.column("object_type"), self._codes)
+        object_deleted = np.frombuffer(object_table.column("marked_for_deletion"), dtype=np.int8) != 0
+
+        self._revision_ids = model_revision_table.column("id")
+        self._revision_models = model_revision_table.column("model")
+        self._revision_authors = model_revision_table.column("author")
+        self._revision_numbers = model_revision_table.column("revision_number")
+        self._creation_dates = model_revision_table.column("creation_date")
+        revision_ids = _encode(self._revision_ids, self._codes)
+        revision_models = _encode(self._revision_models, self._codes)
+        revision_authors = _encode(self._revision_authors, self._codes)
+        creation_dates = np.frombuffer(self._creation_dates, dtype=np.int64)
+
+        self.ids = list(self._codes)
+        self._titles_by_id = {model.id: model.title for model in models}
+        self._users_by_id = {user.id: UserRecord.from_entity(user) for user in users}
+
+        # attributes of the objects, indexed by the code of their id, -1 marks missing objects
+        size = len(self.ids)
+        self._tenant = np.full(size, -1, dtype=np.int64)
+        self._type = np.full(size, -1, dtype=np.int64)
+        self._deleted = np.zeros(size, dtype=bool)
+        self._tenant[object_ids] = object_tenants
+        self._type[object_ids] = object_types
+        self._deleted[object_ids] = object_deleted
+
+        tenant_code = self._codes.get("tenant", -2)
+        model_code = self._codes.get("model", -2)
+        user_code = self._codes.get("user", -2)
+
+        first_object_ids = object_ids[np.sort(np.unique(object_ids, return_index=True)[1])]
+        self.tenant_ids = [self.ids[code] for code in first_object_ids[self._type[first_object_ids] == tenant_code]]
+
+        # ids of the active models, grouped by tenant in the order of the objects
+        active_models = first_object_ids[(self._type[first_object_ids] == model_code) &
+                                         ~self._deleted[first_object_ids]]
+        order = np.argsort(self._tenant[active_models], kind="stable")
+        self._active_models = active_models[order]
+        self._active_model_tenants = self._tenant[self._active_models]
+
+        # revisions, grouped by model and ordered by creation date and id
+        self._revision_order = np.lexsort((np.array(self._revision_ids, dtype=str), creation_dates, revision_models))
+        self._ordered_revision_models = revision_models[self._revision_order]
+
+        # revisions counting towards the activity of their author
+        revision_tenants = self._tenant[revision_ids]
+        counted = (self._type[revision_ids] >= 0) & (self._type[revision_authors] == user_code) & \
+            ~self._deleted[revision_authors] & (self._tenant[revision_authors] == revision_tenants)
+        counted_authors = revision_authors[counted]
+
+        self._revision_counts = np.bincount(counted_authors, minlength=size)
+        authors, first_revisions = np.unique(counted_authors, return_index=True)
+        authors = authors[np.argsort(first_revisions, kind="stable")]
+        author_tenants = self._tenant[authors]
+        maximum_counts = np.zeros(size, dtype=np.int64)
+        np.maximum.at(maximum_counts, author_tenants, self._revision_counts[authors])
+
+        self._most_active_user_ids_by_tenant = {}
+        most_active = self._revision_counts[authors] == maximum_counts[author_tenants]
+        for author, tenant in zip(authors[most_active].tolist(), author_tenants[most_active].tolist()):
+            self._most_active_user_ids_by_tenant.setdefault(self.ids[tenant], []).append(self.ids[author])
+
+        self._revision_tenants = revision_tenants
+        self._revision_deleted = self._deleted[revision_ids] | (self._type[revision_ids] < 0)
+        self._encoded_creation_dates = creation_dates
+
+    @classmethod
+    def from_data_loader(cls, data_loader):
+        """Builds the index from the tables loaded by a DataLoader.
+
+        Args:
+            data_loader (DataLoader): The DataLoader the tables are loaded with.
+
+        Returns:
+            VectorizedIndex: Returns the index over all entities of the database.
+        """
+        return cls(data_loader.get_object_table(), data_loader.get_model_revision_table(), data_loader.iter_models(),
+                   data_loader.iter_users())
+
+    @classmethod
+    def for_database(cls, database_file_path):
+        """Returns the index of a database, which is only rebuilt in case the database changed.
+
+        Args:
+            database_file_path (str): String containing the path where the SQLite database file can be found.
+
+        Returns:
+            VectorizedIndex: Returns the index over all entities of the database.
+        """
+        key = (os.path.abspath(database_file_path), cls.__name__)
+        version = get_database_version(database_file_path)
+
+        index = _ENTITY_INDEX_CACHE.get(key, version)
+        if index is None:
+            with phase("vectorized.index"):
+                index = cls.from_data_loader(DataLoader(database_file_path, cache=None))
+            _ENTITY_INDEX_CACHE.put(key, index, version)
+
+        return index
+
+    def _slice(self, sorted_codes, value):
+        """Returns the range of positions holding a value within sorted codes."""
+        code = self._codes.get(value)
+        if code is None:
+            return 0, 0
+        return int(np.searchsorted(sorted_codes, code, "left")), int(np.searchsorted(sorted_codes, code, "right"))
+
+    def get_chronological_ordered_model_revisions(self, model_id):
+        """Returns the revisions of a model.
+
+        Args:
+            model_id (str): The id of the model.
+
+        Returns:
+            list: Returns a list of ModelRevision instances, ordered by the creation date and id.
+        """
+        start, end = self._slice(self._ordered_revision_models, model_id)
+        return [ModelRevision(self._revision_ids[idx], self._revision_models[idx], self._revision_authors[idx],
+                              self._revision_numbers[idx], self._creation_dates[idx])
+                for idx in self._revision_order[start:end].tolist()]
+
+    def get_most_active_users(self, tenant_id):
+        """Returns the users that created the most revisions within a tenant.
+
+        Args:
+            tenant_id (str): The id of the tenant.
+
+        Returns:
+            list: Returns a list of User instances.
+        """
+        return [self._users_by_id[user_id].to_entity()
+                for user_id in self._most_active_user_ids_by_tenant.get(tenant_id, ()) if user_id in self._users_by_id]
+
+    def get_active_model_titles(self, tenant_id):
+        """Returns the unordered titles of the models of a tenant that are not marked for deletion.
+
+        Args:
+            tenant_id (str): The id of the tenant.
+
+        Returns:
+            list: Returns a list of strings containing the model titles.
+        """
+        start, end = self._slice(self._active_model_tenants, tenant_id)
+        model_ids = [self.ids[code] for code in self._active_models[start:end].tolist()]
+        return [self._titles_by_id[model_id] for model_id in model_ids if model_id in self._titles_by_id]
+
+    def get_revision_counts_by_author(self):
+        """Counts the revisions each user created within the own tenant while not being marked for deletion.
+
+        Returns:
+            dict: Returns a dictionary mapping the user ids onto their number of revisions.
+        """
+        authors = np.nonzero(self._revision_counts)[0]
+        return dict(zip((self.ids[code] for code in authors.tolist()), self._revision_counts[authors].tolist()))
+
+    def get_revision_counts_by_tenant(self):
+        """Counts the revisions of each tenant that are not marked for deletion.
+
+        Returns:
+            dict: Returns a dictionary mapping the tenant ids onto their number of revisions.
+        """
+        tenants = self._revision_tenants[~self._revision_deleted]
+        counts = np.bincount(tenants, minlength=len(self.ids))
+        tenants = np.nonzero(counts)[0]
+        return dict(zip((self.ids[code] for code in tenants.tolist()), counts[tenants].tolist()))
+
+    def get_revision_counts_by_bucket(self, width, origin=0):
+        """Counts the revisions per time bucket.
+
+        Args:
+            width (int): Width of a bucket, in units of the creation date.
+            origin (int): Creation date the first bucket starts at.
+
+        Returns:
+            list: Returns the number of revisions created within each bucket, starting at the bucket containing the
+                origin and ending at the bucket of the latest revision.
+        """
+        if width <= 0:
+            raise ValueError("The width of a bucket has to be positive.")
+
+        creation_dates = self._encoded_creation_dates[self._encoded_creation_dates >= origin]
+        return np.bincount((creation_dates - origin) // width).tolist()
@@ -4,67 +4,171 @@
 # Copyright (c) 2019 CompuCom, All Rights Reserved
 # Created by Luis Fuentes
 
-"""This helper (re)-generates the database for all parts of the coding challenge."""
+"""This helper (re)-generates the database for all parts of the coding challenge.
 
+The database is generated in shards, each containing complete tenants together with their users, models and
+revisions. Every shard is generated from its own random number generator seeded by the seed of the database and the
+number of the shard, so that the same scale and seed always result in the same database, independent of the number
+of worker processes. Execute
+
+    python resources/generate_database.py --scale 1000 --seed 42 --workers 8
+
+to generate a large database on all cores.
+"""
+
+import argparse
 import os
+import re
 import sqlite3.dbapi2 as dbapi
 import random
+import shutil
+import tempfile
+import time
 import uuid
+from concurrent.futures import ProcessPoolExecutor
 
 
 _SCALING_FACTOR = 23
 
+# maximum scaling factor of a single shard
+_SHARD_SCALING_FACTOR = 23
+
+# scaling factor of the users generated after the revisions, which are therefore never author of any revision, it
+# applies to the whole database instead of each shard
+_LAZY_USER_SCALING_FACTOR = 2
+
+# tables in the order they are merged
+_TABLES = ("Objects", "Tenants", "Users", "Models", "ModelRevisions")
+
+# tables rebuilt by optimize_database, together with the physical order of their rows and if they are clustered on
+# their primary key
+_CLUSTERED_TABLES = (
+    ("Objects", "id", True),
+    ("Tenants", "id", False),
+    ("Users", "id", False),
+    ("Models", "id", False),
+    ("ModelRevisions", "model, creation_date", False),
+)
+
+# indexes created by optimize_database, the secondary indexes of Objects implicitly cover the id
+_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS Objects_tenant_type ON Objects (tenant, object_type, marked_for_deletion)",
+    "CREATE INDEX IF NOT EXISTS Objects_type_tenant ON Objects (object_type, marked_for_deletion, tenant)",
+    "CREATE INDEX IF NOT EXISTS Tenants_id ON Tenants (id, name)",
+    "CREATE INDEX IF NOT EXISTS Users_id ON Users (id)",
+    "CREATE INDEX IF NOT EXISTS Models_id ON Models (id, title)",
+    "CREATE INDEX IF NOT EXISTS ModelRevisions_model ON ModelRevisions (model, creation_date, author)",
+    "CREATE INDEX IF NOT EXISTS ModelRevisions_author ON ModelRevisions (author)",
+    "CREATE INDEX IF NOT EXISTS ModelRevisions_creation_date ON ModelRevisions (creation_date)",
+)
+
+# number of rows inserted by a single executemany call
+_BULK_INSERT_BATCH_SIZE = 50000
+
+_ATTRIBUTES = tuple(sorted(set([
+    "beautiful", "bright", "broken", "clever", "dark", "dusty", "deadly",
+    "delicious", "colorful",
+    "encouraging", "epic", "fantastic", "fast", "gigantic", "great",
+    "heavy", "hidden", "icy", "invisible", "lazy", "light", "magic",
+    "monumental", "motivating", "spicy",
+    "mystic", "old", "revitalizing", "rusty", "shady", "shiny", "slow",
+    "smart", "young", "wild", "domestic", "loud", "silent", "fine", "common",
+    "deceptive", "serious", "terrifying", "drowned", "insulting", "foul",
+    "shattering", "funky", "legendary", "ultimate", "supreme", "true", "false",
+    "frosted", "extraterrestrial"
+])))
+
+_COLORS = tuple(sorted(set([
+    "aquamarine", "blue", "cyan", "golden", "green", "grey", "iron",
+    "ivory", "khaki", "magenta", "olive", "orange", "orchid", "pink",
+    "platin", "plum", "purple", "red", "sand", "silver", "turquoise",
+    "violet", "white", "yellow"
+])))
+
+_OBJECTS = tuple(sorted(set([
+    "alpaca", "antelope", "armor", "axe", "ballista", "boot", "bottle",
+    "bow", "burger", "butterfly", "cake", "caravel", "carrot", "cart",
+    "cat", "catapult", "charger", "claymore", "clownfish", "club",
+    "cobra", "cog", "cow", "crab", "crossbow", "destrier", "dog",
+    "dolphin", "dragon", "dwarf", "elephant", "falchion", "falcon",
+    "flail", "fox", "frog", "galley", "giant", "giraffe", "glaive",
+    "glove", "grizzly", "halbert", "hat", "helmet", "hippo",
+    "horse", "impala", "jaguar", "lance", "lemming", "lion",
+    "longship", "longsword", "rhinoceros",
+    "maul", "monkey", "mortar", "mouse", "musket", "ocelot", "onion",
+    "panda", "parrot", "penguin", "pig", "pike", "pillow", "potato",
+    "quarterstaff", "rat", "salmon", "seal", "shark", "snail", "snake",
+    "soup", "spear", "squirrel", "stag", "steak", "sword", "trebuchet",
+    "turtle", "unicorn", "witch", "wolf", "zebra", "zweihander", "pencil",
+    "anvil", "cloud", "token", "medal", "amulett", "boot", "wizard", "beer"
+])))
+
+
+def _uuid(rng=random):
+    """"Returns a random version 4 UUID without any dashes.
 
-def _uuid():
-    """"Returns a UUID without any dashes.
+    Args:
+        rng (random.Random): Random number generator the UUID is drawn from.
 
     Returns:
         str: Returns a dash-free UUID.
     """
-    return str(uuid.uuid4()).replace("-", "")
-
-
-def _name():
-    """Returns a readable name."""
-    attributes = list(set([
-        "beautiful", "bright", "broken", "clever", "dark", "dusty", "deadly",
-        "delicious", "colorful",
-        "encouraging", "epic", "fantastic", "fast", "gigantic", "great",
-        "heavy", "hidden", "icy", "invisible", "lazy", "light", "magic",
-        "monumental", "motivating", "spicy",
-        "mystic", "old", "revitalizing", "rusty", "shady", "shiny", "slow",
-        "smart", "young", "wild", "domestic", "loud", "silent", "fine", "common",
-        "deceptive", "serious", "terrifying", "drowned", "insulting", "foul",
-        "shattering", "funky", "legendary", "ultimate", "supreme", "true", "false",
-        "frosted", "extraterrestrial"
-    ]))
-
-    colors = list(set([
-        "aquamarine", "blue", "cyan", "golden", "green", "grey", "iron",
-        "ivory", "khaki", "magenta", "olive", "orange", "orchid", "pink",
-        "platin", "plum", "purple", "red", "sand", "silver", "turquoise",
-        "violet", "white", "yellow"
-    ]))
-
-    objects = list(set([
-        "alpaca", "antelope", "armor", "axe", "ballista", "boot", "bottle",
-        "bow", "burger", "butterfly", "cake", "caravel", "carrot", "cart",
-        "cat", "catapult", "charger", "claymore", "clownfish", "club",
-        "cobra", "cog", "cow", "crab", "crossbow", "destrier", "dog",
-        "dolphin", "dragon", "dwarf", "elephant", "falchion", "falcon",
-        "flail", "fox", "frog", "galley", "giant", "giraffe", "glaive",
-        "glove", "grizzly", "halbert", "hat", "helmet", "hippo",
-        "horse", "impala", "jaguar", "lance", "lemming", "lion",
-        "longship", "longsword", "rhinoceros",
-        "maul", "monkey", "mortar", "mouse", "musket", "ocelot", "onion",
-        "panda", "parrot", "penguin", "pig", "pike", "pillow", "potato",
-        "quarterstaff", "rat", "salmon", "seal", "shark", "snail", "snake",
-        "soup", "spear", "squirrel", "stag", "steak", "sword", "trebuchet",
-        "turtle", "unicorn", "witch", "wolf", "zebra", "zweihander", "pencil",
-        "anvil", "cloud", "token", "medal", "amulett", "boot", "wizard", "beer"
-    ]))
-
-    return f"{random.choice(attributes)}-{random.choice(colors)}-{random.choice(objects)}"
+    return uuid.UUID(int=rng.getrandbits(128), version=4).hex
+
+
+def _name(rng=random):
+    """Returns a readable name.
+
+    Args:
+        rng (random.Random): Random number generator the name is drawn from.
+
+    Returns:
+        str: Returns the name.
+    """
+    return f"{rng.choice(_ATTRIBUTES)}-{rng.choice(_COLORS)}-{rng.choice(_OBJECTS)}"
+
+
+def _connect_for_bulk_loading(database_file_path):
+    """Opens a connection that is tuned for inserting large amounts of rows.
+
+    The rollback journal and the synchronization with the disk are switched off. In case the generation is
+    interrupted, the database has to be generated again.
+
+    Args:
+        database_file_path (str): Path to the database file.
+
+    Returns:
+        sqlite3.Connection: Returns the connection.
+    """
+    database = dbapi.connect(database_file_path)
+    database.execute("PRAGMA journal_mode = OFF")
+    database.execute("PRAGMA synchronous = OFF")
+    database.execute("PRAGMA temp_store = MEMORY")
+    database.execute("PRAGMA cache_size = -262144")
+    return database
+
+
+def _insert_in_batches(cursor, rows, statements):
+    """Inserts rows into several tables by executemany, in batches of _BULK_INSERT_BATCH_SIZE rows.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor the statements are executed by.
+        rows (iterable): Tuples, each containing one row per statement.
+        statements (list): Parameterized INSERT statements, one per table.
+    """
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= _BULK_INSERT_BATCH_SIZE:
+            for idx, statement in enumerate(statements):
+                cursor.executemany(statement, [entry[idx] for entry in batch])
+            batch = []
+
+    for idx, statement in enumerate(statements):
+        cursor.executemany(statement, [entry[idx] for entry in batch])
+
+
+_INSERT_OBJECT = "INSERT INTO Objects (id, object_type, tenant, marked_for_deletion) VALUES (?, ?, ?, ?)"
 
 
 def get_database_file_path(database_file="magic_database.db"):
@@ -146,26 +250,47 @@ def generate_tables(database_file_path):
     database.close()
 
 
-def generate_tenants(database_file_path):
+def generate_tenants(database_file_path, scaling_factor=None, rng=random):
     """Generates the tenants for the test database.
 
     Args:
         database_file_path (str): Path to the database file.
+        scaling_factor (int): Manual scaling factor.
+        rng (random.Random): Random number generator the tenants are drawn from.
     """
-    database = dbapi.connect(database_file_path)
+    database = _connect_for_bulk_loading(database_file_path)
     cursor = database.cursor()
 
-    for idx in range(random.randint(_SCALING_FACTOR * 3, _SCALING_FACTOR * 9)):
-        id = _uuid()
-        cursor.execute(f"INSERT INTO Objects (id, object_type, tenant, marked_for_deletion) "
-                       f" VALUES ('{id}','tenant','{id}',{random.randint(0, 50) <= 42})")
-        cursor.execute(f"INSERT INTO Tenants (id, name) VALUES ('{id}', '{_name()}')")
+    if scaling_factor is None:
+        scaling_factor = _SCALING_FACTOR
+
+    def tenant_rows():
+        for idx in range(rng.randint(scaling_factor * 3, scaling_factor * 9)):
+            id = _uuid(rng)
+            yield (id, "tenant", id, int(rng.randint(0, 50) <= 42)), (id, _name(rng))
+
+    _insert_in_batches(cursor, tenant_rows(), [_INSERT_OBJECT, "INSERT INTO Tenants (id, name) VALUES (?, ?)"])
 
     database.commit()
     cursor.close()
     database.close()
 
 
+def _load_tenants(cursor):
+    """Loads all tenants at once, ordered by their id.
+
+    The order does not depend on the physical layout of Objects, which has no rowid after optimize_database.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor the tenants are loaded by.
+
+    Returns:
+        list: List containing tuples of (str, int) containing a tenant id and if the tenant was deleted.
+    """
+    cursor.execute("SELECT id, marked_for_deletion FROM Objects WHERE object_type = 'tenant' ORDER BY id")
+    return cursor.fetchall()
+
+
 def get_random_tenant(database_file_path):
     """Returns the id of a random tenant and if the tenant is marked for deleted.
 
@@ -177,93 +302,130 @@ def get_random_tenant(database_file_path):
     """
     database = dbapi.connect(database_file_path)
     cursor = database.cursor()
-    cursor.execute("SELECT id, marked_for_deletion FROM Objects WHERE object_type = 'tenant'")
-    tenants = cursor.fetchall()
+    tenants = _load_tenants(cursor)
     cursor.close()
     database.close()
     return random.choice(tenants)
 
 
-def generate_users(database_file_path, scaling_factor=None):
+def generate_users(database_file_path, scaling_factor=None, rng=random, count=None):
     """Generates the users for the test database.
 
+    The tenants are loaded once and sampled in memory.
+
     Args:
         database_file_path (str): Path to the database file.
         scaling_factor (int): Manual scaling factor.
+        rng (random.Random): Random number generator the users are drawn from.
+        count (int): Number of generated users, drawn according to the scaling factor in case this is None.
     """
-    database = dbapi.connect(database_file_path)
+    database = _connect_for_bulk_loading(database_file_path)
     cursor = database.cursor()
 
     if scaling_factor is None:
         scaling_factor = _SCALING_FACTOR
 
-    for idx in range(random.randint(scaling_factor * 50, scaling_factor * 150)):
-        id = _uuid()
-        tenant = get_random_tenant(database_file_path)
-        cursor.execute(f"INSERT INTO Objects (id, object_type, tenant, marked_for_deletion) "
-                       f"VALUES ('{id}','user','{tenant[0]}',{random.randint(0, 50) >= 48 or tenant[1] == 1})")
-        cursor.execute(f"INSERT INTO Users (id, first_name, last_name) VALUES ('{id}', '{_name()}', '{_name()}')")
-        database.commit()
+    tenants = _load_tenants(cursor)
+    if count is None:
+        count = rng.randint(scaling_factor * 50, scaling_factor * 150)
 
+    def user_rows():
+        for idx in range(count):
+            id = _uuid(rng)
+            tenant = rng.choice(tenants)
+            yield (id, "user", tenant[0], int(rng.randint(0, 50) >= 48 or tenant[1] == 1)), \
+                (id, _name(rng), _name(rng))
+
+    _insert_in_batches(cursor, user_rows(),
+                       [_INSERT_OBJECT, "INSERT INTO Users (id, first_name, last_name) VALUES (?, ?, ?)"])
+
+    database.commit()
     cursor.close()
     database.close()
 
 
-def get_random_user(database_file_path , tenant_id=None):
-    """Returns the id of a random user, its tenant, and if the tenant is marked for deletion.
+def _load_users(cursor, tenant_id=None):
+    """Loads all users at once, together with their tenant, ordered by their id.
 
     Args:
-        database_file_path (str): Path to the database file.
-        tenant_id (str): The tenant the user is from.
+        cursor (sqlite3.Cursor): Cursor the users are loaded by.
+        tenant_id (str): If given, only the users of this tenant are loaded.
 
     Returns:
-        tuple: Returns a tuple of (str, str, bool) containing a user id, the users tenant,
+        list: List containing tuples of (str, str, int) containing a user id, the users tenant,
             and if the tenant marked for deletion.
     """
-    database = dbapi.connect(database_file_path)
-    cursor = database.cursor()
-
-    statement = f"""
+    statement = """
         SELECT users.id, users.tenant, tenants.marked_for_deletion
         FROM Objects users, Objects tenants
         WHERE     users.object_type = 'user'
               AND users.tenant = tenants.id
     """
+    parameters = ()
 
     if tenant_id is not None:
-        statement += f"""
-              AND tenants.id = '{tenant_id}'"""
-    cursor.execute(statement)
+        statement += """
+              AND tenants.id = ?"""
+        parameters = (tenant_id,)
+
+    statement += """
+        ORDER BY users.id"""
+    cursor.execute(statement, parameters)
+    return cursor.fetchall()
+
+
+def get_random_user(database_file_path, tenant_id=None):
+    """Returns the id of a random user, its tenant, and if the tenant is marked for deletion.
+
+    Args:
+        database_file_path (str): Path to the database file.
+        tenant_id (str): The tenant the user is from.
 
-    users = cursor.fetchall()
+    Returns:
+        tuple: Returns a tuple of (str, str, bool) containing a user id, the users tenant,
+            and if the tenant marked for deletion.
+    """
+    database = dbapi.connect(database_file_path)
+    cursor = database.cursor()
+    users = _load_users(cursor, tenant_id)
     cursor.close()
     database.close()
     return random.choice(users)
 
 
-def generate_models(database_file_path):
+def generate_models(database_file_path, scaling_factor=None, rng=random):
     """Generates the models for the test database.
 
+    The users are loaded once and sampled in memory.
+
     Args:
         database_file_path (str): Path to the database file.
+        scaling_factor (int): Manual scaling factor.
+        rng (random.Random): Random number generator the models are drawn from.
     """
-    database = dbapi.connect(database_file_path)
+    database = _connect_for_bulk_loading(database_file_path)
     cursor = database.cursor()
 
-    for idx in range(random.randint(_SCALING_FACTOR * 100, _SCALING_FACTOR * 300)):
-        id = _uuid()
-        user = get_random_user(database_file_path)
-        cursor.execute(f"INSERT INTO Objects (id, object_type, tenant, marked_for_deletion) "
-                       f"VALUES ('{id}','model','{user[1]}',{random.randint(0, 50) >= 36 or user[2] == 1})")
-        cursor.execute(f"INSERT INTO Models (id, title) VALUES ('{id}', '{_name()}')")
-        database.commit()
+    if scaling_factor is None:
+        scaling_factor = _SCALING_FACTOR
+
+    users = _load_users(cursor)
+
+    def model_rows():
+        for idx in range(rng.randint(scaling_factor * 100, scaling_factor * 300)):
+            id = _uuid(rng)
+            user = rng.choice(users)
+            yield (id, "model", user[1], int(rng.randint(0, 50) >= 36 or user[2] == 1)), (id, _name(rng))
 
+    _insert_in_batches(cursor, model_rows(), [_INSERT_OBJECT, "INSERT INTO Models (id, title) VALUES (?, ?)"])
+
+    database.commit()
     cursor.close()
     database.close()
 
 
 def get_models(database_file_path):
-    """"Returns a list of Models stored in the database.
+    """"Returns a list of Models stored in the database, ordered by their id.
 
     Args:
         database_file_path (str): Path to the database file.
@@ -277,6 +439,7 @@ def get_models(database_file_path):
         SELECT id, tenant, marked_for_deletion
         FROM Objects
         WHERE object_type = 'model'
+        ORDER BY id
     """)
     models = cursor.fetchall()
     cursor.close()
@@ -284,106 +447,303 @@ def get_models(database_file_path):
     return models
 
 
-def generate_revisions(database_file_path):
-    """Generates the tenants for the test database.
+def generate_revisions(database_file_path, rng=random):
+    """Generates the revisions for the test database.
+
+    The users are loaded once and grouped by tenant, so that the authors are sampled in memory.
 
     Args:
         database_file_path (str): Path to the database file.
+        rng (random.Random): Random number generator the revisions are drawn from.
     """
-    database = dbapi.connect(database_file_path)
+    database = _connect_for_bulk_loading(database_file_path)
     cursor = database.cursor()
 
     models = get_models(database_file_path)
 
-    for model in models:
-        for revision in range(random.randint(3, 12)):
-            id = _uuid()
-            author = get_random_user(database_file_path, model[1])
+    users_by_tenant = {}
+    for user in _load_users(cursor):
+        users_by_tenant.setdefault(user[1], []).append(user)
 
-            start_date = random.randint(21414, 352145)
+    def revision_rows():
+        for model in models:
+            tenant_users = users_by_tenant[model[1]]
 
-            cursor.execute(f"INSERT INTO Objects (id, object_type, tenant, marked_for_deletion) "
-                           f"VALUES ('{id}','revision','{model[1]}',{random.randint(0, 50) >= 49 or model[2] == 1})")
+            for revision in range(rng.randint(3, 12)):
+                id = _uuid(rng)
+                author = rng.choice(tenant_users)
+                start_date = rng.randint(21414, 352145)
+                yield (id, "revision", model[1], int(rng.randint(0, 50) >= 49 or model[2] == 1)), \
+                    (id, model[0], author[0], revision, rng.randint(1, 72) + (revision * 73) + start_date)
 
-            statement = f"""
-                INSERT INTO ModelRevisions (id, model, author, revision_number, creation_date) 
-                VALUES ('{id}', '{model[0]}', '{author[0]}', {revision}, 
-                {random.randint(1,72) + (revision * 73) + start_date})
-            """
-            try:
-                cursor.execute(statement)
-            except Exception as e:
-                print(statement)
-                raise e
-
-        database.commit()
+    _insert_in_batches(cursor, revision_rows(), [
+        _INSERT_OBJECT,
+        "INSERT INTO ModelRevisions (id, model, author, revision_number, creation_date) VALUES (?, ?, ?, ?, ?)"])
 
+    database.commit()
     cursor.close()
     database.close()
 
-def optimize_database(database_file_path):
-    """Reorders the objects in the database for better query performance.
+
+def _measure_queries(database_file_path):
+    """Measures the runtime of all Section 4 queries.
 
     Args:
         database_file_path (str): Path to the database file.
+
+    Returns:
+        dict: Returns a dictionary mapping the names of the queries onto their runtime in seconds.
     """
-    database = dbapi.connect(database_file_path)
+    from coding_challenge import data_analysis_and_retrieval
+    from coding_challenge.connection_pool import close_connection_pools
 
-    cursor = database.cursor()
-    cursor.execute("SELECT * FROM Objects ORDER BY id ASC")
-    objects = cursor.fetchall()
-    cursor.close()
+    close_connection_pools()
+    data_analysis_and_retrieval.clear_query_result_cache(database_file_path)
+    timings = {}
+    for query in data_analysis_and_retrieval.QUERY_FUNCTIONS:
+        start = time.perf_counter()
+        query(database_file_path)
+        timings[query.__name__] = time.perf_counter() - start
+    close_connection_pools()
 
-    cursor = database.cursor()
-    for database_object in objects:
-        cursor.execute(f"DELETE FROM Objects WHERE id='{database_object[0]}'")
-        cursor.execute(f"""
-            INSERT INTO Objects (id, object_type, tenant, marked_for_deletion)
-            VALUES ('{database_object[0]}','{database_object[1]}', '{database_object[2]}', {database_object[3]})
-        """)
+    return timings
 
-    database.commit()
-    cursor.close()
 
-    cursor = database.cursor()
-    cursor.execute("SELECT * FROM ModelRevisions ORDER BY id ASC")
-    revisions = cursor.fetchall()
-    cursor.close()
+def _rebuild_table(cursor, table, order_by, without_rowid=False):
+    """Rebuilds a table with its rows physically stored in the given order.
+
+    The indexes of the table are recreated after the rebuild. Triggers must be dropped by the caller beforehand, as
+    they may refer to other tables being rebuilt.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor the statements are executed by, inside of a transaction.
+        table (str): Name of the table.
+        order_by (str): Columns the rows are ordered by.
+        without_rowid (bool): If True, the table is rebuilt as WITHOUT ROWID table clustered on its primary key.
+    """
+    cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table,))
+    table_sql = cursor.fetchone()[0]
+    cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+                   (table,))
+    index_sql = [row[0] for row in cursor.fetchall()]
+
+    rebuilt_table = f"_rebuilt_{table}"
+    rebuilt_table_sql = re.sub(rf"^CREATE TABLE\s+[\"`\[]?{table}[\"`\]]?", f"CREATE TABLE {rebuilt_table}",
+                               table_sql.strip(), flags=re.IGNORECASE)
+    if without_rowid and not re.search(r"WITHOUT\s+ROWID\s*$", rebuilt_table_sql, flags=re.IGNORECASE):
+        rebuilt_table_sql += " WITHOUT ROWID"
+
+    cursor.execute(rebuilt_table_sql)
+    cursor.execute(f"INSERT INTO {rebuilt_table} SELECT * FROM {table} ORDER BY {order_by}")
+    cursor.execute(f"DROP TABLE {table}")
+    cursor.execute(f"ALTER TABLE {rebuilt_table} RENAME TO {table}")
+
+    for sql in index_sql:
+        cursor.execute(sql)
+
+
+def optimize_database(database_file_path, measure_queries=False):
+    """Optimizes the physical layout of the database and creates the indexes of all access paths.
+
+    Objects is rebuilt as WITHOUT ROWID table, so that its rows are clustered on their id. All other tables are
+    rebuilt with their rows ordered by id, the revisions by model and creation date. Covering indexes are created for
+    the access paths of the Section 4 queries and the application logic, the statistics of the query planner are
+    collected by ANALYZE, and the file is compacted by VACUUM.
+
+    Args:
+        database_file_path (str): Path to the database file.
+        measure_queries (bool): If True, the Section 4 queries are measured before and after the optimization.
+
+    Returns:
+        dict: Returns a dictionary containing the file size in bytes before and after the optimization, and in case
+            the queries were measured, the runtime of each query in seconds before and after the optimization.
+    """
+    report = {"file_size": {"before": os.path.getsize(database_file_path)}}
+    if measure_queries:
+        report["query_seconds"] = {"before": _measure_queries(database_file_path)}
+
+    database = dbapi.connect(database_file_path, isolation_level=None)
+    database.execute("PRAGMA synchronous = OFF")
+    database.execute("PRAGMA temp_store = MEMORY")
+    database.execute("PRAGMA cache_size = -262144")
 
     cursor = database.cursor()
-    for revision in revisions:
-        cursor.execute(f"DELETE FROM ModelRevisions WHERE id='{revision[0]}'")
-        cursor.execute(f"""
-                INSERT INTO ModelRevisions (id, model, author, revision_number, creation_date)
-                VALUES ('{revision[0]}','{revision[1]}', '{revision[2]}', {revision[3]}, {revision[4]})
-            """)
+    cursor.execute("BEGIN")
 
-    database.commit()
+    # views and triggers are dropped during the rebuild, as renaming a table fails while a view or a trigger refers
+    # to a missing table, e.g. the TenantStats triggers on ModelRevisions referring to Objects
+    cursor.execute("SELECT type, name, sql FROM sqlite_master WHERE type IN ('view', 'trigger') ORDER BY type")
+    dependents = cursor.fetchall()
+    for dependent_type, name, _ in dependents:
+        cursor.execute(f"DROP {dependent_type.upper()} {name}")
+
+    for table, order_by, without_rowid in _CLUSTERED_TABLES:
+        _rebuild_table(cursor, table, order_by, without_rowid)
+
+    for _, _, sql in dependents:
+        cursor.execute(sql)
+
+    for index in _INDEXES:
+        cursor.execute(index)
+
+    cursor.execute("COMMIT")
+
+    cursor.execute("ANALYZE")
+    cursor.execute("VACUUM")
     cursor.close()
+    database.close()
+
+    report["file_size"]["after"] = os.path.getsize(database_file_path)
+    if measure_queries:
+        report["query_seconds"]["after"] = _measure_queries(database_file_path)
+
+    return report
+
+
+def get_shard_scaling_factors(scaling_factor):
+    """Splits a scaling factor into the scaling factors of the shards.
+
+    The split only depends on the scaling factor, so that the generated database does not depend on the number of
+    worker processes.
+
+    Args:
+        scaling_factor (int): Scaling factor of the database.
+
+    Returns:
+        list: Returns the scaling factors of all shards, differing by at most one.
+    """
+    shards = max(1, -(-scaling_factor // _SHARD_SCALING_FACTOR))
+    return [scaling_factor // shards + (1 if shard < scaling_factor % shards else 0) for shard in range(shards)]
+
+
+def get_population_plan(scaling_factor, seed):
+    """Plans the shards of a database.
 
+    The tenants, users, models and revisions of a shard are drawn according to the scaling factor of the shard, so
+    that their expected numbers add up to the ones of the database. The number of lazy users is drawn once for the
+    whole database and split among the shards, so that it does not grow with the number of shards. The plan only
+    depends on the scaling factor and the seed, not on the number of worker processes.
+
+    Args:
+        scaling_factor (int): Scaling factor of the database.
+        seed (int): Seed of the database.
+
+    Returns:
+        list: Returns one tuple of (scaling factor, number of lazy users) per shard.
+    """
+    scaling_factors = get_shard_scaling_factors(scaling_factor)
+    rng = random.Random(f"{seed}:plan")
+    lazy_users = rng.randint(_LAZY_USER_SCALING_FACTOR * 50, _LAZY_USER_SCALING_FACTOR * 150)
+
+    shards = len(scaling_factors)
+    return [(shard_scaling_factor, lazy_users // shards + (1 if shard < lazy_users % shards else 0))
+            for shard, shard_scaling_factor in enumerate(scaling_factors)]
+
+
+def generate_shard(database_file_path, scaling_factor, seed, shard, lazy_users=None):
+    """Generates a single shard into a separate database file.
+
+    Args:
+        database_file_path (str): Path to the database file of the shard, the file must not exist yet.
+        scaling_factor (int): Scaling factor of the shard.
+        seed (int): Seed of the database.
+        shard (int): Number of the shard.
+        lazy_users (int): Number of lazy users of the shard, drawn like for a whole database in case this is None.
+
+    Returns:
+        str: Returns the path to the database file of the shard.
+    """
+    rng = random.Random(f"{seed}:{shard}")
+
+    generate_tables(database_file_path)
+    generate_tenants(database_file_path, scaling_factor, rng)
+    generate_users(database_file_path, scaling_factor, rng)
+    generate_models(database_file_path, scaling_factor, rng)
+    generate_revisions(database_file_path, rng)
+    generate_users(database_file_path, _LAZY_USER_SCALING_FACTOR, rng, lazy_users)
+
+    return database_file_path
+
+
+def _generate_shard(arguments):
+    """Unpacks the arguments of generate_shard, used by the worker processes."""
+    return generate_shard(*arguments)
+
+
+def merge_shard(database_file_path, shard_file_path):
+    """Appends all rows of a shard to the database.
+
+    Args:
+        database_file_path (str): Path to the database file.
+        shard_file_path (str): Path to the database file of the shard.
+    """
+    database = _connect_for_bulk_loading(database_file_path)
+    database.execute("ATTACH DATABASE ? AS shard", (shard_file_path,))
+
+    for table in _TABLES:
+        database.execute(f"INSERT INTO main.{table} SELECT * FROM shard.{table} ORDER BY rowid")
+
+    database.commit()
+    database.execute("DETACH DATABASE shard")
     database.close()
 
 
-def populate_database(database_file_path):
+def populate_database(database_file_path, scaling_factor=None, seed=None, workers=1):
     """Populates the database with actual data.
 
+    The shards are planned by get_population_plan, generated by worker processes in case more than one worker is
+    requested, and merged into the database in the order of their numbers.
+
     Args:
         database_file_path (str): Path to the database file.
+        scaling_factor (int): Manual scaling factor, _SCALING_FACTOR is used in case this is None.
+        seed (int): Seed of the generated data. In case this is None, the seed is drawn from the random module.
+        workers (int): Number of worker processes generating the shards.
     """
-    generate_tenants(database_file_path)
-    generate_users(database_file_path)
-    generate_models(database_file_path)
-    generate_revisions(database_file_path)
-    generate_users(database_file_path, 2)
+    if scaling_factor is None:
+        scaling_factor = _SCALING_FACTOR
+
+    if seed is None:
+        seed = random.getrandbits(64)
+
+    directory = tempfile.mkdtemp(dir=os.path.dirname(os.path.abspath(database_file_path)))
+    try:
+        shards = [(os.path.join(directory, f"shard_{shard}.db"), shard_scaling_factor, seed, shard, lazy_users)
+                  for shard, (shard_scaling_factor, lazy_users)
+                  in enumerate(get_population_plan(scaling_factor, seed))]
+
+        if workers > 1 and len(shards) > 1:
+            with ProcessPoolExecutor(max_workers=min(workers, len(shards))) as executor:
+                for shard_file_path in executor.map(_generate_shard, shards):
+                    merge_shard(database_file_path, shard_file_path)
+                    os.remove(shard_file_path)
+        else:
+            for arguments in shards:
+                merge_shard(database_file_path, _generate_shard(arguments))
+                os.remove(arguments[0])
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
 
 
 # this part is executed if the script is called directly
 if __name__ == "__main__":
 
-    database_file_path = get_database_file_path()
+    parser = argparse.ArgumentParser(description="(Re)-generates the database of the coding challenge.")
+    parser.add_argument("--scale", type=int, default=_SCALING_FACTOR, help="scaling factor of the database")
+    parser.add_argument("--seed", type=int, help="seed of the generated data, random in case it is omitted")
+    parser.add_argument("--workers", type=int, default=1, help="number of worker processes")
+    parser.add_argument("--database-file", default=get_database_file_path(), help="path to the database file")
+    options = parser.parse_args()
+
+    database_file_path = options.database_file
     recreate_database_file(database_file_path)
     generate_tables(database_file_path)
     print("Populating database. This might take a while.")
-    populate_database(database_file_path)
+    populate_database(database_file_path, options.scale, options.seed, options.workers)
     print("Optimizing database")
-    optimize_database(database_file_path)
+    report = optimize_database(database_file_path, measure_queries=True)
+
+    print(f"File size: {report['file_size']['before'] / 1024 / 1024:.2f} MiB -> "
+          f"{report['file_size']['after'] / 1024 / 1024:.2f} MiB")
+    for query, seconds in report["query_seconds"]["before"].items():
+        print(f"{query}: {seconds * 1000:.2f} ms -> {report['query_seconds']['after'][query] * 1000:.2f} ms")
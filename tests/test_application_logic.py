@@ -8,12 +8,25 @@
 
 import unittest
 import random
+import locale
+import pickle
+import os
+import shutil
+import sqlite3.dbapi2 as dbapi
+import tempfile
+from dataclasses import FrozenInstanceError
 
 from resources.generate_database import get_database_file_path
 
+from coding_challenge.connection_pool import get_connection_pool
+
 from coding_challenge.application_logic import DataLoader, Object, Model, Tenant, User, ModelRevision, \
     get_chronological_ordered_model_revisions, get_most_active_user, \
-    sort_string_list, get_ordered_list_of_active_model_titles
+    sort_string_list, get_ordered_list_of_active_model_titles, _compile_select, _split_where, _entity_cache_key, \
+    ModelRevisionRecord, ModelRevisionTable, EntityIndex, get_chronological_ordered_model_revisions_many, \
+    get_most_active_users_by_tenant, merge_sorted_string_list, StringSorter, TitleIndex, TitleCursor, \
+    _collation_keys
+from coding_challenge.caching import LRUCache
 
 
 class TestApplicationLogic(unittest.TestCase):
@@ -188,3 +201,343 @@ class TestApplicationLogic(unittest.TestCase):
 
 class TestCustomApplicationLogic(unittest.TestCase):
     """This class encapsulates all user defined unit tests for the application logic part of the coding challenge."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Initializes the test class."""
+        cls.database_file_path = get_database_file_path()
+        cls.data_loader = DataLoader(cls.database_file_path)
+
+    def test_iter_model_revisions(self):
+        """Tests if streaming the revisions in small batches yields the same revisions as loading them at once."""
+        streamed_revisions = list(self.data_loader.iter_model_revisions(batch_size=7))
+        loaded_revisions = self.data_loader.get_model_revisions()
+
+        self.assertEqual(loaded_revisions, streamed_revisions)
+
+    def test_iter_objects_releases_connection(self):
+        """Tests if an abandoned iterator returns its connection to the pool."""
+        pool = get_connection_pool(self.database_file_path)
+        live_connections = pool.metrics().live_connections
+
+        objects = self.data_loader.iter_objects(batch_size=1)
+        self.assertIsInstance(next(objects), Object)
+        objects.close()
+
+        metrics = pool.metrics()
+        self.assertEqual(max(live_connections, 1), metrics.live_connections)
+        self.assertEqual(metrics.live_connections, metrics.idle_connections)
+
+    def test_compile_select(self):
+        """Tests if filter and projection specifications are compiled into parameterized statements."""
+        query, parameters = _compile_select(
+            "Objects", columns=["id"], where={"tenant": "a", "object_type": ["user", "model"], "id": None})
+
+        self.assertEqual("SELECT id FROM Objects WHERE tenant = ? AND object_type IN (?, ?) AND id IS NULL", query)
+        self.assertEqual(("a", "user", "model"), parameters)
+
+        query, parameters = _compile_select("Models", where={"id": "a"}, paramstyle="named")
+
+        self.assertEqual("SELECT id, title FROM Models WHERE id = :id_0", query)
+        self.assertEqual({"id_0": "a"}, parameters)
+
+        with self.assertRaises(ValueError):
+            _compile_select("Models", columns=["id; DROP TABLE Models"])
+
+    def test_split_where(self):
+        """Tests if large IN lists are split into several filter specifications."""
+        where = {"tenant": "a", "id": [str(idx) for idx in range(25)]}
+        partial_wheres = _split_where(where, max_parameters=11)
+
+        self.assertEqual(3, len(partial_wheres))
+        self.assertEqual(where["id"], [value for partial_where in partial_wheres for value in partial_where["id"]])
+        self.assertTrue(all(partial_where["tenant"] == "a" for partial_where in partial_wheres))
+
+    def test_filtered_and_projected_loads(self):
+        """Tests if the DataLoader only loads the selected rows and columns."""
+        model_id = self.data_loader._load_data_from_database("SELECT model FROM ModelRevisions LIMIT 1")[0][0]
+        expected_ids = self.data_loader._load_data_from_database(
+            "SELECT id FROM ModelRevisions WHERE model = ?", (model_id,))
+
+        revisions = self.data_loader.get_model_revisions(where={"model": model_id}, columns=["id", "model"])
+
+        self.assertEqual(sorted(row[0] for row in expected_ids), sorted(revision.id for revision in revisions))
+        for revision in revisions:
+            self.assertEqual(model_id, revision.model)
+            self.assertIsNone(revision.author)
+            self.assertIsNone(revision.creation_date)
+
+    def test_model_revision_record(self):
+        """Tests if the compact records are immutable, picklable and convertible into dataclasses."""
+        record = ModelRevisionRecord("a", "b", "c", 1, 42)
+
+        with self.assertRaises(FrozenInstanceError):
+            record.creation_date = 43
+        self.assertFalse(hasattr(record, "__dict__"))
+        self.assertEqual(record, pickle.loads(pickle.dumps(record)))
+        self.assertEqual(ModelRevision("a", "b", "c", 1, 42), record.to_entity())
+
+    def test_model_revision_table(self):
+        """Tests if the columnar table hands out the same revisions as the DataLoader."""
+        revisions = self.data_loader.get_model_revisions()
+        table = self.data_loader.get_model_revision_table()
+
+        self.assertEqual(len(revisions), len(table))
+        self.assertEqual(revisions, list(table))
+        self.assertEqual(revisions[-1], table[-1])
+        self.assertEqual([revision.creation_date for revision in revisions], list(table.column("creation_date")))
+
+        table = ModelRevisionTable.from_rows([("a", "-".join(["model", "id"]), "b", 1, 42),
+                                              ("c", "model-id", "d", 2, 43)])
+        self.assertIs(table.column("model")[0], table.column("model")[1])
+        self.assertEqual(ModelRevisionRecord("c", "model-id", "d", 2, 43), table.record(1))
+
+    def test_entity_cache(self):
+        """Tests if repeated loads are served from the cache until the database changes."""
+        directory = tempfile.mkdtemp()
+        try:
+            database_file_path = os.path.join(directory, "cached.db")
+            shutil.copyfile(self.database_file_path, database_file_path)
+            data_loader = DataLoader(database_file_path, cache=LRUCache(max_size=100000, sizeof=len))
+
+            tenants = data_loader.get_tenants()
+            self.assertEqual(tenants, data_loader.get_tenants())
+            self.assertEqual(1, data_loader.cache.statistics().hits)
+
+            database = dbapi.connect(database_file_path)
+            database.execute("INSERT INTO Tenants (id, name) VALUES ('new-tenant', 'new-name')")
+            database.commit()
+            database.close()
+
+            self.assertEqual(tenants + [Tenant("new-tenant", "new-name")], data_loader.get_tenants())
+            self.assertEqual(1, data_loader.cache.statistics().invalidations)
+        finally:
+            shutil.rmtree(directory)
+
+    def test_entity_cache_key(self):
+        """Tests if equal specifications share a key and unhashable specifications are not cached."""
+        self.assertEqual(_entity_cache_key("a.db", "Objects", {"tenant": ["t1", "t2"]}, ["id"]),
+                         _entity_cache_key("a.db", "Objects", {"tenant": ("t2", "t1")}, ["id"]))
+        self.assertIsNone(_entity_cache_key("a.db", "Objects", {"tenant": [["t1"]]}, None))
+        self.assertIsNone(_entity_cache_key("a.db", "Objects", {"tenant": {"t1": 1}}, None))
+
+    def test_entity_index(self):
+        """Tests if the EntityIndex answers the application logic questions for a handcrafted set of entities."""
+        objects = [Object("t1", "tenant", "t1", 0), Object("t2", "tenant", "t2", 0),
+                   Object("u1", "user", "t1", 0), Object("u2", "user", "t1", 0), Object("u3", "user", "t1", 1),
+                   Object("u4", "user", "t2", 0),
+                   Object("m1", "model", "t1", 0), Object("m2", "model", "t1", 1), Object("m3", "model", "t2", 0),
+                   Object("r1", "revision", "t1", 0), Object("r2", "revision", "t1", 0),
+                   Object("r3", "revision", "t1", 0), Object("r4", "revision", "t1", 0),
+                   Object("r5", "revision", "t2", 0)]
+        models = [Model("m1", "b-title"), Model("m2", "a-title"), Model("m3", "c-title")]
+        users = [User("u1", "a", "a"), User("u2", "b", "b"), User("u3", "c", "c"), User("u4", "d", "d")]
+        revisions = [ModelRevision("r1", "m1", "u1", 1, 30), ModelRevision("r2", "m1", "u2", 2, 10),
+                     ModelRevision("r3", "m1", "u3", 3, 20), ModelRevision("r4", "m2", "u3", 1, 40),
+                     ModelRevision("r5", "m3", "u1", 1, 50)]
+
+        entity_index = EntityIndex(objects, models, users, revisions)
+
+        self.assertEqual([revisions[1], revisions[2], revisions[0]],
+                         entity_index.get_chronological_ordered_model_revisions("m1"))
+        self.assertEqual([], entity_index.get_chronological_ordered_model_revisions("unknown"))
+        self.assertEqual(sorted([users[0], users[1]], key=lambda user: user.id),
+                         sorted(entity_index.get_most_active_users("t1"), key=lambda user: user.id))
+        self.assertEqual([], entity_index.get_most_active_users("t2"))
+        self.assertEqual(["b-title"], entity_index.get_active_model_titles("t1"))
+
+        entity_index.get_chronological_ordered_model_revisions("m1")[0].creation_date = 99
+        entity_index.get_most_active_users("t1")[0].first_name = "changed"
+        self.assertEqual([10, 20, 30], [revision.creation_date
+                                        for revision in entity_index.get_chronological_ordered_model_revisions("m1")])
+        self.assertEqual({"a", "b"}, {user.first_name for user in entity_index.get_most_active_users("t1")})
+
+    def test_entity_index_is_cached(self):
+        """Tests if the index of an unchanged database is only built once."""
+        self.assertIs(EntityIndex.for_database(self.database_file_path),
+                      EntityIndex.for_database(self.database_file_path))
+
+    def test_get_chronological_ordered_model_revisions_many(self):
+        """Tests if the batch variant returns the same revisions as the single model function."""
+        model_ids = [row[0] for row in self.data_loader._load_data_from_database("SELECT id FROM Models LIMIT 5")]
+        revisions_by_model = get_chronological_ordered_model_revisions_many(self.database_file_path, model_ids)
+
+        self.assertEqual(set(model_ids), set(revisions_by_model))
+        for model_id in model_ids:
+            self.assertEqual(get_chronological_ordered_model_revisions(self.database_file_path, model_id),
+                             revisions_by_model[model_id])
+
+    def test_revisions_created_at_the_same_time(self):
+        """Tests if the single model and the batch variant order revisions created at the same time by their id."""
+        directory = tempfile.mkdtemp()
+        try:
+            database_file_path = os.path.join(directory, "revisions.db")
+            shutil.copyfile(self.database_file_path, database_file_path)
+            model_id, creation_date = self.data_loader._load_data_from_database(
+                "SELECT model, MIN(creation_date) FROM ModelRevisions GROUP BY model LIMIT 1")[0]
+
+            database = dbapi.connect(database_file_path)
+            for revision_id in ("tied-c", "tied-a", "tied-b"):
+                database.execute("INSERT INTO ModelRevisions VALUES (?, ?, 'author', 0, ?)",
+                                 (revision_id, model_id, creation_date))
+            database.commit()
+            database.close()
+
+            revisions = get_chronological_ordered_model_revisions(database_file_path, model_id)
+            self.assertEqual(revisions,
+                             get_chronological_ordered_model_revisions_many(database_file_path, [model_id])[model_id])
+            self.assertEqual(sorted(revision.id for revision in revisions if revision.creation_date == creation_date),
+                             [revision.id for revision in revisions if revision.creation_date == creation_date])
+        finally:
+            shutil.rmtree(directory)
+
+    def test_get_most_active_users_by_tenant(self):
+        """Tests if the batch variant returns the same users as the single tenant function for all tenants."""
+        tenant_ids = [tenant.id for tenant in self.data_loader.get_tenants()]
+        users_by_tenant = get_most_active_users_by_tenant(self.database_file_path)
+
+        self.assertEqual(set(tenant_ids), set(users_by_tenant))
+        for tenant_id in tenant_ids[:10]:
+            self.assertEqual(get_most_active_user(self.database_file_path, tenant_id), users_by_tenant[tenant_id])
+
+    def test_sort_string_list_pages(self):
+        """Tests if pages of the sorted list equal the corresponding slices of the fully sorted list."""
+        strings = [f"{chr(ord('a') + idx % 26)}{idx}" for idx in range(200)]
+        random.shuffle(strings)
+
+        for case_sensitive in (True, False):
+            sorted_strings = sort_string_list(strings, case_sensitive)
+            self.assertEqual(sorted_strings[:10], sort_string_list(strings, case_sensitive, limit=10))
+            self.assertEqual(sorted_strings[40:55], sort_string_list(strings, case_sensitive, limit=15, offset=40))
+            self.assertEqual(sorted_strings[190:], sort_string_list(strings, case_sensitive, offset=190))
+
+    def test_merge_sorted_string_list(self):
+        """Tests if merging new strings into a sorted list equals sorting all strings."""
+        strings = ["BaB", "aab", "Aab", "bab", "BAB", "cab", "Cab"]
+
+        for case_sensitive in (True, False):
+            sorted_strings = sort_string_list(strings[:4], case_sensitive)
+            merged_strings = merge_sorted_string_list(sorted_strings, strings[4:], case_sensitive)
+            self.assertEqual(sort_string_list(strings, case_sensitive), merged_strings)
+
+    def test_sort_string_list_unicode(self):
+        """Tests if accented and capital letters are sorted next to their base letters."""
+        strings = ["eb", "Éa", "ea", "éa", "Ea"]
+
+        self.assertEqual(["Ea", "ea", "Éa", "éa", "eb"], StringSorter(True).sort(strings))
+        self.assertEqual(["ea", "Ea", "Éa", "éa", "eb"], StringSorter(False).sort(strings))
+
+    def test_collation_keys_follow_the_locale(self):
+        """Tests if the cached keys of a locale aware sorter are recomputed after the collation locale changed."""
+        collation = locale.setlocale(locale.LC_COLLATE)
+        sorter = StringSorter(False, locale_aware=True)
+        try:
+            locale.setlocale(locale.LC_COLLATE, "C")
+            sorter.key("collated title")
+            misses = _collation_keys.cache_info().misses
+            sorter.key("collated title")
+            self.assertEqual(misses, _collation_keys.cache_info().misses)
+
+            try:
+                locale.setlocale(locale.LC_COLLATE, "C.UTF-8")
+            except locale.Error:
+                self.skipTest("requires the C.UTF-8 locale")
+            sorter.key("collated title")
+            self.assertEqual(misses + 1, _collation_keys.cache_info().misses)
+        finally:
+            locale.setlocale(locale.LC_COLLATE, collation)
+
+    def test_title_index(self):
+        """Tests if the TitleIndex keeps the titles ordered while models are added and marked for deletion."""
+        title_index = TitleIndex()
+        title_index.add_model("t1", "m1", "bab")
+        title_index.add_model("t1", "m2", "Aab")
+        title_index.add_model("t1", "m3", "aab")
+        title_index.add_model("t2", "m4", "cab")
+        title_index.add_model("t1", "m5", "BAB")
+
+        self.assertEqual(["Aab", "aab", "BAB", "bab"], title_index.get_titles("t1", case_sensitive=True))
+        self.assertEqual(["Aab", "aab", "bab", "BAB"], title_index.get_titles("t1", case_sensitive=False))
+        self.assertEqual(["BAB", "bab"],
+                         title_index.get_titles("t1", case_sensitive=True, after=TitleCursor("aab", "m3")))
+        self.assertEqual(["aab"], title_index.get_titles("t1", after=TitleCursor("Aab", "m2"), limit=1))
+
+        title_index.mark_model_for_deletion("m3")
+        title_index.add_model("t1", "m5", "cab")
+
+        self.assertEqual(["Aab", "bab", "cab"], title_index.get_titles("t1", case_sensitive=True))
+        self.assertEqual(["cab"], title_index.get_titles("t2"))
+
+    def test_title_index_pagination(self):
+        """Tests if paging through the titles of a tenant returns the complete ordered list."""
+        tenant_id = self.data_loader._load_data_from_database("""
+            SELECT tenant FROM Objects WHERE object_type = 'model' AND marked_for_deletion = 0
+            GROUP BY tenant ORDER BY COUNT(*) DESC LIMIT 1""")[0][0]
+        titles = get_ordered_list_of_active_model_titles(self.database_file_path, tenant_id)
+
+        pages = [get_ordered_list_of_active_model_titles(self.database_file_path, tenant_id, limit=3)]
+        while pages[-1].next_cursor is not None:
+            pages.append(get_ordered_list_of_active_model_titles(
+                self.database_file_path, tenant_id, after=pages[-1].next_cursor, limit=3))
+
+        self.assertEqual(titles, [title for page in pages for title in page])
+        self.assertTrue(all(pages))
+
+    def test_title_index_pagination_of_equal_titles(self):
+        """Tests if paging keeps all titles sharing a collation key with the last title of a page."""
+        title_index = TitleIndex()
+        for model_id, title in (("m1", "bab"), ("m2", "BAB"), ("m3", "cab"), ("m4", "cab"), ("m5", "dab")):
+            title_index.add_model("t1", model_id, title)
+        titles = title_index.get_titles("t1")
+        self.assertEqual(["bab", "BAB", "cab", "cab", "dab"], titles)
+        self.assertIsNone(titles.next_cursor)
+
+        for limit in range(1, 6):
+            pages = [title_index.get_titles("t1", limit=limit)]
+            while pages[-1].next_cursor is not None:
+                pages.append(title_index.get_titles("t1", after=pages[-1].next_cursor, limit=limit))
+            self.assertEqual(titles, [title for page in pages for title in page], limit)
+
+        cursor = title_index.get_titles("t1", limit=3).next_cursor
+        self.assertEqual(TitleCursor("cab", "m3"), cursor)
+        title_index.mark_model_for_deletion("m3")
+        self.assertEqual(["cab", "dab"], title_index.get_titles("t1", after=cursor))
+
+    def test_title_index_refresh(self):
+        """Tests if the TitleIndex of a database follows added models and models marked for deletion."""
+        directory = tempfile.mkdtemp()
+        try:
+            database_file_path = os.path.join(directory, "titles.db")
+            shutil.copyfile(self.database_file_path, database_file_path)
+            tenant_id = self.get_random_active_tenant(1)[0]
+            titles = get_ordered_list_of_active_model_titles(database_file_path, tenant_id)
+
+            database = dbapi.connect(database_file_path)
+            database.execute("INSERT INTO Objects VALUES ('new-model', 'model', ?, 0)", (tenant_id,))
+            database.execute("INSERT INTO Models VALUES ('new-model', 'aaaa-first-title')")
+            if titles:
+                database.execute("""
+                    UPDATE Objects SET marked_for_deletion = 1
+                    WHERE  id = (SELECT models.id FROM Models models, Objects objects
+                                 WHERE models.id = objects.id AND objects.tenant = ? AND models.title = ?)""",
+                                 (tenant_id, titles[-1]))
+            database.commit()
+            database.close()
+
+            expected_titles = ["aaaa-first-title"] + titles[:-1]
+            self.assertEqual(expected_titles, get_ordered_list_of_active_model_titles(database_file_path, tenant_id))
+        finally:
+            shutil.rmtree(directory)
+
+    def get_random_active_tenant(self, tenant_count):
+        """Returns the ids of several active tenants that own at least one active model.
+
+        Args:
+            tenant_count (int): Number of tenants to be tested.
+
+        Returns:
+            list: Returns a list of strings, each containing a tenant id.
+        """
+        tenant_ids = self.data_loader._load_data_from_database(
+            "SELECT tenant FROM Objects WHERE object_type='model' AND marked_for_deletion = 0 GROUP BY tenant")
+        return random.sample([tenant_id[0] for tenant_id in tenant_ids], tenant_count)
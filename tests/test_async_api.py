@@ -0,0 +1,93 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2019 CompuCom, All Rights Reserved
+# Created by Luis Fuentes
+
+"""This module contains all unit tests for the asyncio API."""
+
+import asyncio
+import time
+import unittest
+
+from resources.generate_database import get_database_file_path
+
+from coding_challenge import async_api, data_analysis_and_retrieval
+from coding_challenge.application_logic import DataLoader
+from coding_challenge.async_api import AsyncRunner, AsyncDataLoader, fetch_result_from_database, close_async_runner
+
+# a query that never finishes on its own
+_ENDLESS_QUERY = """
+    WITH RECURSIVE numbers(number) AS (SELECT 1 UNION ALL SELECT number + 1 FROM numbers)
+    SELECT COUNT(*) FROM numbers WHERE number < 0
+"""
+
+
+class TestAsyncAPI(unittest.TestCase):
+    """This class encapsulates all unit tests for the asyncio API."""
+
+    @classmethod
+    def setUpClass(cls):
+        """"Runs the global setup for the test class."""
+        cls.database_file_path = get_database_file_path()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Shuts the default runner down."""
+        close_async_runner()
+
+    def test_queries_run_concurrently(self):
+        """Tests if the async queries return the same results as the blocking ones when gathered."""
+        names = [function.__name__ for function in data_analysis_and_retrieval.QUERY_FUNCTIONS]
+
+        async def gather():
+            return await asyncio.gather(*[getattr(async_api, name)(self.database_file_path) for name in names])
+
+        results = asyncio.run(gather())
+
+        self.assertEqual([sorted(function(self.database_file_path))
+                          for function in data_analysis_and_retrieval.QUERY_FUNCTIONS],
+                         [sorted(result) for result in results])
+
+    def test_async_data_loader(self):
+        """Tests if the AsyncDataLoader returns the entities of the DataLoader."""
+        data_loader = AsyncDataLoader(self.database_file_path)
+
+        async def load():
+            return await asyncio.gather(data_loader.get_users(), data_loader.get_tenants(columns=["id"]))
+
+        users, tenants = asyncio.run(load())
+        self.assertEqual(DataLoader(self.database_file_path).get_users(), users)
+        self.assertEqual(DataLoader(self.database_file_path).get_tenants(columns=["id"]), tenants)
+
+    def test_timeout_interrupts_query(self):
+        """Tests if an expired timeout interrupts the running query and frees the worker."""
+        runner = AsyncRunner(max_workers=1)
+
+        async def run():
+            with self.assertRaises(asyncio.TimeoutError):
+                await runner.run(self.database_file_path, data_analysis_and_retrieval._fetch_result_from_database,
+                                 _ENDLESS_QUERY, self.database_file_path, timeout=0.1)
+
+            start = time.perf_counter()
+            result = await runner.run(self.database_file_path, data_analysis_and_retrieval.get_purple_tenants_count,
+                                      self.database_file_path, timeout=5)
+            return result, time.perf_counter() - start
+
+        result, seconds = asyncio.run(run())
+        self.assertEqual(data_analysis_and_retrieval.get_purple_tenants_count(self.database_file_path), result)
+        self.assertLess(seconds, 5)
+        runner.close()
+
+    def test_cancellation_interrupts_query(self):
+        """Tests if cancelling the awaiting task interrupts the running query."""
+
+        async def run():
+            task = asyncio.ensure_future(fetch_result_from_database(_ENDLESS_QUERY, self.database_file_path))
+            await asyncio.sleep(0.1)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            return await fetch_result_from_database("SELECT 1", self.database_file_path, timeout=5)
+
+        self.assertEqual([(1,)], asyncio.run(run()))
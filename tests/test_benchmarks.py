@@ -0,0 +1,100 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2019 CompuCom, All Rights Reserved
+# Created by Luis Fuentes
+
+"""This module contains all unit tests for the benchmark harness."""
+
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from benchmarks.__main__ import main
+from benchmarks.harness import run_benchmark, compare_reports, generate_benchmark_database, get_database_sample
+
+from coding_challenge.connection_pool import close_connection_pools
+
+
+def _result(benchmark, cold_seconds, warm_seconds, status="ok"):
+    """Returns a result entry of a report."""
+    return {"benchmark": benchmark, "scale": 1, "status": status, "cold_seconds": cold_seconds,
+            "warm_seconds": warm_seconds, "peak_memory_bytes": None, "error": None}
+
+
+class TestBenchmarks(unittest.TestCase):
+    """This class encapsulates all unit tests for the benchmark execution, the comparison and the report I/O."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Generates a single benchmark database for all tests."""
+        cls.directory = tempfile.mkdtemp()
+        cls.database_file_path = generate_benchmark_database(cls.directory, 1)
+        cls.sample = get_database_sample(cls.database_file_path)
+
+    @classmethod
+    def tearDownClass(cls):
+        """Removes the benchmark database."""
+        close_connection_pools()
+        shutil.rmtree(cls.directory)
+
+    def test_run_benchmark(self):
+        """Tests if a benchmark is measured and a failing benchmark is reported as error."""
+        calls = []
+        result = run_benchmark("test.ok", lambda path, sample: calls.append(sample), self.database_file_path,
+                               self.sample, 1, repeat=2)
+        self.assertEqual("ok", result.status)
+        self.assertEqual(4, len(calls))
+        self.assertGreaterEqual(result.cold_seconds, 0.0)
+        self.assertGreaterEqual(result.warm_seconds, 0.0)
+        self.assertIsNotNone(result.peak_memory_bytes)
+
+        def fail(path, sample):
+            raise ValueError("broken")
+
+        result = run_benchmark("test.error", fail, self.database_file_path, self.sample, 1)
+        self.assertEqual("error", result.status)
+        self.assertEqual("ValueError: broken", result.error)
+        self.assertIsNone(result.cold_seconds)
+
+    def test_compare_reports(self):
+        """Tests if regressions are found, while noise, missing metrics and zero runtimes are handled."""
+        baseline = {"results": [_result("slower", 1.0, 0.5), _result("faster", 1.0, 0.5), _result("noise", 0.0, 0.0),
+                                _result("zero", 0.0, 0.0), _result("missing", None, 0.5),
+                                _result("failed", 1.0, 1.0, "error")]}
+        current = {"results": [_result("slower", 1.5, 0.5), _result("faster", 0.5, 0.4), _result("noise", 0.0005, 0.0),
+                               _result("zero", 0.5, 0.0), _result("missing", 1.0, None), _result("failed", 2.0, 2.0),
+                               _result("new", 1.0, 1.0)]}
+
+        regressions = compare_reports(baseline, current)
+        self.assertEqual([("slower", "cold_seconds", 1.5), ("zero", "cold_seconds", float("inf"))],
+                         [(regression["benchmark"], regression["metric"], regression["ratio"])
+                          for regression in regressions])
+
+    def test_main_writes_and_compares_reports(self):
+        """Tests if the command line writes a JSON report and compares a later run against it."""
+        output_file_path = os.path.join(self.directory, "results.json")
+        arguments = ["--scales", "1", "--repeat", "1", "--directory", self.directory,
+                     "--select", "get_purple_tenants_count"]
+
+        with redirect_stdout(io.StringIO()) as output:
+            self.assertEqual(0, main(arguments + ["--output", output_file_path]))
+        self.assertIn("get_purple_tenants_count", output.getvalue())
+
+        with open(output_file_path) as output_file:
+            report = json.load(output_file)
+        self.assertEqual(["data_analysis_and_retrieval.get_purple_tenants_count"],
+                         [result["benchmark"] for result in report["results"]])
+        self.assertEqual("ok", report["results"][0]["status"])
+        self.assertEqual(self.sample.row_counts, report["databases"]["1"])
+
+        with redirect_stdout(io.StringIO()):
+            self.assertEqual(0, main(arguments + ["--compare", output_file_path, "--threshold", "1000"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2019 CompuCom, All Rights Reserved
+# Created by Luis Fuentes
+
+"""This module contains all unit tests for the in-process caches."""
+
+import os
+import shutil
+import sqlite3.dbapi2 as dbapi
+import tempfile
+import time
+import unittest
+
+from coding_challenge.caching import LRUCache, get_database_version
+
+
+class TestLRUCache(unittest.TestCase):
+    """This class encapsulates all unit tests for the LRUCache."""
+
+    def test_least_recently_used_entry_is_evicted(self):
+        """Tests if the least recently used entry is evicted first."""
+        cache = LRUCache(max_size=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+
+        self.assertEqual(1, cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(3, cache.get("c"))
+        self.assertEqual(1, cache.statistics().evictions)
+
+    def test_size_is_bounded(self):
+        """Tests if the sizes of the values are respected."""
+        cache = LRUCache(max_size=5, sizeof=len)
+        cache.put("a", [1, 2, 3])
+        cache.put("b", [1, 2, 3])
+        cache.put("c", [1, 2, 3, 4, 5, 6])
+
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual([1, 2, 3], cache.get("b"))
+        self.assertIsNone(cache.get("c"))
+        self.assertEqual(3, cache.statistics().size)
+
+    def test_versions_and_expiry(self):
+        """Tests if entries are only returned for their version and within their time to live."""
+        cache = LRUCache(ttl=0.05)
+        cache.put("a", 1, version=1)
+
+        self.assertEqual(1, cache.get("a", version=1))
+        self.assertIsNone(cache.get("a", version=2))
+
+        cache.put("a", 1, version=1)
+        time.sleep(0.06)
+        self.assertIsNone(cache.get("a", version=1))
+
+        statistics = cache.statistics()
+        self.assertEqual(2, statistics.invalidations)
+        self.assertAlmostEqual(1 / 3, statistics.hit_rate)
+
+    def test_invalidate(self):
+        """Tests if entries can be removed selectively."""
+        cache = LRUCache()
+        cache.put(("x", 1), 1)
+        cache.put(("y", 1), 2)
+        cache.invalidate(lambda key: key[0] == "x")
+
+        self.assertIsNone(cache.get(("x", 1)))
+        self.assertEqual(2, cache.get(("y", 1)))
+
+    def test_save_and_load(self):
+        """Tests if the entries survive saving and loading together with their versions."""
+        directory = tempfile.mkdtemp()
+        try:
+            cache = LRUCache()
+            cache.put("a", [1, 2], version=1)
+            cache.save(os.path.join(directory, "cache.pickle"))
+
+            loaded = LRUCache()
+            self.assertEqual(1, loaded.load(os.path.join(directory, "cache.pickle")))
+            self.assertEqual(0, loaded.load(os.path.join(directory, "missing.pickle")))
+            self.assertEqual([1, 2], loaded.get("a", version=1))
+            self.assertIsNone(loaded.get("a", version=2))
+        finally:
+            shutil.rmtree(directory)
+
+
+class TestDatabaseVersion(unittest.TestCase):
+    """This class encapsulates all unit tests for get_database_version."""
+
+    def setUp(self):
+        """Creates a small database for every test."""
+        self.directory = tempfile.mkdtemp()
+        self.database_file_path = os.path.join(self.directory, "version.db")
+
+        database = dbapi.connect(self.database_file_path)
+        database.execute("CREATE TABLE Dummy (value INTEGER)")
+        database.commit()
+        database.close()
+
+    def tearDown(self):
+        """Removes the database of the test."""
+        shutil.rmtree(self.directory)
+
+    def test_version_changes_on_commit(self):
+        """Tests if every committed transaction changes the version."""
+        versions = [get_database_version(self.database_file_path)]
+
+        database = dbapi.connect(self.database_file_path)
+        for value in range(3):
+            database.execute("INSERT INTO Dummy (value) VALUES (?)", (value,))
+            database.commit()
+            versions.append(get_database_version(self.database_file_path))
+        database.close()
+
+        self.assertEqual(len(versions), len(set(versions)))
+        self.assertEqual(versions[-1], get_database_version(self.database_file_path))
+
+    def test_missing_database(self):
+        """Tests if a missing database has no version."""
+        self.assertIsNone(get_database_version(os.path.join(self.directory, "missing.db")))
@@ -0,0 +1,181 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2019 CompuCom, All Rights Reserved
+# Created by Luis Fuentes
+
+"""This module contains all unit tests for the connection pool."""
+
+import os
+import shutil
+import sqlite3.dbapi2 as dbapi
+import tempfile
+import threading
+import unittest
+
+from coding_challenge.connection_pool import ConnectionPool, get_connection_pool, close_connection_pools
+
+
+class TestConnectionPool(unittest.TestCase):
+    """This class encapsulates all unit tests for the ConnectionPool."""
+
+    def setUp(self):
+        """Creates a small database for every test."""
+        self.directory = tempfile.mkdtemp()
+        self.database_file_path = os.path.join(self.directory, "pool.db")
+        self.create_database(1)
+
+    def tearDown(self):
+        """Removes the database of the test."""
+        close_connection_pools()
+        shutil.rmtree(self.directory)
+
+    def create_database(self, value):
+        """(Re)creates the test database containing a single value.
+
+        Args:
+            value (int): The value stored inside the database.
+        """
+        if os.path.isfile(self.database_file_path):
+            os.remove(self.database_file_path)
+
+        database = dbapi.connect(self.database_file_path)
+        database.execute("CREATE TABLE Dummy (value INTEGER)")
+        database.execute("INSERT INTO Dummy (value) VALUES (?)", (value,))
+        database.commit()
+        database.close()
+
+    def test_connections_are_reused(self):
+        """Tests if a returned connection is handed out again."""
+        pool = ConnectionPool(self.database_file_path)
+
+        with pool.connection() as database:
+            first_connection = database
+        with pool.connection() as database:
+            second_connection = database
+
+        self.assertIs(first_connection, second_connection)
+        self.assertEqual(1, pool.metrics().connects)
+        self.assertEqual(2, pool.metrics().checkouts)
+        pool.close()
+
+    def test_connections_are_read_only(self):
+        """Tests if the default connections reject writes."""
+        pool = ConnectionPool(self.database_file_path)
+
+        with pool.connection() as database:
+            with self.assertRaises(dbapi.OperationalError):
+                database.execute("INSERT INTO Dummy (value) VALUES (2)")
+        pool.close()
+
+    def test_pool_size_is_bounded(self):
+        """Tests if a checkout times out in case all connections are in use."""
+        pool = ConnectionPool(self.database_file_path, max_size=1, timeout=0.05)
+
+        with pool.connection():
+            with self.assertRaises(TimeoutError):
+                with pool.connection():
+                    pass
+
+        metrics = pool.metrics()
+        self.assertEqual(1, metrics.waits)
+        self.assertEqual(1, metrics.live_connections)
+        pool.close()
+
+    def test_replaced_database_is_detected(self):
+        """Tests if connections to a replaced database file are discarded."""
+        pool = ConnectionPool(self.database_file_path)
+
+        with pool.connection() as database:
+            self.assertEqual(1, database.execute("SELECT value FROM Dummy").fetchone()[0])
+
+        self.create_database(2)
+
+        with pool.connection() as database:
+            self.assertEqual(2, database.execute("SELECT value FROM Dummy").fetchone()[0])
+
+        self.assertEqual(1, pool.metrics().discards)
+        pool.close()
+
+    def test_concurrent_checkouts(self):
+        """Tests if concurrent threads never share a connection and never exceed the pool size."""
+        pool = ConnectionPool(self.database_file_path, max_size=3)
+        in_use = set()
+        lock = threading.Lock()
+        errors = []
+
+        def worker():
+            for _ in range(50):
+                with pool.connection() as database:
+                    with lock:
+                        if id(database) in in_use:
+                            errors.append("shared connection")
+                        in_use.add(id(database))
+                    database.execute("SELECT value FROM Dummy").fetchall()
+                    with lock:
+                        in_use.remove(id(database))
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        metrics = pool.metrics()
+        self.assertEqual([], errors)
+        self.assertEqual(400, metrics.checkouts)
+        self.assertLessEqual(metrics.connects, 3)
+        pool.close()
+
+    def test_pools_are_shared_by_path(self):
+        """Tests if the same pool is returned for the same database file."""
+        pool = get_connection_pool(self.database_file_path)
+
+        self.assertIs(pool, get_connection_pool(os.path.join(self.directory, ".", "pool.db")))
+        self.assertIsNot(pool, get_connection_pool(self.database_file_path, read_only=False))
+
+    @unittest.skipUnless(hasattr(os, "fork"), "requires fork")
+    def test_forked_child_opens_its_own_pool(self):
+        """Tests if a forked child process uses a new pool instead of the connections of its parent."""
+        pool = get_connection_pool(self.database_file_path)
+        with pool.connection() as database:
+            parent_connection = database
+
+        read_descriptor, write_descriptor = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            try:
+                child_pool = get_connection_pool(self.database_file_path)
+                with child_pool.connection() as database:
+                    value = database.execute("SELECT value FROM Dummy").fetchone()[0]
+                    result = f"{child_pool is not pool} {database is not parent_connection} {value}"
+            except BaseException as error:
+                result = repr(error)
+            os.write(write_descriptor, result.encode())
+            os._exit(0)
+
+        os.close(write_descriptor)
+        os.waitpid(pid, 0)
+        with os.fdopen(read_descriptor) as pipe:
+            self.assertEqual("True True 1", pipe.read())
+
+        with pool.connection() as database:
+            self.assertIs(parent_connection, database)
+        self.assertIs(pool, get_connection_pool(self.database_file_path))
+
+    def test_pinned_connection_is_shared(self):
+        """Tests if all checkouts of a thread share the pinned connection, even if the pool is exhausted."""
+        pool = ConnectionPool(self.database_file_path, max_size=1, timeout=0.05)
+
+        with pool.pinned() as pinned:
+            with pool.connection() as database:
+                with pool.connection() as nested:
+                    self.assertIs(pinned, database)
+                    self.assertIs(pinned, nested)
+
+        with pool.connection() as database:
+            self.assertIs(pinned, database)
+
+        self.assertEqual(2, pool.metrics().checkouts)
+        self.assertEqual(1, pool.metrics().idle_connections)
+        pool.close()
@@ -6,14 +6,21 @@
 
 """This module contains all unit tests for the first part of the coding challenge."""
 
+import atexit
+import os
+import shutil
+import tempfile
 import unittest
 import sqlite3.dbapi2 as dbapi
 
-from resources.generate_database import get_database_file_path
+from resources.generate_database import get_database_file_path, generate_tables, populate_database
 
+from coding_challenge.connection_pool import close_connection_pools
+from coding_challenge.tenant_stats import create_tenant_stats
 from coding_challenge.data_analysis_and_retrieval import get_purple_tenants_count, \
     get_active_tenants, get_model_count_of_largest_tenant, get_revision_heaviest_tenant_one, \
-    get_revision_heaviest_tenant_two, get_lazy_users
+    get_revision_heaviest_tenant_two, get_lazy_users, QUERY_RESULT_CACHE, clear_query_result_cache, \
+    persist_query_result_cache, _fetch_result_from_database, run_report_suite, QUERY_FUNCTIONS
 
 
 class DatabaseResultRetrievalScrambler:
@@ -247,3 +254,83 @@ class TestDataAnalysisAndRetrieval(unittest.TestCase):
             self.assertIn(lazy_user[0], expected_lazy_users)
 
 
+
+
+class TestCustomDataAnalysisAndRetrieval(unittest.TestCase):
+    """This class encapsulates the unit tests of the infrastructure around the Section 4 queries."""
+
+    def setUp(self):
+        """Generates a small database for every test."""
+        self.directory = tempfile.mkdtemp()
+        self.database_file_path = os.path.join(self.directory, "queries.db")
+        generate_tables(self.database_file_path)
+        populate_database(self.database_file_path, 1, 5)
+        clear_query_result_cache()
+
+    def tearDown(self):
+        """Removes the database of the test."""
+        clear_query_result_cache()
+        close_connection_pools()
+        shutil.rmtree(self.directory)
+
+    def test_query_results_are_cached(self):
+        """Tests if equivalent queries are answered from the cache until the database changes."""
+        query = "SELECT COUNT(*) FROM Objects WHERE object_type = ?"
+        hits = QUERY_RESULT_CACHE.statistics().hits
+
+        count = _fetch_result_from_database(query, self.database_file_path, ("user",))
+        self.assertEqual(count, _fetch_result_from_database(f"  {query.replace(' ', chr(10))}  ",
+                                                            self.database_file_path, ("user",)))
+        self.assertEqual(hits + 1, QUERY_RESULT_CACHE.statistics().hits)
+
+        database = dbapi.connect(self.database_file_path)
+        database.execute("INSERT INTO Objects (id, object_type, tenant) VALUES ('new', 'user', 'tenant')")
+        database.commit()
+        database.close()
+
+        self.assertEqual([(count[0][0] + 1,)], _fetch_result_from_database(query, self.database_file_path, ("user",)))
+
+    def test_string_literals_are_not_normalized(self):
+        """Tests if whitespace within string literals distinguishes queries."""
+        self.assertEqual([("a  b",)], _fetch_result_from_database("SELECT 'a  b'", self.database_file_path))
+        self.assertEqual([("a b",)], _fetch_result_from_database("SELECT 'a b'", self.database_file_path))
+
+    def test_query_results_are_persisted(self):
+        """Tests if persisted query results are loaded again."""
+        lazy_users = get_lazy_users(self.database_file_path)
+        cache_file_path = os.path.join(self.directory, "query_results.pickle")
+        QUERY_RESULT_CACHE.save(cache_file_path)
+
+        clear_query_result_cache(self.database_file_path)
+        self.assertEqual(0, len(QUERY_RESULT_CACHE))
+        self.assertEqual(1, persist_query_result_cache(cache_file_path))
+        atexit.unregister(QUERY_RESULT_CACHE.save)
+
+        hits = QUERY_RESULT_CACHE.statistics().hits
+        self.assertEqual(lazy_users, get_lazy_users(self.database_file_path))
+        self.assertEqual(hits + 1, QUERY_RESULT_CACHE.statistics().hits)
+
+    def test_report_suite(self):
+        """Tests if the report suite returns the answers of all query functions."""
+        suite = run_report_suite(self.database_file_path, workers=3, write_ahead_log=True)
+
+        self.assertEqual([function.__name__ for function in QUERY_FUNCTIONS], list(suite.results))
+        for function in QUERY_FUNCTIONS:
+            self.assertEqual(sorted(function(self.database_file_path)), sorted(suite.results[function.__name__]))
+
+        self.assertIn("object_counts", suite.timings)
+        self.assertGreaterEqual(suite.total_seconds, max(suite.timings.values()))
+
+        database = dbapi.connect(self.database_file_path)
+        self.assertEqual("wal", database.execute("PRAGMA journal_mode").fetchone()[0])
+        database.close()
+
+    def test_report_suite_uses_tenant_stats(self):
+        """Tests if the report suite answers from the TenantStats table in case it exists."""
+        expected = run_report_suite(self.database_file_path).results
+        create_tenant_stats(self.database_file_path)
+
+        suite = run_report_suite(self.database_file_path, workers=3)
+        self.assertEqual({function.__name__ for function in QUERY_FUNCTIONS}, set(suite.timings))
+        self.assertEqual({name: sorted(result) for name, result in expected.items()},
+                         {name: sorted(result) for name, result in suite.results.items()})
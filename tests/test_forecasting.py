@@ -6,11 +6,19 @@
 
 """This module contains all unit tests for the first part of the coding challenge."""
 
+import os
+import shutil
+import sqlite3.dbapi2 as dbapi
+import tempfile
 import unittest
 
-from resources.generate_database import get_database_file_path
+from resources.generate_database import get_database_file_path, generate_tables, populate_database
 
-from coding_challenge.forecasting import get_forecasted_model_revision_growth_rate
+from coding_challenge.application_logic import DataLoader, ModelRevisionTable
+from coding_challenge.connection_pool import close_connection_pools
+from coding_challenge.forecasting import get_forecasted_model_revision_growth_rate, get_growth_series, GrowthSeries, \
+    FORECAST_MODELS, backtest, backtest_models, select_forecast_model, ForecastState, forecast_incrementally, \
+    forecast_growth_by_tenant
 
 
 class TestForecasting(unittest.TestCase):
@@ -23,5 +31,190 @@ class TestForecasting(unittest.TestCase):
         self.assertEqual(3, len(forecast))
 
 
+class TestGrowthSeries(unittest.TestCase):
+    """This class encapsulates all unit tests for the GrowthSeries."""
+
+    def test_buckets(self):
+        """Tests if models and revisions are counted within their buckets."""
+        table = ModelRevisionTable.from_rows([("a", "m1", "u", 1, 3), ("b", "m1", "u", 2, 12), ("c", "m2", "u", 1, 14),
+                                              ("d", "m2", "u", 2, 35), ("e", "m1", "u", 3, 36)])
+        series = GrowthSeries.from_model_revision_table(table, 10)
+
+        self.assertEqual(0, series.first_bucket)
+        self.assertEqual([1, 1, 0, 0], list(series.model_counts))
+        self.assertEqual([1, 2, 0, 2], list(series.revision_counts))
+        self.assertEqual([2, 5, 5, 7], list(series.totals))
+        self.assertEqual([2.5, 1.0, 1.4], list(series.get_growth_rates()))
+
+    def test_sql_equals_python(self):
+        """Tests if the series bucketed by SQL equals the one bucketed in Python, and is cached per width."""
+        database_file_path = get_database_file_path()
+        table = DataLoader(database_file_path).get_model_revision_table()
+
+        for interval_width in (50, 1000):
+            series = get_growth_series(database_file_path, interval_width)
+            expected = GrowthSeries.from_model_revision_table(table, interval_width)
+
+            self.assertIs(series, get_growth_series(database_file_path, interval_width))
+            self.assertEqual(expected.first_bucket, series.first_bucket)
+            self.assertEqual(expected.model_counts, series.model_counts)
+            self.assertEqual(expected.revision_counts, series.revision_counts)
+            self.assertEqual(len(table), series.totals[-1] - sum(series.model_counts))
+
+        self.assertRaises(ValueError, get_growth_series, database_file_path, 0)
+
+
+class TestForecastModels(unittest.TestCase):
+    """This class encapsulates all unit tests for the forecasting models and their backtest."""
+
+    def test_models(self):
+        """Tests if all models forecast constant series as constant, and trend models extrapolate linear series."""
+        for model_name, model_factory in FORECAST_MODELS.items():
+            self.assertEqual([1.0, 1.0], model_factory().fit([]).forecast(2), model_name)
+            for value, forecast in zip([1.5] * 3, model_factory().fit([1.5] * 30).forecast(3)):
+                self.assertAlmostEqual(value, forecast, msg=model_name)
+
+        linear = [1 + 0.1 * idx for idx in range(30)]
+        for model_name in ("holt", "least_squares_trend"):
+            for value, forecast in zip([4.0, 4.1], FORECAST_MODELS[model_name]().fit(linear).forecast(2)):
+                self.assertAlmostEqual(value, forecast, msg=model_name)
+
+    def test_backtest(self):
+        """Tests if the backtest measures the errors of the models and selects the best one."""
+        linear = [1 + 0.1 * idx for idx in range(30)]
+        result = backtest(linear, "least_squares_trend", 3, origins=5)
+        self.assertEqual(5, result.origins)
+        self.assertAlmostEqual(0.0, result.mean_absolute_error)
+        self.assertGreater(backtest(linear, "moving_average", 3).mean_absolute_error, 0.1)
+        self.assertIsNone(backtest(linear[:12], "holt", 3).mean_absolute_error)
+
+        self.assertIn(select_forecast_model(linear, 3), ("holt", "least_squares_trend"))
+        self.assertEqual("geometric_mean", select_forecast_model(linear[:5], 3))
+
+    def test_backtest_models(self):
+        """Tests if the backtest of several interval widths is the same in worker processes."""
+        database_file_path = get_database_file_path()
+        results = backtest_models(database_file_path, [500, 1000], model_names=["holt", "moving_average"])
+        parallel_results = backtest_models(database_file_path, [500, 1000], model_names=["holt", "moving_average"],
+                                           workers=2)
+
+        self.assertEqual([(500, "holt"), (500, "moving_average"), (1000, "holt"), (1000, "moving_average")],
+                         [(result.interval_width, result.model) for result in results])
+        self.assertEqual([result.mean_absolute_error for result in results],
+                         [result.mean_absolute_error for result in parallel_results])
+
+        forecast = get_forecasted_model_revision_growth_rate(database_file_path, 500, 2, model_name="holt")
+        self.assertEqual(2, len(forecast))
+        self.assertTrue(all(growth_rate >= 1.0 for growth_rate in forecast))
+
+
+class TestForecastState(unittest.TestCase):
+    """This class encapsulates all unit tests for the incremental forecast."""
+
+    def setUp(self):
+        """Generates a small database for every test."""
+        self.directory = tempfile.mkdtemp()
+        self.database_file_path = os.path.join(self.directory, "forecast.db")
+        self.state_file_path = os.path.join(self.directory, "forecast.state")
+        generate_tables(self.database_file_path)
+        populate_database(self.database_file_path, 1, 37)
+
+    def tearDown(self):
+        """Removes the database of the test."""
+        close_connection_pools()
+        shutil.rmtree(self.directory)
+
+    def add_revisions(self, creation_dates):
+        """Adds revisions of an existing and of a new model."""
+        database = dbapi.connect(self.database_file_path)
+        model, author = database.execute("SELECT model, author FROM ModelRevisions LIMIT 1").fetchone()
+        for idx, creation_date in enumerate(creation_dates):
+            database.execute("INSERT INTO ModelRevisions VALUES (?, ?, ?, ?, ?)",
+                             (f"existing-{creation_date}", model, author, 100 + idx, creation_date))
+            database.execute("INSERT INTO ModelRevisions VALUES (?, ?, ?, ?, ?)",
+                             (f"new-{creation_date}", "new-model", author, idx, creation_date))
+        database.commit()
+        database.close()
+
+    def assertStateIsCurrent(self, state):
+        """Asserts that the state equals a state built from scratch."""
+        expected = get_growth_series(self.database_file_path, state.interval_width)
+        self.assertEqual(expected.first_bucket, state.series.first_bucket)
+        self.assertEqual(expected.totals, state.series.totals)
+        self.assertEqual(expected.model_counts, state.series.model_counts)
+
+        for intervals in (1, 4):
+            expected_forecast = get_forecasted_model_revision_growth_rate(self.database_file_path,
+                                                                          state.interval_width, intervals,
+                                                                          state.model_name)
+            for expected_growth_rate, growth_rate in zip(expected_forecast, state.forecast(intervals)):
+                self.assertAlmostEqual(expected_growth_rate, growth_rate)
+
+    def test_update(self):
+        """Tests if updates only add the new revisions and result in the same forecast as a full computation."""
+        state = ForecastState.build(self.database_file_path, 100, "holt")
+        self.assertStateIsCurrent(state)
+        self.assertEqual(0, state.update())
+
+        high_water_mark = state.high_water_mark
+        self.add_revisions([high_water_mark + 1, high_water_mark + 2])
+        self.assertEqual(4, state.update())
+        self.assertEqual(high_water_mark + 2, state.high_water_mark)
+        self.assertStateIsCurrent(state)
+
+        self.add_revisions([high_water_mark + 250, high_water_mark + 1000])
+        self.assertEqual(4, state.update())
+        self.assertStateIsCurrent(state)
+
+    def test_persisted_state(self):
+        """Tests if the state is persisted between incremental forecasts."""
+        forecast = forecast_incrementally(self.database_file_path, self.state_file_path, 100, 3)
+        state = ForecastState.load(self.state_file_path)
+        self.assertEqual(forecast, state.forecast(3))
+        self.assertIsNotNone(state.model_name)
+
+        self.add_revisions([state.high_water_mark + 500])
+        forecast_incrementally(self.database_file_path, self.state_file_path, 100, 3)
+        state = ForecastState.load(self.state_file_path)
+        self.assertStateIsCurrent(state)
+        self.assertIsNone(ForecastState.load(os.path.join(self.directory, "missing.state")))
+
+    def test_persisted_state_of_another_horizon(self):
+        """Tests if the state is built anew in case the number of forecasted intervals differs."""
+        forecast_incrementally(self.database_file_path, self.state_file_path, 100, 3)
+        self.assertEqual(3, ForecastState.load(self.state_file_path).horizon)
+
+        forecast = forecast_incrementally(self.database_file_path, self.state_file_path, 100, 5)
+        state = ForecastState.load(self.state_file_path)
+        self.assertEqual(5, state.horizon)
+        self.assertEqual(ForecastState.build(self.database_file_path, 100, horizon=5).forecast(5), forecast)
+
+
+class TestTenantForecasts(unittest.TestCase):
+    """This class encapsulates all unit tests for the forecasts per tenant."""
+
+    def test_forecast_growth_by_tenant(self):
+        """Tests if every tenant is forecasted from its own models, the same way by worker processes."""
+        database_file_path = get_database_file_path()
+        tenant_forecasts = forecast_growth_by_tenant(database_file_path, 1000, 3)
+        self.assertEqual(tenant_forecasts.forecasts,
+                         forecast_growth_by_tenant(database_file_path, 1000, 3, workers=2).forecasts)
+        self.assertEqual({"load", "forecast"}, set(tenant_forecasts.timings))
+
+        data_loader = DataLoader(database_file_path)
+        tenant_id = data_loader.get_models()[0].id
+        tenant_id = data_loader.get_objects(where={"id": tenant_id})[0].tenant
+        model_ids = [model.id for model in data_loader.get_objects(where={"tenant": tenant_id,
+                                                                          "object_type": "model"})]
+        table = data_loader.get_model_revision_table(where={"model": model_ids})
+        growth_rates = GrowthSeries.from_model_revision_table(table, 1000).get_growth_rates()
+
+        model_name = select_forecast_model(growth_rates, 3)
+        expected = FORECAST_MODELS[model_name]().fit(growth_rates).forecast(3)
+        self.assertEqual([max(1.0, growth_rate) for growth_rate in expected], tenant_forecasts.forecasts[tenant_id])
+        self.assertEqual(len(tenant_forecasts.forecasts),
+                         len({model.tenant for model in data_loader.get_objects(where={"object_type": "model"})}))
+
+
 class TestCustomApplicationLogic(unittest.TestCase):
     """This class encapsulates all user defined unit tests for the application logic part of the coding challenge."""
@@ -0,0 +1,130 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2019 CompuCom, All Rights Reserved
+# Created by Luis Fuentes
+
+"""This module contains all unit tests for the database generator."""
+
+import os
+import shutil
+import sqlite3.dbapi2 as dbapi
+import tempfile
+import unittest
+
+from resources.generate_database import generate_tables, populate_database, get_shard_scaling_factors, \
+    optimize_database, get_population_plan, get_random_tenant, get_random_user, get_models, generate_users, \
+    generate_models, generate_revisions
+
+
+class TestGenerateDatabase(unittest.TestCase):
+    """This class encapsulates all unit tests for the database generator."""
+
+    def setUp(self):
+        """Creates a directory for the generated databases."""
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Removes the generated databases."""
+        shutil.rmtree(self.directory)
+
+    def _generate(self, name, scaling_factor, seed, workers):
+        """Generates a database and returns all of its rows."""
+        database_file_path = os.path.join(self.directory, name)
+        generate_tables(database_file_path)
+        populate_database(database_file_path, scaling_factor, seed, workers)
+
+        database = dbapi.connect(database_file_path)
+        rows = {table: database.execute(f"SELECT * FROM {table} ORDER BY rowid").fetchall()
+                for table in ("Objects", "Tenants", "Users", "Models", "ModelRevisions")}
+        database.close()
+        return rows
+
+    @staticmethod
+    def _get_object_type(database_file_path, object_id):
+        """Returns the type of an object."""
+        database = dbapi.connect(database_file_path)
+        object_type = database.execute("SELECT object_type FROM Objects WHERE id = ?", (object_id,)).fetchone()[0]
+        database.close()
+        return object_type
+
+    def test_shard_scaling_factors(self):
+        """Tests if the scaling factor is split into balanced shards."""
+        self.assertEqual([1], get_shard_scaling_factors(1))
+        self.assertEqual([23], get_shard_scaling_factors(23))
+        self.assertEqual([12, 12], get_shard_scaling_factors(24))
+        self.assertEqual(1000, sum(get_shard_scaling_factors(1000)))
+
+    def test_population_plan(self):
+        """Tests if the lazy users are planned for the whole database instead of once per shard."""
+        for scaling_factor in (1, 23, 24, 1000):
+            plan = get_population_plan(scaling_factor, 7)
+            self.assertEqual(get_shard_scaling_factors(scaling_factor), [shard[0] for shard in plan])
+            self.assertTrue(100 <= sum(shard[1] for shard in plan) <= 300, scaling_factor)
+            self.assertLessEqual(max(shard[1] for shard in plan) - min(shard[1] for shard in plan), 1)
+            self.assertEqual(plan, get_population_plan(scaling_factor, 7))
+
+    def test_generation_is_reproducible(self):
+        """Tests if the same seed results in the same database, independent of the number of workers."""
+        rows = self._generate("single.db", 30, 7, 1)
+
+        self.assertEqual(rows, self._generate("parallel.db", 30, 7, 2))
+        self.assertNotEqual(rows, self._generate("other_seed.db", 30, 8, 1))
+
+        self.assertEqual(len(rows["Objects"]), sum(len(rows[table]) for table in
+                                                   ("Tenants", "Users", "Models", "ModelRevisions")))
+        self.assertEqual(len(rows["Objects"]), len({row[0] for row in rows["Objects"]}))
+
+    def test_optimize_database(self):
+        """Tests if the optimization keeps all rows and triggers and creates the indexes."""
+        database_file_path = os.path.join(self.directory, "optimized.db")
+        generate_tables(database_file_path)
+        populate_database(database_file_path, 2, 3)
+
+        database = dbapi.connect(database_file_path)
+        database.execute("CREATE TRIGGER Models_insert AFTER INSERT ON Models BEGIN SELECT 1; END")
+        database.commit()
+        rows = {table: sorted(database.execute(f"SELECT * FROM {table}").fetchall())
+                for table in ("Objects", "Tenants", "Users", "Models", "ModelRevisions")}
+        database.close()
+
+        report = optimize_database(database_file_path)
+        self.assertEqual({"before", "after"}, set(report["file_size"]))
+
+        database = dbapi.connect(database_file_path)
+        for table, table_rows in rows.items():
+            self.assertEqual(table_rows, sorted(database.execute(f"SELECT * FROM {table}").fetchall()))
+
+        schema = dict(database.execute("SELECT name, sql FROM sqlite_master").fetchall())
+        database.close()
+
+        self.assertIn("WITHOUT ROWID", schema["Objects"])
+        self.assertIn("Models_insert", schema)
+        self.assertIn("Objects_tenant_type", schema)
+        self.assertIn("ModelRevisions_model", schema)
+        for index in ("Tenants_id", "Users_id", "Models_id"):
+            self.assertNotIn("UNIQUE", schema[index])
+
+    def test_generate_after_optimize_database(self):
+        """Tests if the generator helpers work on an optimized database, whose Objects table has no rowid."""
+        database_file_path = os.path.join(self.directory, "optimized.db")
+        generate_tables(database_file_path)
+        populate_database(database_file_path, 2, 3)
+        models = get_models(database_file_path)
+        optimize_database(database_file_path)
+
+        self.assertEqual(sorted(models), get_models(database_file_path))
+        self.assertEqual("tenant", self._get_object_type(database_file_path, get_random_tenant(database_file_path)[0]))
+        tenant_id = get_random_user(database_file_path)[1]
+        self.assertEqual(tenant_id, get_random_user(database_file_path, tenant_id)[1])
+
+        generate_users(database_file_path, 1)
+        generate_models(database_file_path, 1)
+        generate_revisions(database_file_path)
+
+        database = dbapi.connect(database_file_path)
+        object_count = database.execute("SELECT COUNT(*) FROM Objects").fetchone()[0]
+        table_count = sum(database.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                          for table in ("Tenants", "Users", "Models", "ModelRevisions"))
+        database.close()
+        self.assertEqual(object_count, table_count)
@@ -0,0 +1,120 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2019 CompuCom, All Rights Reserved
+# Created by Luis Fuentes
+
+"""This module contains all unit tests for the instrumentation."""
+
+import json
+import os
+import pstats
+import shutil
+import tempfile
+import tracemalloc
+import unittest
+
+from resources.generate_database import generate_tables, populate_database
+
+from coding_challenge import instrumentation
+from coding_challenge.application_logic import DataLoader
+from coding_challenge.connection_pool import close_connection_pools
+from coding_challenge.data_analysis_and_retrieval import get_purple_tenants_count, clear_query_result_cache
+from coding_challenge.instrumentation import enable_instrumentation, disable_instrumentation, reset_metrics, \
+    get_metrics, flush, phase, count, profiled, JsonLinesSink, PrometheusSink
+
+
+class TestInstrumentation(unittest.TestCase):
+    """This class encapsulates all unit tests for the phase measurements, the sinks and the profiling hook."""
+
+    def setUp(self):
+        """Generates a small database for every test."""
+        self.directory = tempfile.mkdtemp()
+        self.database_file_path = os.path.join(self.directory, "instrumentation.db")
+        generate_tables(self.database_file_path)
+        populate_database(self.database_file_path, 1, 11)
+        clear_query_result_cache()
+        reset_metrics()
+
+    def tearDown(self):
+        """Disables the instrumentation and removes the database of the test."""
+        disable_instrumentation()
+        reset_metrics()
+        clear_query_result_cache()
+        close_connection_pools()
+        shutil.rmtree(self.directory)
+
+    def test_phases_and_sinks(self):
+        """Tests if loading and querying is measured per phase and written to the sinks."""
+        jsonl_file_path = os.path.join(self.directory, "metrics.jsonl")
+        prometheus_file_path = os.path.join(self.directory, "metrics.prom")
+        enable_instrumentation([JsonLinesSink(jsonl_file_path), PrometheusSink(prometheus_file_path)])
+        cache_statistics = get_metrics()["caches"]["query_result"]
+
+        model_revisions = DataLoader(self.database_file_path, cache=None).get_model_revisions()
+        get_purple_tenants_count(self.database_file_path)
+        get_purple_tenants_count(self.database_file_path)
+        count("test.events", 2)
+
+        metrics = flush()
+        self.assertEqual(len(model_revisions), metrics["phases"]["data_loader.construct"]["rows"])
+        self.assertGreater(metrics["phases"]["query.fetch"]["rows"], len(model_revisions) - 1)
+        self.assertGreater(metrics["phases"]["query.execute"]["calls"], 1)
+        self.assertEqual(2, metrics["counters"]["test.events"])
+        self.assertGreater(metrics["counters"]["connection.checkouts"], 1)
+        self.assertEqual(cache_statistics["hits"] + 1, metrics["caches"]["query_result"]["hits"])
+        self.assertEqual(cache_statistics["misses"] + 1, metrics["caches"]["query_result"]["misses"])
+
+        with open(jsonl_file_path) as jsonl_file:
+            lines = jsonl_file.readlines()
+        self.assertEqual(1, len(lines))
+        self.assertEqual(metrics["phases"], json.loads(lines[0])["phases"])
+
+        with open(prometheus_file_path) as prometheus_file:
+            prometheus_text = prometheus_file.read()
+        calls = metrics["phases"]["query.execute"]["calls"]
+        self.assertIn(f'coding_challenge_phase_calls_total{{phase="query.execute"}} {calls}', prometheus_text)
+        hit_rate = metrics["caches"]["query_result"]["hit_rate"]
+        self.assertIn(f'coding_challenge_cache_hit_rate{{cache="query_result"}} {hit_rate}', prometheus_text)
+        checkouts = metrics["counters"]["connection.checkouts"]
+        self.assertIn(f'coding_challenge_connection_checkouts_total {checkouts}', prometheus_text)
+
+    def test_disabled(self):
+        """Tests if nothing is measured while the instrumentation is disabled."""
+        self.assertFalse(instrumentation.is_enabled())
+        DataLoader(self.database_file_path, cache=None).get_model_revisions()
+        with phase("test.phase") as measurement:
+            measurement.add_rows(1)
+        count("test.events")
+
+        metrics = get_metrics()
+        self.assertEqual({}, metrics["phases"])
+        self.assertEqual({}, metrics["counters"])
+
+    def test_trace_memory(self):
+        """Tests if tracemalloc is only stopped on disabling, in case it was started by the instrumentation."""
+        enable_instrumentation([], trace_memory=True)
+        self.assertTrue(tracemalloc.is_tracing())
+        disable_instrumentation()
+        self.assertFalse(tracemalloc.is_tracing())
+
+        tracemalloc.start()
+        try:
+            enable_instrumentation([], trace_memory=True)
+            disable_instrumentation()
+            self.assertTrue(tracemalloc.is_tracing())
+        finally:
+            tracemalloc.stop()
+
+    def test_profiled(self):
+        """Tests if the profiling hook dumps statistics readable by pstats."""
+        stats_file_path = os.path.join(self.directory, "load.prof")
+        with profiled(stats_file_path):
+            DataLoader(self.database_file_path, cache=None).get_model_revisions()
+
+        statistics = pstats.Stats(stats_file_path)
+        self.assertTrue(any(function_name == "_load_entities" for _, _, function_name in statistics.stats))
+
+
+if __name__ == "__main__":
+    unittest.main()
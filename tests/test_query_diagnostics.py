@@ -0,0 +1,85 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2019 CompuCom, All Rights Reserved
+# Created by Luis Fuentes
+
+"""This module contains all unit tests for the query diagnostics."""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from resources.generate_database import generate_tables, populate_database
+
+from coding_challenge import data_analysis_and_retrieval, forecasting
+from coding_challenge.connection_pool import close_connection_pools
+from coding_challenge.data_analysis_and_retrieval import _fetch_result_from_database, _LATEST_MODEL_TITLE_QUERY
+from coding_challenge.query_diagnostics import diagnose_queries, format_report
+
+
+class TestQueryDiagnostics(unittest.TestCase):
+    """This class encapsulates all unit tests for the query diagnostics."""
+
+    def setUp(self):
+        """Generates a small database without any indexes for every test."""
+        self.directory = tempfile.mkdtemp()
+        self.database_file_path = os.path.join(self.directory, "diagnostics.db")
+        generate_tables(self.database_file_path)
+        populate_database(self.database_file_path, 1, 11)
+
+    def tearDown(self):
+        """Removes the database of the test."""
+        close_connection_pools()
+        shutil.rmtree(self.directory)
+
+    def test_full_scans_are_detected(self):
+        """Tests if the full scans of the lazy users query are found and indexes are suggested for them."""
+        diagnoses = diagnose_queries(self.database_file_path, [data_analysis_and_retrieval.get_lazy_users])
+
+        self.assertEqual(1, len(diagnoses))
+        self.assertEqual("get_lazy_users", diagnoses[0].function)
+        self.assertEqual(2, len(diagnoses[0].full_scans))
+        self.assertTrue(any("ModelRevisions (author)" in index for index in diagnoses[0].suggested_indexes))
+        self.assertIsNone(diagnoses[0].runtime_seconds_after)
+
+    def test_suggested_indexes_are_created(self):
+        """Tests if creating the suggested indexes reduces the problems without changing the results."""
+        results = [sorted(function(self.database_file_path))
+                   for function in data_analysis_and_retrieval.QUERY_FUNCTIONS]
+        before = diagnose_queries(self.database_file_path, create_indexes=True)
+        after = diagnose_queries(self.database_file_path)
+
+        self.assertEqual([diagnosis.function for diagnosis in before], [diagnosis.function for diagnosis in after])
+        self.assertLess(sum(diagnosis.problems for diagnosis in after), sum(diagnosis.problems for diagnosis in before))
+        self.assertTrue(all(diagnosis.runtime_seconds_after is not None for diagnosis in before))
+        self.assertEqual(results, [sorted(function(self.database_file_path))
+                                   for function in data_analysis_and_retrieval.QUERY_FUNCTIONS])
+
+    def test_parameterized_queries(self):
+        """Tests if the parameters of the recorded queries are bound when their plans are explained."""
+        def get_latest_model_title(database_file_path):
+            return _fetch_result_from_database(_LATEST_MODEL_TITLE_QUERY, database_file_path, ("tenant",))
+
+        def get_growth_series(database_file_path):
+            forecasting.clear_growth_series_cache()
+            return forecasting.get_growth_series(database_file_path, 50)
+
+        diagnoses = diagnose_queries(self.database_file_path, [get_latest_model_title, get_growth_series])
+
+        self.assertEqual(["get_latest_model_title", "get_growth_series"],
+                         [diagnosis.function for diagnosis in diagnoses])
+        self.assertEqual(("tenant",), diagnoses[0].parameters)
+        self.assertEqual((50,), diagnoses[1].parameters)
+        self.assertTrue(all(diagnosis.plan for diagnosis in diagnoses))
+
+    def test_format_report(self):
+        """Tests if the report can be formatted as JSON and as table."""
+        diagnoses = diagnose_queries(self.database_file_path)
+
+        report = json.loads(format_report(diagnoses, "json"))
+        self.assertEqual(len(diagnoses), len(report))
+        self.assertIn("suggested_indexes", report[0])
+        self.assertIn("get_active_tenants", format_report(diagnoses))
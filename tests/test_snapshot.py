@@ -0,0 +1,106 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2019 CompuCom, All Rights Reserved
+# Created by Luis Fuentes
+
+"""This module contains all unit tests for the columnar snapshots."""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from resources.generate_database import generate_tables, populate_database
+
+from coding_challenge.application_logic import DataLoader, EntityIndex
+from coding_challenge.connection_pool import close_connection_pools
+from coding_challenge.snapshot import export_snapshot, SnapshotLoader
+
+
+class TestSnapshot(unittest.TestCase):
+    """This class encapsulates all unit tests for the export and the SnapshotLoader."""
+
+    def setUp(self):
+        """Generates a small database and exports it for every test."""
+        self.directory = tempfile.mkdtemp()
+        self.database_file_path = os.path.join(self.directory, "snapshot.db")
+        self.snapshot_path = os.path.join(self.directory, "snapshot")
+        generate_tables(self.database_file_path)
+        populate_database(self.database_file_path, 1, 31)
+        export_snapshot(self.database_file_path, self.snapshot_path)
+
+        self.data_loader = DataLoader(self.database_file_path, cache=None)
+        self.snapshot_loader = SnapshotLoader(self.snapshot_path)
+
+    def tearDown(self):
+        """Removes the database and the snapshot of the test."""
+        close_connection_pools()
+        shutil.rmtree(self.directory)
+
+    def test_entities_equal_database(self):
+        """Tests if the SnapshotLoader loads the same entities as the DataLoader."""
+        for method in ("get_model_revisions", "get_users", "get_objects", "get_tenants", "get_models"):
+            self.assertEqual(getattr(self.data_loader, method)(), getattr(self.snapshot_loader, method)(), method)
+
+        self.assertEqual(list(self.data_loader.get_model_revision_table()),
+                         list(self.snapshot_loader.get_model_revision_table()))
+        self.assertEqual(list(self.data_loader.get_object_table()), list(self.snapshot_loader.get_object_table()))
+
+        self.assertEqual(EntityIndex.from_data_loader(self.data_loader).most_active_user_ids_by_tenant,
+                         EntityIndex.from_data_loader(self.snapshot_loader).most_active_user_ids_by_tenant)
+
+    def test_filter_and_projection(self):
+        """Tests if the filter and projection specification is applied like by the DataLoader."""
+        tenant_ids = [tenant.id for tenant in self.data_loader.get_tenants()][:3]
+        specifications = [
+            {"where": {"tenant": tenant_ids[0], "object_type": "user"}, "columns": ["id", "marked_for_deletion"]},
+            {"where": {"tenant": tenant_ids, "marked_for_deletion": [1]}},
+            {"where": {"tenant": None}},
+            {"where": {"tenant": []}},
+            {"where": {"tenant": "unknown"}},
+        ]
+        for specification in specifications:
+            self.assertEqual(self.data_loader.get_objects(**specification),
+                             self.snapshot_loader.get_objects(**specification), specification)
+            self.assertEqual(list(self.data_loader.get_object_table(specification["where"])),
+                             list(self.snapshot_loader.get_object_table(specification["where"])), specification)
+
+        self.assertRaises(ValueError, self.snapshot_loader.get_objects, columns=["unknown"])
+
+    def test_empty_database(self):
+        """Tests if an empty database is exported into an empty snapshot, replacing the existing one."""
+        empty_database_file_path = os.path.join(self.directory, "empty.db")
+        generate_tables(empty_database_file_path)
+        export_snapshot(empty_database_file_path, self.snapshot_path)
+
+        snapshot_loader = SnapshotLoader(self.snapshot_path)
+        self.assertEqual([], snapshot_loader.get_model_revisions())
+        self.assertEqual(0, len(snapshot_loader.get_model_revision_table()))
+        self.assertEqual([], [name for name in os.listdir(self.directory) if name.startswith(".snapshot-")])
+
+    def test_replace_keeps_the_old_snapshot(self):
+        """Tests if the old snapshot is kept readable while replaced and restored in case the swap fails."""
+        model_revisions = self.snapshot_loader.get_model_revisions()
+        export_snapshot(self.database_file_path, self.snapshot_path)
+        self.assertEqual(model_revisions, self.snapshot_loader.get_model_revisions())
+
+        replace = os.replace
+        destinations = []
+
+        def interrupted_replace(source, destination):
+            destinations.append(destination)
+            if len(destinations) == 2:
+                raise OSError("interrupted")
+            replace(source, destination)
+
+        with mock.patch("os.replace", interrupted_replace):
+            self.assertRaises(OSError, export_snapshot, self.database_file_path, self.snapshot_path)
+
+        self.assertEqual(model_revisions, SnapshotLoader(self.snapshot_path).get_model_revisions())
+        self.assertEqual([], [name for name in os.listdir(self.directory) if name.startswith(".snapshot-")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2019 CompuCom, All Rights Reserved
+# Created by Luis Fuentes
+
+"""This module contains all unit tests for the materialized tenant statistics."""
+
+import os
+import shutil
+import sqlite3.dbapi2 as dbapi
+import tempfile
+import unittest
+
+from resources.generate_database import generate_tables, populate_database, optimize_database
+
+from coding_challenge.connection_pool import close_connection_pools
+from coding_challenge.data_analysis_and_retrieval import QUERY_FUNCTIONS
+from coding_challenge.tenant_stats import create_tenant_stats, drop_tenant_stats, refresh_tenant_stats, \
+    has_tenant_stats, get_tenant_stats
+
+
+class TestTenantStats(unittest.TestCase):
+    """This class encapsulates all unit tests for the TenantStats table."""
+
+    def setUp(self):
+        """Generates a small database for every test."""
+        self.directory = tempfile.mkdtemp()
+        self.database_file_path = os.path.join(self.directory, "stats.db")
+        generate_tables(self.database_file_path)
+        populate_database(self.database_file_path, 1, 17)
+
+    def tearDown(self):
+        """Removes the database of the test."""
+        close_connection_pools()
+        shutil.rmtree(self.directory)
+
+    def answers(self):
+        """Returns the sorted answers of all Section 4 functions."""
+        return [sorted(function(self.database_file_path)) for function in QUERY_FUNCTIONS]
+
+    def stats(self):
+        """Returns all rows of the TenantStats table."""
+        database = dbapi.connect(self.database_file_path)
+        rows = database.execute("SELECT * FROM TenantStats ORDER BY tenant").fetchall()
+        database.close()
+        return rows
+
+    def test_answers_are_unchanged(self):
+        """Tests if the Section 4 functions return the same answers from the TenantStats table."""
+        answers = self.answers()
+        self.assertFalse(has_tenant_stats(self.database_file_path))
+
+        create_tenant_stats(self.database_file_path)
+        self.assertTrue(has_tenant_stats(self.database_file_path))
+        self.assertEqual(answers, self.answers())
+
+        drop_tenant_stats(self.database_file_path)
+        self.assertFalse(has_tenant_stats(self.database_file_path))
+
+    def test_create_replaces_the_table(self):
+        """Tests if creating the table again replaces the table and its triggers."""
+        create_tenant_stats(self.database_file_path)
+        stats = self.stats()
+        create_tenant_stats(self.database_file_path)
+
+        self.assertEqual(stats, self.stats())
+        self.assert_triggers_maintain_the_statistics()
+
+    def test_writes_after_drop(self):
+        """Tests if the triggers are dropped with the table, so that Objects and ModelRevisions stay writable."""
+        create_tenant_stats(self.database_file_path)
+        drop_tenant_stats(self.database_file_path)
+
+        database = dbapi.connect(self.database_file_path)
+        model = database.execute("SELECT id FROM Models LIMIT 1").fetchone()[0]
+        database.execute("INSERT INTO Objects VALUES ('new-revision', 'revision', 'tenant', 0)")
+        database.execute("UPDATE Objects SET marked_for_deletion = 1 WHERE id = ?", (model,))
+        database.execute("INSERT INTO ModelRevisions VALUES ('new-revision', ?, 'author', 1, 999999999)", (model,))
+        database.execute("UPDATE ModelRevisions SET creation_date = 0 WHERE id = 'new-revision'")
+        database.execute("DELETE FROM ModelRevisions WHERE id = 'new-revision'")
+        database.execute("DELETE FROM Objects WHERE id = 'new-revision'")
+        database.commit()
+        triggers = database.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'").fetchall()
+        database.close()
+
+        self.assertEqual([], triggers)
+
+    def assert_triggers_maintain_the_statistics(self):
+        """Asserts that the triggers keep the table equal to a recomputation after inserts, updates and deletes."""
+        database = dbapi.connect(self.database_file_path)
+        tenant, model = database.execute("""
+            SELECT tenant, id FROM Objects WHERE object_type = 'model' AND marked_for_deletion = 0 LIMIT 1
+        """).fetchone()
+        author = database.execute("SELECT id FROM Objects WHERE object_type = 'user' AND tenant = ?",
+                                  (tenant,)).fetchone()[0]
+
+        database.execute("INSERT INTO Objects VALUES ('new-user', 'user', ?, 0)", (tenant,))
+        database.execute("INSERT INTO Objects VALUES ('new-revision', 'revision', ?, 0)", (tenant,))
+        database.execute("INSERT INTO ModelRevisions VALUES ('new-revision', ?, ?, 99, 999999999)", (model, author))
+        database.commit()
+        self.assertEqual(999999999, get_tenant_stats(self.database_file_path, tenant).latest_edit)
+
+        database.execute("DELETE FROM Models WHERE id = ?", (model,))
+        database.commit()
+        self.assertNotEqual(model, get_tenant_stats(self.database_file_path, tenant).latest_model)
+        database.execute("INSERT INTO Models VALUES (?, 'title')", (model,))
+        database.commit()
+        self.assertEqual(999999999, get_tenant_stats(self.database_file_path, tenant).latest_edit)
+
+        database.execute("UPDATE Objects SET marked_for_deletion = 1 WHERE id = ?", (model,))
+        database.execute("UPDATE Objects SET tenant = 'other-tenant' WHERE id = 'new-user'")
+        database.execute("DELETE FROM ModelRevisions WHERE id = (SELECT MIN(id) FROM ModelRevisions)")
+        database.execute("DELETE FROM Objects WHERE id = (SELECT MIN(id) FROM Objects WHERE object_type = 'user')")
+        database.commit()
+        database.close()
+
+        maintained = self.stats()
+        refresh_tenant_stats(self.database_file_path)
+        self.assertEqual(self.stats(), maintained)
+        self.assertEqual(1, get_tenant_stats(self.database_file_path, "other-tenant").active_users)
+
+    def test_triggers_maintain_the_statistics(self):
+        """Tests if the triggers keep the table equal to a recomputation after inserts, updates and deletes."""
+        create_tenant_stats(self.database_file_path)
+        self.assert_triggers_maintain_the_statistics()
+
+    def test_optimize_database_keeps_the_triggers(self):
+        """Tests if the statistics are still maintained after the database was optimized."""
+        create_tenant_stats(self.database_file_path)
+        answers = self.answers()
+        optimize_database(self.database_file_path)
+
+        self.assertEqual(answers, self.answers())
+        self.assert_triggers_maintain_the_statistics()
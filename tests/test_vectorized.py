@@ -0,0 +1,110 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2019 CompuCom, All Rights Reserved
+# Created by Luis Fuentes
+
+"""This module contains all unit tests for the vectorized engine of the application logic."""
+
+import os
+import shutil
+import sqlite3.dbapi2 as dbapi
+import tempfile
+import unittest
+
+from resources.generate_database import generate_tables, populate_database
+
+from coding_challenge.application_logic import DataLoader, EntityIndex
+from coding_challenge.connection_pool import close_connection_pools
+from coding_challenge.vectorized import NUMPY_AVAILABLE, VectorizedIndex
+
+
+@unittest.skipUnless(NUMPY_AVAILABLE, "NumPy is not installed")
+class TestVectorizedIndex(unittest.TestCase):
+    """This class encapsulates all unit tests for the VectorizedIndex."""
+
+    def setUp(self):
+        """Generates a small database for every test."""
+        self.directory = tempfile.mkdtemp()
+        self.database_file_path = os.path.join(self.directory, "vectorized.db")
+        generate_tables(self.database_file_path)
+        populate_database(self.database_file_path, 1, 29)
+
+    def tearDown(self):
+        """Removes the database of the test."""
+        close_connection_pools()
+        shutil.rmtree(self.directory)
+
+    def assertIndexesEqual(self):
+        """Asserts that the VectorizedIndex returns the same answers as the EntityIndex."""
+        data_loader = DataLoader(self.database_file_path, cache=None)
+        expected = EntityIndex.from_data_loader(data_loader)
+        index = VectorizedIndex.from_data_loader(data_loader)
+
+        self.assertEqual(expected.tenant_ids, index.tenant_ids)
+        for tenant_id in expected.tenant_ids + ["unknown"]:
+            self.assertEqual(expected.get_most_active_users(tenant_id), index.get_most_active_users(tenant_id))
+            self.assertEqual(expected.get_active_model_titles(tenant_id), index.get_active_model_titles(tenant_id))
+        for model_id in list(expected.models_by_id) + ["unknown"]:
+            self.assertEqual(expected.get_chronological_ordered_model_revisions(model_id),
+                             index.get_chronological_ordered_model_revisions(model_id))
+
+        self.assertEqual({author: count for revision_counts in expected.revision_counts_by_tenant.values()
+                          for author, count in revision_counts.items()}, index.get_revision_counts_by_author())
+
+    def test_answers_equal_entity_index(self):
+        """Tests if the VectorizedIndex answers like the EntityIndex."""
+        self.assertIndexesEqual()
+
+    def test_ties_and_deleted_users(self):
+        """Tests if ties, deleted authors and authors of other tenants are handled like by the EntityIndex."""
+        database = dbapi.connect(self.database_file_path)
+        tenant, model = database.execute("""
+            SELECT tenant, id FROM Objects WHERE object_type = 'model' LIMIT 1
+        """).fetchone()
+        other_tenant = database.execute("SELECT id FROM Tenants WHERE id != ? LIMIT 1", (tenant,)).fetchone()[0]
+        database.execute("UPDATE Objects SET marked_for_deletion = 1 WHERE id = (SELECT author FROM ModelRevisions "
+                         "GROUP BY author ORDER BY COUNT(*) DESC LIMIT 1)")
+        database.execute("UPDATE Objects SET tenant = ? WHERE id = (SELECT MIN(author) FROM ModelRevisions)",
+                         (other_tenant,))
+        database.execute("DELETE FROM Objects WHERE id = (SELECT MAX(id) FROM ModelRevisions)")
+        database.execute("INSERT INTO ModelRevisions SELECT id || '-copy', model, author, revision_number, "
+                         "creation_date FROM ModelRevisions WHERE model = ?", (model,))
+        database.commit()
+        database.close()
+
+        self.assertIndexesEqual()
+
+    def test_returned_users_are_copies(self):
+        """Tests if modifying a returned user does not change later answers of the shared index."""
+        database = dbapi.connect(self.database_file_path)
+        database.execute("UPDATE Objects SET marked_for_deletion = 0")
+        database.commit()
+        database.close()
+
+        index = VectorizedIndex.for_database(self.database_file_path)
+        tenant_id = next(tenant_id for tenant_id in index.tenant_ids if index.get_most_active_users(tenant_id))
+
+        first_names = [user.first_name for user in index.get_most_active_users(tenant_id)]
+        index.get_most_active_users(tenant_id)[0].first_name = "changed"
+        self.assertEqual(first_names, [user.first_name for user in index.get_most_active_users(tenant_id)])
+
+    def test_revision_counts_by_bucket(self):
+        """Tests if the revisions are counted per time bucket."""
+        index = VectorizedIndex.for_database(self.database_file_path)
+        self.assertIs(index, VectorizedIndex.for_database(self.database_file_path))
+
+        database = dbapi.connect(self.database_file_path)
+        creation_dates = [row[0] for row in database.execute("SELECT creation_date FROM ModelRevisions")]
+        database.close()
+
+        width = 86400
+        origin = min(creation_dates)
+        counts = index.get_revision_counts_by_bucket(width, origin)
+        self.assertEqual(len(creation_dates), sum(counts))
+        self.assertEqual(sum(1 for date in creation_dates if date < origin + width), counts[0])
+        self.assertRaises(ValueError, index.get_revision_counts_by_bucket, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()